@@ -5,10 +5,98 @@ class Settings(BaseSettings):
     MONGO_URI: str
     DATABASE_NAME: str
     GROQ_API_KEY: str
+    # Point at backend/fake_llm_service for offline load / rate-limit testing
+    GROQ_BASE_URL: str | None = None
     LLM_MODEL: str
     CONTENT_SERVICE_URL: str
     CONFIDENCE_THRESHOLD: float = 0.35
 
+    # Shared LLM HTTP transport
+    LLM_HTTP2: bool = True
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_MAX_KEEPALIVE: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_REQUEST_TIMEOUT: float = 60.0
+    # Client-side pacing of the streaming MCQ pipeline stages only (other LLM
+    # calls are not throttled). Set to the Groq account's RPM: 1000 on the
+    # developer tier for llama-3.3-70b-versatile, 30 on the free tier.
+    LLM_PIPELINE_REQUESTS_PER_MINUTE: float = 1000.0
+    LLM_PIPELINE_MAX_BURST: int = 10
+
+    # Pooled content-service client
+    CONTENT_HTTP2: bool = True
+    CONTENT_MAX_CONNECTIONS: int = 20
+    CONTENT_MAX_KEEPALIVE: int = 10
+    CONTENT_TIMEOUT: float = 60.0
+    CONTENT_RETRIES: int = 3
+    CONTENT_RETRY_BASE_DELAY: float = 0.5
+    CONTENT_RETRY_MAX_DELAY: float = 8.0
+    CONTENT_BREAKER_FAILURES: int = 5
+    CONTENT_BREAKER_RESET_SECONDS: float = 30.0
+    CONTENT_HEDGE_ENABLED: bool = False
+    CONTENT_HEDGE_MIN_SAMPLES: int = 20
+
+    # LLM response cache (in-memory LRU + Mongo); on by default for low-temperature calls
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Single-shot MCQ generation mode
+    SINGLE_SHOT_BATCH_SIZE: int = 5
+    SINGLE_SHOT_CONCURRENCY: int = 3
+    SINGLE_SHOT_CONTEXT_CHARS: int = 6000
+    SINGLE_SHOT_MAX_ROUNDS: int = 3
+
+    # Streaming MCQ pipeline (per-stage concurrency limits)
+    PIPELINE_QUESTION_BATCH_SIZE: int = 3
+    PIPELINE_QUESTION_CONCURRENCY: int = 2
+    PIPELINE_RETRIEVAL_CONCURRENCY: int = 5
+    PIPELINE_DISTRACTOR_CONCURRENCY: int = 5
+
+    # Near-duplicate question filtering (cosine similarity of embeddings)
+    QUESTION_DEDUP_ENABLED: bool = True
+    QUESTION_DEDUP_THRESHOLD: float = 0.9
+
+    # Background evaluation feedback (SSE stream polling)
+    EVALUATION_STREAM_TIMEOUT_SECONDS: float = 120.0
+    EVALUATION_POLL_INTERVAL_SECONDS: float = 1.0
+    # Wrong-answer patterns whose feedback LLM calls run at once in bulk evaluation
+    BULK_FEEDBACK_CONCURRENCY: int = 4
+
+    # Student performance history: capped window on the student doc + monthly buckets
+    RECENT_PERFORMANCE_LIMIT: int = 20
+    PERFORMANCE_BUCKET_MAX_ENTRIES: int = 200
+
+    # In-memory LRU of compiled quizzes used for evaluation
+    QUIZ_CACHE_MAX_ENTRIES: int = 256
+
+    # Per-student concept mastery: weight of the newest quiz in the decayed score
+    MASTERY_EMA_ALPHA: float = 0.3
+
+    # Distributed tracing (opt-in): spans go to a local JSON-lines file, and to OTLP/HTTP if an endpoint is set
+    TRACING_ENABLED: bool = False
+    TRACE_FILE: str | None = "traces/agentic_ai_service.jsonl"
+    TRACE_OTLP_ENDPOINT: str | None = None  # e.g. http://localhost:4318/v1/traces
+    TRACE_SAMPLE_RATIO: float = 1.0
+
+    # Pre-generated question bank
+    QUESTION_BANK_ENABLED: bool = True
+    # Refill spends LLM calls; enable it on one process (e.g. a mcq_worker), not every API replica
+    QUESTION_BANK_REFILL_ENABLED: bool = False
+    QUESTION_BANK_DIFFICULTIES: list[str] = ["easy", "medium", "hard"]
+    QUESTION_BANK_LOW_WATER: int = 30
+    QUESTION_BANK_TARGET: int = 60
+    QUESTION_BANK_REFILL_BATCH: int = 20
+    QUESTION_BANK_REFILL_INTERVAL_SECONDS: float = 300.0
+
+    # MCQ generation job queue
+    MCQ_INPROCESS_WORKERS: int = 1  # 0 when dedicated app.workers.mcq_worker processes run
+    MCQ_JOB_LEASE_SECONDS: float = 60.0
+    MCQ_JOB_MAX_ATTEMPTS: int = 3
+    MCQ_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    MCQ_JOB_WAIT_SECONDS: float = 25.0
+
     class Config:
         env_file = ".env"
 
@@ -6,4 +6,32 @@ db = client[settings.DATABASE_NAME]
 
 quizzes_collection = db["quizzes"]
 evaluations_collection = db["evaluations"]
-students_collection = db["students"]
\ No newline at end of file
+students_collection = db["students"]
+performance_history_collection = db["performance_history"]
+student_mastery_collection = db["student_mastery"]
+question_bank_collection = db["question_bank"]
+question_bank_served_collection = db["question_bank_served"]
+mcq_jobs_collection = db["mcq_jobs"]
+llm_cache_collection = db["llm_cache"]
+
+
+async def ensure_indexes():
+    """Create the indexes the agentic service relies on (idempotent)."""
+    await question_bank_collection.create_index(
+        [("class_level", 1), ("topic_id", 1), ("difficulty", 1), ("question_hash", 1)],
+        unique=True,
+    )
+    await question_bank_served_collection.create_index(
+        [("student_id", 1), ("question_id", 1)],
+        unique=True,
+    )
+    await question_bank_served_collection.create_index(
+        [("student_id", 1), ("class_level", 1), ("topic_id", 1), ("difficulty", 1)]
+    )
+    await mcq_jobs_collection.create_index([("status", 1), ("created_at", 1)])
+    await mcq_jobs_collection.create_index([("status", 1), ("lease_expires_at", 1)])
+    await students_collection.create_index("student_id")
+    await performance_history_collection.create_index([("student_id", 1), ("month", -1), ("count", 1)])
+    await student_mastery_collection.create_index("student_id", unique=True)
+    # Mongo removes expired LLM responses on its own
+    await llm_cache_collection.create_index("expires_at", expireAfterSeconds=0)
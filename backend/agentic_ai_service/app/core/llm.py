@@ -1,13 +1,146 @@
+import httpx
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_groq import ChatGroq
 from app.core.config import settings
+from app.core.instrumentation import record_llm_tokens
+from app.core.llm_cache import llm_cache
 
 
-def get_llm(temperature: float = 0.3):
-    return ChatGroq(
-        model=settings.LLM_MODEL,
-        api_key=settings.GROQ_API_KEY,
-        temperature=temperature,
-        model_kwargs={
-            "response_format": {"type": "json_object"}
-        }
-    )
\ No newline at end of file
+# One pooled HTTP transport shared by every ChatGroq client so that calls
+# reuse keep-alive (and HTTP/2) connections instead of a fresh TLS handshake.
+_http_client: httpx.AsyncClient | None = None
+
+# Token bucket shared by the streaming MCQ pipeline stages (get_llm(rate_limited=True)),
+# so their concurrent calls are paced together instead of tripping 429s.
+# Evaluation, feedback and single-shot calls do not draw from it.
+pipeline_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=settings.LLM_PIPELINE_REQUESTS_PER_MINUTE / 60,
+    check_every_n_seconds=0.05,
+    max_bucket_size=settings.LLM_PIPELINE_MAX_BURST,
+)
+
+# (model, temperature, response_format, cached, rate_limited) -> ChatGroq
+_llm_registry: dict[tuple, ChatGroq] = {}
+
+_connection_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "tls_handshakes": 0,
+}
+
+
+async def _trace_connection(event_name: str, info: dict):
+    """httpcore trace hook: only fires connect/TLS events for new connections."""
+    if event_name == "connection.connect_tcp.complete":
+        _connection_stats["new_connections"] += 1
+    elif event_name == "connection.start_tls.complete":
+        _connection_stats["tls_handshakes"] += 1
+
+
+async def _on_request(request: httpx.Request):
+    request.extensions["trace"] = _trace_connection
+
+
+async def _on_response(response: httpx.Response):
+    _connection_stats["requests"] += 1
+
+
+class _TokenUsageHandler(AsyncCallbackHandler):
+    """Feeds Groq token usage into the LLM token histogram (cache hits carry no usage)."""
+
+    async def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            record_llm_tokens(
+                (response.llm_output or {}).get("model_name", settings.LLM_MODEL),
+                usage.get("prompt_tokens"),
+                usage.get("completion_tokens"),
+            )
+
+
+_token_usage_handler = _TokenUsageHandler()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=settings.LLM_HTTP2,
+            timeout=settings.LLM_REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            event_hooks={"request": [_on_request], "response": [_on_response]},
+        )
+    return _http_client
+
+
+def get_llm(temperature: float = 0.3,
+            response_format: str | None = "json_object",
+            cache: bool | None = None,
+            rate_limited: bool = False):
+    """
+    Return a cached ChatGroq client for (model, temperature, response_format).
+    All clients share the pooled HTTP transport from get_http_client().
+
+    cache=None caches responses for calls at or below LLM_CACHE_MAX_TEMPERATURE;
+    pass cache=False for calls that must produce fresh output for the same prompt.
+    rate_limited=True paces the call with the MCQ pipeline's shared limiter.
+    """
+    if cache is None:
+        cache = temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+    cache = cache and settings.LLM_CACHE_ENABLED
+
+    key = (settings.LLM_MODEL, temperature, response_format, cache, rate_limited)
+
+    llm = _llm_registry.get(key)
+    if llm is None:
+        model_kwargs = {}
+        if response_format:
+            model_kwargs["response_format"] = {"type": response_format}
+
+        llm = ChatGroq(
+            model=settings.LLM_MODEL,
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+            temperature=temperature,
+            model_kwargs=model_kwargs,
+            http_async_client=get_http_client(),
+            rate_limiter=pipeline_rate_limiter if rate_limited else None,
+            cache=llm_cache if cache else False,
+            callbacks=[_token_usage_handler],
+        )
+        _llm_registry[key] = llm
+
+    return llm
+
+
+def get_llm_client_stats() -> dict:
+    """Connection-reuse metrics for the shared LLM HTTP transport."""
+    requests = _connection_stats["requests"]
+    new_connections = _connection_stats["new_connections"]
+    reused = max(requests - new_connections, 0)
+
+    return {
+        "cached_clients": len(_llm_registry),
+        "http2": settings.LLM_HTTP2,
+        "requests": requests,
+        "new_connections": new_connections,
+        "tls_handshakes": _connection_stats["tls_handshakes"],
+        "reused_requests": reused,
+        "reuse_ratio": round(reused / requests, 4) if requests else 0.0,
+        "response_cache": llm_cache.get_stats(),
+    }
+
+
+async def close_llm_clients():
+    global _http_client
+
+    _llm_registry.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -0,0 +1,149 @@
+# app/core/llm_cache.py
+
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from app.core.config import settings
+from app.core.database import llm_cache_collection
+from app.core.instrumentation import record_cache
+
+
+# Cached rows are only ever revived as plain generations/messages
+_ALLOWED_OBJECTS = [Generation, ChatGeneration, AIMessage]
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    llm_string is LangChain's serialized model config (model, temperature,
+    response_format, ...), so the key covers (model, params, prompt).
+    """
+    return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class TieredLLMCache(BaseCache):
+    """
+    Two-tier LangChain response cache: an in-process LRU in front of a
+    Mongo collection shared by every API and worker process. Entries expire
+    after LLM_CACHE_TTL_SECONDS in both tiers (Mongo via a TTL index).
+
+    Only the async methods touch Mongo; the sync ones serve the LRU alone.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at monotonic, generations)
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, generations = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return generations
+
+    def _memory_put(self, key: str, generations, ttl: float | None = None):
+        ttl = self.ttl_seconds if ttl is None else ttl
+        if ttl <= 0:
+            # Explicit ttl=0 (or a Mongo entry at its expiry): do not cache
+            return
+        self._memory[key] = (time.monotonic() + ttl, generations)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ── sync interface (memory tier only) ────────────────────────
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        generations = self._memory_get(cache_key(prompt, llm_string))
+        self.stats["memory_hits" if generations is not None else "misses"] += 1
+        record_cache("llm_memory", generations is not None)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self._memory_put(cache_key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._memory.clear()
+
+    # ── async interface (memory, then Mongo) ─────────────────────
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+
+        generations = self._memory_get(key)
+        record_cache("llm_memory", generations is not None)
+        if generations is not None:
+            self.stats["memory_hits"] += 1
+            return generations
+
+        try:
+            doc = await llm_cache_collection.find_one({"_id": key})
+            # The TTL monitor only runs periodically, so check expiry here as well
+            if doc is not None and doc["expires_at"] >= datetime.utcnow():
+                generations = [loads(g, allowed_objects=_ALLOWED_OBJECTS) for g in doc["generations"]]
+        except Exception as e:
+            # The cache must never break generation
+            print(f"LLM cache lookup failed: {e}")
+            self.stats["errors"] += 1
+
+        record_cache("llm_mongo", generations is not None)
+        if generations is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._memory_put(key, generations, (doc["expires_at"] - datetime.utcnow()).total_seconds())
+        self.stats["mongo_hits"] += 1
+        return generations
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        self._memory_put(key, return_val)
+
+        now = datetime.utcnow()
+        try:
+            await llm_cache_collection.replace_one(
+                {"_id": key},
+                {
+                    "generations": [dumps(g) for g in return_val],
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+            self.stats["writes"] += 1
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+            self.stats["errors"] += 1
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self._memory.clear()
+        await llm_cache_collection.delete_many({})
+
+    def get_stats(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["mongo_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_entries": len(self._memory),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+llm_cache = TieredLLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,176 @@
+# shared/tracing.py
+"""
+Distributed tracing (OpenTelemetry) for the Knowscope services.
+
+Copied verbatim into each service (agentic: app/core/tracing.py,
+content: app/tracing.py); keep the copies in sync.
+
+- setup_tracing(service_name, ...) installs the tracer provider. Finished
+  spans are appended as JSON lines to a local file (works offline) and,
+  when an OTLP endpoint is configured, exported over OTLP/HTTP as well.
+- Server spans come from FastAPI's built-in OpenTelemetry support once
+  the provider is installed: one per request, continuing the caller's
+  trace from the W3C `traceparent` header and named after the route.
+  TraceIdMiddleware returns the trace id in `x-trace-id`.
+- client_span(name) wraps an outgoing call and yields the headers that
+  carry the trace to the next service.
+- trace_carrier() / continue_trace() hand a trace across a job queue.
+- Graph nodes and pipeline stages get their spans from @instrument /
+  stage_timer in instrumentation.py.
+
+Render a trace as a waterfall with:
+    python -m scripts.trace_waterfall <trace files...>
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from opentelemetry import trace
+from opentelemetry.propagate import extract, inject
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+
+
+# The span file is rotated to <file>.1 (one backup) once it reaches this size
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_tracer = trace.get_tracer("knowscope")
+_provider: TracerProvider | None = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line, rotating at max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int = TRACE_FILE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self._lock:
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+        except OSError as e:
+            print(f"Trace export to {self.path} failed: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing(service_name: str,
+                  file_path: str | None,
+                  otlp_endpoint: str | None = None,
+                  sample_ratio: float = 1.0):
+    """
+    Install the global tracer provider (once per process). Spans are sampled
+    per trace: a request continuing a sampled trace is always recorded.
+    """
+    global _provider
+
+    if _provider is not None:
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+
+    if file_path:
+        provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(file_path)))
+
+    if otlp_endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+        except ImportError:
+            print("opentelemetry-exporter-otlp-proto-http is not installed; OTLP export disabled")
+
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    print(f"Tracing enabled for {service_name} (file: {file_path or '-'}, otlp: {otlp_endpoint or '-'})")
+
+
+def shutdown_tracing():
+    """Flush pending spans; call on shutdown."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def current_trace_id() -> str | None:
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+
+@contextmanager
+def client_span(name: str, attributes: dict | None = None):
+    """
+    Span for an outgoing call. Yields the headers (traceparent) to send with
+    it, so the callee's server span becomes a child of this one.
+    """
+    with _tracer.start_as_current_span(name, kind=SpanKind.CLIENT, attributes=attributes):
+        headers: dict[str, str] = {}
+        inject(headers)
+        yield headers
+
+
+def trace_carrier() -> dict:
+    """The current trace context as a dict, e.g. to store on a queued job."""
+    carrier: dict[str, str] = {}
+    inject(carrier)
+    return carrier
+
+
+@contextmanager
+def continue_trace(name: str, carrier: dict | None, attributes: dict | None = None):
+    """Span continuing a trace handed over through trace_carrier()."""
+    with _tracer.start_as_current_span(
+        name,
+        context=extract(carrier or {}),
+        kind=SpanKind.CONSUMER,
+        attributes=attributes,
+    ) as span:
+        yield span
+
+
+class TraceIdMiddleware:
+    """
+    ASGI middleware: returns the trace id of the request in `x-trace-id`.
+    The server span itself (continuing the caller's traceparent, named after
+    the route) is created by FastAPI's built-in OpenTelemetry support.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = current_trace_id()
+        if trace_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-trace-id", trace_id.encode())],
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_with_trace_id)
@@ -1,6 +1,8 @@
 # app/graphs/evaluation_graph.py
 
+import asyncio
 from langgraph.graph import StateGraph, END
+from app.core.instrumentation import instrument
 from app.schemas.evaluation import EvaluationState
 from app.services.quiz_repository import get_quiz_by_id
 from app.nodes.scoring_node import evaluate_answers
@@ -12,14 +14,27 @@ from app.nodes.evaluation_nodes import (
     mongodb_update_node
 )
 from app.nodes.feedback_node import generate_feedback
-from app.core.database import evaluations_collection
-from datetime import datetime
+from app.services.evaluation_repository import complete_evaluation, save_evaluation
 
 
-def route_performance(state: EvaluationState):
+# Evaluations whose background feedback is still running in this process;
+# references are kept so the tasks are not garbage collected mid-flight
+_feedback_tasks: set[asyncio.Task] = set()
+# evaluation_id -> Event set when its feedback is stored (wakes SSE streams early)
+feedback_events: dict[str, asyncio.Event] = {}
+
+
+def _recommendation_branch(state: EvaluationState):
     if state["performance_level"] == "weak" or state["performance_level"] == "average":
-        return "weak_path"
-    return "strong_path"
+        return recommendation_node
+    return advancement_node
+
+
+def route_performance(state: EvaluationState):
+    """Fan out: the recommendation branch and feedback run in the same step."""
+    if _recommendation_branch(state) is recommendation_node:
+        return ["recommendation", "feedback"]
+    return ["advancement", "feedback"]
 
 
 # Define the Graph
@@ -39,22 +54,16 @@ workflow.set_entry_point("scoring")
 workflow.add_edge("scoring", "weak_topic_identifier")
 workflow.add_edge("weak_topic_identifier", "performance_analysis")
 
+# Parallel LLM branches: (recommendation | advancement) + feedback
 workflow.add_conditional_edges(
     "performance_analysis",
     route_performance,
-    {
-        "weak_path": "recommendation",
-        "strong_path": "advancement"
-    }
+    ["recommendation", "advancement", "feedback"]
 )
 
-# Weak Path
-workflow.add_edge("recommendation", "feedback")
-
-# Strong Path
-workflow.add_edge("advancement", "feedback")
-
 # Rejoin
+workflow.add_edge("recommendation", "mongodb_update")
+workflow.add_edge("advancement", "mongodb_update")
 workflow.add_edge("feedback", "mongodb_update")
 workflow.add_edge("mongodb_update", END)
 
@@ -62,7 +71,60 @@ workflow.add_edge("mongodb_update", END)
 evaluation_app = workflow.compile()
 
 
-async def run_evaluation_pipeline(student_id: str, quiz_id: str, user_answers: list[int]):
+def _score(state: EvaluationState) -> EvaluationState:
+    """The deterministic part of the graph: scoring and topic analysis, no I/O."""
+    state = evaluate_answers(state)
+    state = weak_topic_identifier_node(state)
+    return performance_analyzer_node(state)
+
+
+@instrument("evaluation", "background_feedback")
+async def _enrich_evaluation(evaluation_id: str, state: EvaluationState):
+    """Background: run feedback and the recommendation branch concurrently, then store them."""
+    try:
+        feedback, recommendations = await asyncio.gather(
+            generate_feedback(state),
+            _recommendation_branch(state)(state),
+        )
+        await complete_evaluation(evaluation_id, feedback["feedback"], recommendations["recommendations"])
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        await complete_evaluation(evaluation_id, "", "", feedback_status="failed")
+    finally:
+        event = feedback_events.pop(evaluation_id, None)
+        if event:
+            event.set()
+
+
+def _result(state: EvaluationState, evaluation_id: str, feedback_status: str) -> dict:
+    return {
+        "evaluation_id": evaluation_id,
+        "feedback_status": feedback_status,
+        "student_id": state["student_id"],
+        "quiz_id": state["quiz_id"],
+        "score": state["score"],
+        "correct_answers": state["correct_answers"],
+        "total_questions": state["total_questions"],
+        "strong_topics": state.get("strong_topics", []),
+        "weak_topics": state.get("weak_topics", []),
+        "feedback": state["feedback"],
+        "recommendations": state["recommendations"]
+    }
+
+
+@instrument("evaluation", "pipeline")
+async def run_evaluation_pipeline(student_id: str,
+                                  quiz_id: str,
+                                  user_answers: list[int],
+                                  async_feedback: bool = False):
+    """
+    async_feedback=False runs the whole graph and returns with feedback.
+    async_feedback=True scores, persists and returns immediately with
+    feedback_status="pending"; feedback and recommendations are generated
+    in the background and stored on the evaluation document.
+    """
 
     quiz = await get_quiz_by_id(quiz_id)
 
@@ -88,29 +150,23 @@ async def run_evaluation_pipeline(student_id: str, quiz_id: str, user_answers: l
         "details": []
     }
 
+    if async_feedback:
+        state = _score(initial_state)
+        await mongodb_update_node(state)
+
+        evaluation_id = await save_evaluation(state, feedback_status="pending")
+        feedback_events[evaluation_id] = asyncio.Event()
+
+        task = asyncio.create_task(_enrich_evaluation(evaluation_id, state))
+        _feedback_tasks.add(task)
+        task.add_done_callback(_feedback_tasks.discard)
+
+        return _result(state, evaluation_id, "pending")
+
     # Run LangGraph pipeline
     final_state = await evaluation_app.ainvoke(initial_state)
 
     # Store evaluation to collection (for record)
-    evaluation_doc = {
-        "student_id": student_id,
-        "quiz_id": quiz_id,
-        "subject": final_state["subject"],
-        "score_percentage": final_state["score"],
-        "feedback": final_state["feedback"],
-        "created_at": datetime.utcnow()
-    }
-
-    await evaluations_collection.insert_one(evaluation_doc)
+    evaluation_id = await save_evaluation(final_state, feedback_status="ready")
 
-    return {
-        "student_id": final_state["student_id"],
-        "quiz_id": final_state["quiz_id"],
-        "score": final_state["score"],
-        "correct_answers": final_state["correct_answers"],
-        "total_questions": final_state["total_questions"],
-        "strong_topics": final_state.get("strong_topics", []),
-        "weak_topics": final_state.get("weak_topics", []),
-        "feedback": final_state["feedback"],
-        "recommendations": final_state["recommendations"]
-    }
\ No newline at end of file
+    return _result(final_state, evaluation_id, "ready")
@@ -1,99 +1,261 @@
 # app/graphs/mcq_graph.py
 
 import asyncio
-from app.nodes.question_node import generate_concept_questions
-from app.nodes.retrieval_node import retrieve_valid_questions
+from app.core.config import settings
+from app.core.instrumentation import instrument, record_retry
+from app.nodes.batch_mcq_node import generate_mcq_set
+from app.nodes.question_node import generate_question_batch
+from app.nodes.retrieval_node import retrieve_single_question, retrieve_topic_context
 from app.nodes.distractor_node import generate_mcq
+from app.services.question_dedup import QuestionDeduplicator
 
 
+def _context_slices(chunks: list[dict], num_slices: int, max_chars: int) -> list[str]:
+    """
+    Deal retrieved chunks round-robin into one context string per LLM call, so
+    each call sees different material (more variety, fewer tokens per call).
+    """
+    slices = []
+    for i in range(num_slices):
+        parts, size = [], 0
+        for chunk in chunks[i::num_slices] or chunks:
+            text = chunk.get("text", "")
+            if size + len(text) > max_chars and parts:
+                break
+            parts.append(text[:max_chars])
+            size += len(text)
+        slices.append("\n\n".join(parts))
+    return slices
+
+
+async def _run_single_shot(subject: str,
+                           topic: str | None,
+                           difficulty: str,
+                           num_questions: int,
+                           top_k: int,
+                           class_level: str | None):
+    """
+    Retrieve topic context once, then ask the LLM for K complete MCQs per call
+    (question, answer, distractors, tags) instead of one call per stage per question.
+    """
+    chunks = await retrieve_topic_context(subject, topic, top_k=top_k, class_level=class_level)
+    print(f"Single-shot mode: grounded topic with {len(chunks)} chunks.")
+
+    batch_size = settings.SINGLE_SHOT_BATCH_SIZE
+    semaphore = asyncio.Semaphore(settings.SINGLE_SHOT_CONCURRENCY)
+    mcqs: list[dict] = []
+    dedup = QuestionDeduplicator()
+
+    async def _generate(count: int, context: str):
+        async with semaphore:
+            try:
+                return await generate_mcq_set(
+                    subject=subject,
+                    topic=topic,
+                    difficulty=difficulty,
+                    count=count,
+                    context=context,
+                    class_level=class_level,
+                    avoid_questions=[m["question"] for m in mcqs],
+                )
+            except Exception as e:
+                print(f"Single-shot MCQ batch failed: {e}")
+                return []
+
+    for round_index in range(settings.SINGLE_SHOT_MAX_ROUNDS):
+        # Small buffer on the first round to absorb malformed or duplicate items
+        missing = num_questions - len(mcqs)
+        if round_index == 0:
+            missing += 2
+        if missing <= 0:
+            break
+
+        counts = [min(batch_size, missing - i) for i in range(0, missing, batch_size)]
+        contexts = _context_slices(chunks, len(counts), settings.SINGLE_SHOT_CONTEXT_CHARS)
+
+        print(f"Single-shot round {round_index + 1}: {len(counts)} LLM calls for {missing} MCQs...")
+        batches = await asyncio.gather(*[
+            _generate(count, context) for count, context in zip(counts, contexts)
+        ])
+
+        # One embedding call per round; later rounds only refill the rejected slots
+        mcqs.extend(await dedup.filter([mcq for batch in batches for mcq in batch]))
+
+        if len(mcqs) >= num_questions:
+            break
+
+    if len(mcqs) < num_questions:
+        raise ValueError(f"Failed to generate exactly {num_questions} complete MCQs: got {len(mcqs)}")
+
+    return mcqs[:num_questions]
+
+
+async def _generate_mcq_with_retry(item: dict):
+    try:
+        return await generate_mcq(item)
+    except Exception as e:
+        print(f"Error in distractor generation: {e}")
+        if "429" not in str(e):
+            return None
+        print("Rate limit hit during distractors. Backing off for 10 seconds...")
+        record_retry("llm.distractor", "429")
+        await asyncio.sleep(10)
+        try:
+            return await generate_mcq(item)
+        except Exception as retry_e:
+            print(f"Retry failed for distractors: {retry_e}")
+            return None
+
+
+async def _run_streaming_pipeline(subject: str,
+                                  topic: str | None,
+                                  difficulty: str,
+                                  num_questions: int,
+                                  top_k: int,
+                                  class_level: str | None):
+    """
+    question → retrieval → distractor stages connected by asyncio queues.
+    Each question flows on as soon as it exists; every stage has its own
+    concurrency limit and all LLM calls share the pipeline rate limiter.
+    Stops (and cancels surplus work) once num_questions MCQs are complete.
+    """
+    question_queue: asyncio.Queue = asyncio.Queue()
+    grounded_queue: asyncio.Queue = asyncio.Queue()
+    changed = asyncio.Event()
+    finished = asyncio.Event()
+
+    mcqs: list[dict] = []
+    dedup = QuestionDeduplicator()
+    # Questions still travelling through retrieval/distractors, and
+    # questions requested from the LLM but not returned yet
+    counters = {"in_flight": 0, "requested": 0, "generated": 0}
+    # Upper bound on questions requested from the LLM so failures cannot loop forever
+    question_budget = num_questions * 2 + 4
+    batch_size = settings.PIPELINE_QUESTION_BATCH_SIZE
+
+    def _item_done():
+        counters["in_flight"] -= 1
+        changed.set()
+
+    async def _question_batch(size: int, semaphore: asyncio.Semaphore):
+        try:
+            async with semaphore:
+                questions = await generate_question_batch(
+                    subject=subject,
+                    topic=topic,
+                    difficulty=difficulty,
+                    batch_size=size,
+                    class_level=class_level,
+                )
+
+            # Near-duplicates are dropped before they cost retrieval and distractor
+            # calls; the producer then requests replacements for just those slots
+            accepted = await dedup.filter(questions)
+            for q in accepted:
+                counters["in_flight"] += 1
+                question_queue.put_nowait(q)
+        finally:
+            # The whole request is charged, so empty or failed batches
+            # (generate_question_batch returns [] on errors) use up the budget too
+            counters["requested"] -= size
+            counters["generated"] += size
+            changed.set()
+
+    async def _produce_questions():
+        semaphore = asyncio.Semaphore(settings.PIPELINE_QUESTION_CONCURRENCY)
+        batch_tasks: set[asyncio.Task] = set()
+        try:
+            while not finished.is_set():
+                changed.clear()
+                for task in [t for t in batch_tasks if t.done()]:
+                    batch_tasks.discard(task)
+                    if task.exception():
+                        print(f"Error in question batch: {task.exception()}")
+
+                # Ask only for what the questions already in the pipeline cannot cover
+                needed = num_questions - len(mcqs) - counters["in_flight"] - counters["requested"]
+                budget = question_budget - counters["generated"] - counters["requested"]
+                if needed > 0 and budget > 0:
+                    size = min(batch_size, needed, budget)
+                    counters["requested"] += size
+                    batch_tasks.add(asyncio.create_task(_question_batch(size, semaphore)))
+                    continue
+
+                if needed > 0 and not batch_tasks and counters["in_flight"] == 0:
+                    print("Question budget exhausted before enough MCQs were completed.")
+                    finished.set()
+                    break
+
+                await changed.wait()
+        except Exception as e:
+            print(f"Question producer failed: {e}")
+            finished.set()
+        finally:
+            for task in batch_tasks:
+                task.cancel()
+
+    async def _retrieval_worker():
+        while True:
+            question = await question_queue.get()
+            try:
+                grounded = await retrieve_single_question(question, subject, topic, top_k)
+            except Exception as e:
+                print(f"Error grounding question: {e}")
+                grounded = None
+
+            if grounded is None:
+                _item_done()
+                continue
+
+            grounded_queue.put_nowait({
+                **grounded,
+                "concept_tags": question.get("concept_tags", [])
+            })
+
+    async def _distractor_worker():
+        while True:
+            item = await grounded_queue.get()
+            mcq = await _generate_mcq_with_retry(item)
+            if mcq is not None and not finished.is_set():
+                mcqs.append(mcq)
+                print(f"[{len(mcqs)}/{num_questions}] MCQ ready:", mcq.get("question", "")[:50], "...")
+                if len(mcqs) >= num_questions:
+                    finished.set()
+            _item_done()
+
+    tasks = [asyncio.create_task(_produce_questions())]
+    tasks += [asyncio.create_task(_retrieval_worker()) for _ in range(settings.PIPELINE_RETRIEVAL_CONCURRENCY)]
+    tasks += [asyncio.create_task(_distractor_worker()) for _ in range(settings.PIPELINE_DISTRACTOR_CONCURRENCY)]
+
+    try:
+        await finished.wait()
+    finally:
+        # Cancel surplus question generation, retrieval and distractor work
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if len(mcqs) < num_questions:
+        raise ValueError(f"Failed to generate exactly {num_questions} complete MCQs: got {len(mcqs)}")
+
+    return mcqs[:num_questions]
+
+
+@instrument("mcq", "pipeline")
 async def run_mcq_pipeline(subject: str,
                            topic: str | None,
                            difficulty: str,
                            num_questions: int = 20,
                            top_k: int = 6,
-                           class_level: str | None = None):
+                           class_level: str | None = None,
+                           mode: str = "pipeline"):
     """
     Full MCQ generation pipeline enforcing exactly N questions and batched LLM calls.
-    """
 
-    # 1️⃣ Generate conceptual questions (buffer strategy)
-    questions = await generate_concept_questions(
-        subject=subject,
-        topic=topic,
-        difficulty=difficulty,
-        num_questions=num_questions,
-        class_level=class_level
-    )
-
-    # 2️⃣ Retrieve grounded answers
-    grounded = await retrieve_valid_questions(
-        questions=questions,  # Each question is now a dict with topic_id, concept_tags
-        subject=subject,
-        topic=topic,
-        top_k=top_k,
-        required_count=num_questions
-    )
-
-    if len(grounded) < num_questions:
-        raise ValueError(f"Not enough grounded questions generated: got {len(grounded)}, required {num_questions}")
-        
-    # We maintain strictly the required count
-    grounded = grounded[:num_questions]
-
-    # 3️⃣ Generate MCQs with exactly 4 options (in batches to avoid rate limits)
-    mcqs = []
-    batch_size = 5
-    
-    # Process exactly in batches
-    for i in range(0, len(grounded), batch_size):
-        batch = grounded[i:i + batch_size]
-        batch_tasks = []
-        
-        for item in batch:
-            # We need to map the original metadata back
-            original_q_dict = next((q for q in questions if q.get("question") == item["question"]), {})
-            concept_tags = original_q_dict.get("concept_tags", [])
-            
-            full_item = {
-                **item,
-                "concept_tags": concept_tags
-            }
-            batch_tasks.append(generate_mcq(full_item))
-
-        print(f"Generating distractors for batch {i//batch_size + 1} / {(len(grounded) + batch_size - 1)//batch_size}...")
-        
-        # Add sleep between batches (excluding the first batch)
-        if i > 0:
-            await asyncio.sleep(2.5)
+    mode="pipeline"    — streaming question → retrieval → distractor stages per question.
+    mode="single_shot" — one topic retrieval, then K complete MCQs per LLM call.
+    """
+    if mode == "single_shot":
+        return await _run_single_shot(subject, topic, difficulty, num_questions, top_k, class_level)
 
-        try:
-            batch_results = await asyncio.gather(*batch_tasks)
-            mcqs.extend(batch_results)
-        except Exception as e:
-            print(f"Error in distractor generation batch {i//batch_size + 1}: {e}")
-            if "429" in str(e):
-                print("Rate limit hit during distractors. Backing off for 10 seconds...")
-                await asyncio.sleep(10)
-                # Retry strategy
-                try:
-                    batch_results = await asyncio.gather(*[
-                        generate_mcq({
-                            **item, 
-                            "concept_tags": next((q for q in questions if q.get("question") == item["question"]), {}).get("concept_tags", [])
-                        }) for item in batch
-                    ])
-                    mcqs.extend(batch_results)
-                except Exception as retry_e:
-                    print(f"Retry failed for distractor batch: {retry_e}")
-                    raise retry_e
-            else:
-                raise e
-
-    if len(mcqs) != num_questions:
-        raise ValueError(f"Failed to generate exactly {num_questions} complete MCQs")
-
-    print("===== GENERATED MCQS =====")
-    for i, m in enumerate(mcqs):
-       print(f"[{i+1}/{len(mcqs)}]", m.get("question")[:50], "...")
-    print("===========================")
-    return mcqs
+    return await _run_streaming_pipeline(subject, topic, difficulty, num_questions, top_k, class_level)
@@ -1,15 +1,70 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.graphs.evaluation_graph import run_evaluation_pipeline
-from app.graphs.mcq_graph import run_mcq_pipeline
-from app.schemas.evaluation import EvaluationRequest, EvaluationResponse
-from app.schemas.mcq import MCQRequest, MCQResponse
-from app.services.quiz_repository import save_quiz
+from app.core.config import settings
+from app.core.database import ensure_indexes
+from app.core.instrumentation import TimingMiddleware, metrics_response
+from app.core.llm import close_llm_clients, get_llm_client_stats
+from app.core.tracing import TraceIdMiddleware, setup_tracing, shutdown_tracing
+from app.graphs.evaluation_graph import feedback_events, run_evaluation_pipeline
+from app.schemas.evaluation import (
+    BulkEvaluationRequest,
+    BulkEvaluationResponse,
+    EvaluationRequest,
+    EvaluationResponse,
+)
+from app.schemas.mastery import StudentMasteryResponse
+from app.schemas.mcq import MCQJobStatus, MCQRequest, MCQResponse
+from app.services.bulk_evaluation import run_bulk_evaluation
+from app.services.content_client import close_content_client, start_content_client
+from app.services.evaluation_repository import get_evaluation
+from app.services.job_queue import enqueue_job, wait_for_job
+from app.services.mastery_repository import get_student_mastery
+from app.services.question_bank import run_refill_loop
+from app.services.quiz_repository import get_quiz_cache_stats
+from app.services.quiz_generation import quiz_from_bank
+from app.workers.mcq_worker import run_worker, worker_id_prefix
 from app.utils.class_topic_mapper import list_supported_mappings, resolve_topic
 
 
-app = FastAPI(title="Knowscope Agentic Service")
+if settings.TRACING_ENABLED:
+    setup_tracing(
+        "agentic_ai_service",
+        settings.TRACE_FILE,
+        settings.TRACE_OTLP_ENDPOINT,
+        settings.TRACE_SAMPLE_RATIO,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    await start_content_client()
+
+    background_tasks = []
+    if settings.QUESTION_BANK_ENABLED and settings.QUESTION_BANK_REFILL_ENABLED:
+        background_tasks.append(asyncio.create_task(run_refill_loop()))
+
+    # Optional in-process workers; dedicated app.workers.mcq_worker processes scale independently
+    prefix = worker_id_prefix()
+    for i in range(settings.MCQ_INPROCESS_WORKERS):
+        background_tasks.append(asyncio.create_task(run_worker(f"{prefix}:api-{i}")))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await close_content_client()
+    await close_llm_clients()
+    shutdown_tracing()
+
+
+app = FastAPI(title="Knowscope Agentic Service", lifespan=lifespan)
 
 
 @app.get("/api/mcq/topics")
@@ -21,43 +76,81 @@ async def get_supported_topics():
     return {"mappings": list_supported_mappings()}
 
 
-@app.post("/api/mcq/generate", response_model=MCQResponse)
-async def generate_mcq(request: MCQRequest):
-    num_questions = request.num_questions or 20
-    top_k = request.top_k or 6
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """
+    Connection-reuse metrics for the pooled HTTP transport shared by all LLM
+    clients, plus response-cache hit rates.
+    """
+    return get_llm_client_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics: per-node/stage latency, HTTP latency per route,
+    LLM token usage, retries and cache hit/miss counters.
+    """
+    return metrics_response()
+
+
+@app.get("/api/mcq/quiz-cache/stats")
+async def get_quiz_cache_statistics():
+    """
+    Hit rate of the in-memory compiled-quiz cache used by evaluation.
+    """
+    return get_quiz_cache_stats()
+
+
+def _job_status(job: dict) -> dict:
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "result": job.get("result"),
+        "error": job.get("error"),
+    }
+
+
+def _job_response(job: dict):
+    """Finished jobs return the quiz (or their error); unfinished ones a 202 with the job id."""
+    if job["status"] == "done":
+        return job["result"]
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job.get("error_status", 500), detail=job.get("error") or "MCQ generation failed")
+    return JSONResponse(status_code=202, content=_job_status(job))
 
+
+@app.post(
+    "/api/mcq/generate",
+    response_model=MCQResponse,
+    responses={202: {"model": MCQJobStatus, "description": "Generation still running; poll /api/mcq/jobs/{job_id}"}},
+)
+async def generate_mcq(request: MCQRequest, wait: float | None = Query(None, ge=0, le=settings.MCQ_JOB_WAIT_SECONDS)):
+    """
+    Serve the quiz straight from the question bank when possible; otherwise
+    enqueue a generation job for the worker pool and long-poll for up to
+    `wait` seconds (default MCQ_JOB_WAIT_SECONDS). Still-running jobs
+    return 202 with a job_id to poll.
+    """
     try:
         # Resolve class_level → topic_id via the curriculum mapper
         topic = resolve_topic(request.subject, request.class_level)
 
-        mcqs = await run_mcq_pipeline(
-            subject=request.subject,
-            topic=topic,
-            difficulty=request.difficulty,
-            num_questions=num_questions,
-            top_k=top_k,
-            class_level=request.class_level,
-        )
+        quiz = await quiz_from_bank(request, topic)
+        if quiz is not None:
+            return quiz
 
-        quiz_id = await save_quiz(
-            subject=request.subject,
-            class_level=request.class_level,
-            topic=topic,
-            difficulty=request.difficulty,
-            questions=mcqs,
-        )
-
-        return {
-            "quiz_id": quiz_id,
-            "subject": request.subject,
-            "class_level": request.class_level,
-            "topic": topic,
-            "questions": mcqs,
-        }
+        job_id = await enqueue_job(request.model_dump(), topic)
+        job = await wait_for_job(job_id, settings.MCQ_JOB_WAIT_SECONDS if wait is None else wait)
+        return _job_response(job)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         import traceback
 
@@ -67,16 +160,53 @@ async def generate_mcq(request: MCQRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get(
+    "/api/mcq/jobs/{job_id}",
+    response_model=MCQResponse,
+    responses={202: {"model": MCQJobStatus, "description": "Generation still running"}},
+)
+async def get_mcq_job(job_id: str, wait: float = 0):
+    """
+    Poll (wait=0) or long-poll (wait>0 seconds) an MCQ generation job.
+    """
+    job = await wait_for_job(job_id, min(wait, settings.MCQ_JOB_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+def _evaluation_response(evaluation: dict) -> dict:
+    return {
+        "evaluation_id": evaluation["_id"],
+        "quiz_id": evaluation["quiz_id"],
+        "total_questions": evaluation["total_questions"],
+        "correct_answers": evaluation["correct_answers"],
+        "score_percentage": evaluation["score_percentage"],
+        "strong_areas": evaluation.get("strong_areas", []),
+        "weak_areas": evaluation.get("weak_areas", []),
+        "feedback": evaluation.get("feedback", ""),
+        "recommendations": evaluation.get("recommendations", ""),
+        "feedback_status": evaluation.get("feedback_status", "ready"),
+    }
+
+
 @app.post("/api/mcq/evaluate", response_model=EvaluationResponse)
 async def evaluate_quiz(request: EvaluationRequest):
+    """
+    Score a quiz. With async_feedback=true the score comes back immediately
+    (feedback_status="pending") and feedback/recommendations are generated
+    in the background.
+    """
     try:
         state = await run_evaluation_pipeline(
             student_id=request.student_id,
             quiz_id=request.quiz_id,
             user_answers=request.user_answers,
+            async_feedback=request.async_feedback,
         )
 
         return {
+            "evaluation_id": state["evaluation_id"],
             "quiz_id": state["quiz_id"],
             "total_questions": state["total_questions"],
             "correct_answers": state["correct_answers"],
@@ -85,6 +215,7 @@ async def evaluate_quiz(request: EvaluationRequest):
             "weak_areas": state["weak_topics"],
             "feedback": state.get("feedback", ""),
             "recommendations": state.get("recommendations", ""),
+            "feedback_status": state["feedback_status"],
         }
 
     except ValueError as e:
@@ -97,6 +228,100 @@ async def evaluate_quiz(request: EvaluationRequest):
         raise HTTPException(status_code=500, detail="Evaluation failed")
 
 
+@app.post("/api/mcq/evaluate/bulk", response_model=BulkEvaluationResponse)
+async def evaluate_quiz_bulk(request: BulkEvaluationRequest):
+    """
+    Grade a whole class on one quiz: the quiz is loaded once, all submissions
+    are scored together, and feedback is generated once per distinct
+    wrong-answer pattern and shared.
+    """
+    try:
+        return await run_bulk_evaluation(
+            quiz_id=request.quiz_id,
+            submissions=request.submissions,
+            with_feedback=request.generate_feedback,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Bulk evaluation failed")
+
+
+@app.get("/api/mcq/evaluations/{evaluation_id}", response_model=EvaluationResponse)
+async def get_evaluation_result(evaluation_id: str):
+    """
+    Fetch a stored evaluation, including feedback once it is ready.
+    """
+    evaluation = await get_evaluation(evaluation_id)
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+    return _evaluation_response(evaluation)
+
+
+@app.get("/api/mcq/evaluations/{evaluation_id}/stream")
+async def stream_evaluation(evaluation_id: str):
+    """
+    Server-Sent Events: a "score" event right away, then one "feedback"
+    event when feedback and recommendations are stored (or a "timeout" event).
+    """
+    evaluation = await get_evaluation(evaluation_id)
+    if not evaluation:
+        raise HTTPException(status_code=404, detail="Evaluation not found")
+
+    def _event(name: str, evaluation: dict) -> str:
+        payload = EvaluationResponse(**_evaluation_response(evaluation)).model_dump()
+        return f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+
+    async def _events():
+        yield _event("score", evaluation)
+
+        current = evaluation
+        deadline = asyncio.get_running_loop().time() + settings.EVALUATION_STREAM_TIMEOUT_SECONDS
+        while current.get("feedback_status") == "pending":
+            if asyncio.get_running_loop().time() >= deadline:
+                yield _event("timeout", current)
+                return
+
+            # Woken early when the feedback task runs in this process; other
+            # replicas' tasks are picked up by polling
+            event = feedback_events.get(evaluation_id)
+            try:
+                if event:
+                    await asyncio.wait_for(event.wait(), settings.EVALUATION_POLL_INTERVAL_SECONDS)
+                else:
+                    await asyncio.sleep(settings.EVALUATION_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            current = await get_evaluation(evaluation_id)
+
+        yield _event("feedback", current)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/students/{student_id}/mastery", response_model=StudentMasteryResponse)
+async def get_mastery(student_id: str):
+    """
+    Per-concept mastery for a student, served from the document the
+    evaluation pipeline maintains incrementally (one read, no history scan).
+    """
+    mastery = await get_student_mastery(student_id)
+    if not mastery:
+        raise HTTPException(status_code=404, detail="No mastery data for this student")
+    return mastery
+
+
+app.add_middleware(TimingMiddleware)
+app.add_middleware(TraceIdMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -0,0 +1,132 @@
+# app/nodes/batch_mcq_node.py
+
+import asyncio
+import random
+from pydantic import ValidationError
+from app.core.instrumentation import instrument, record_retry
+from app.core.llm import get_llm
+from app.schemas.mcq import MCQ
+from app.utils.json_parser import safe_json_parse
+
+
+def _build_mcq(item: dict, default_topic: str | None) -> dict | None:
+    """
+    Turn one LLM-generated {question, correct_answer, distractors, ...} item
+    into a validated MCQ dict with 4 shuffled options, or None if malformed.
+    """
+    question = str(item.get("question", "")).strip()
+    correct_answer = str(item.get("correct_answer", "")).strip()
+    distractors = [str(d).strip() for d in item.get("distractors", []) if str(d).strip()]
+
+    if not question or not correct_answer or len(distractors) != 3:
+        return None
+
+    options = distractors + [correct_answer]
+    # Only ONE correct answer can exist and options must be distinct
+    if len({opt.lower() for opt in options}) != 4:
+        return None
+
+    random.shuffle(options)
+
+    try:
+        mcq = MCQ(
+            question=question,
+            options=options,
+            correct_index=options.index(correct_answer),
+            topic_id=item.get("topic") or default_topic,
+            concept_tags=[str(tag) for tag in item.get("concept_tags", [])],
+        )
+    except ValidationError:
+        return None
+
+    return mcq.model_dump()
+
+
+@instrument("mcq", "single_shot_batch")
+async def generate_mcq_set(subject: str,
+                           topic: str | None,
+                           difficulty: str,
+                           count: int,
+                           context: str = "",
+                           class_level: str | None = None,
+                           avoid_questions: list[str] | None = None) -> list[dict]:
+    """
+    Generate `count` complete MCQs (question, correct answer, 3 distractors,
+    concept tags) in a single LLM call, grounded in the given textbook context.
+    Malformed items are dropped; the caller tops up any shortfall.
+    """
+    class_line = f"Class Level: {class_level}" if class_level else ""
+    topic_line = f"Topic (focus strictly on this): {topic}" if topic else ""
+    context_block = f"""
+Textbook Context (base every question and correct answer on this):
+{context}
+""" if context else ""
+    avoid_block = ""
+    if avoid_questions:
+        avoid_list = "\n".join(f"- {q}" for q in avoid_questions)
+        avoid_block = f"""
+Do NOT repeat or rephrase any of these existing questions:
+{avoid_list}
+"""
+
+    prompt = f"""
+You are an expert academic MCQ generator.
+{context_block}
+Generate {count} unique, non-repeating multiple-choice questions based on the following criteria:
+
+Subject: {subject}
+{class_line}
+{topic_line}
+Difficulty: {difficulty}
+{avoid_block}
+Rules:
+1. Questions must strictly belong to the given subject and class syllabus.
+2. Do not repeat concepts; ensure conceptual variety.
+3. The correct answer must be supported by the textbook context when it is provided.
+4. Correct answers and distractors MUST be extremely short (maximum 15 words each).
+5. Exactly 3 distractors per question: plausible, unambiguously incorrect, and not synonymous with the correct answer.
+6. NO "All of the above", "None of the above", or "A and B" style options.
+
+CRITICAL:
+Return ONLY valid JSON.
+Do NOT include markdown or ```json blocks.
+Do NOT include any text before or after the JSON.
+
+Output format MUST be:
+
+{{
+  "mcqs": [
+    {{
+      "question": "...",
+      "correct_answer": "...",
+      "distractors": ["...", "...", "..."],
+      "topic": "...",
+      "concept_tags": ["tag1", "tag2"]
+    }}
+  ]
+}}
+"""
+
+    llm = get_llm(temperature=0.4)
+
+    try:
+        response = await llm.ainvoke(prompt)
+    except Exception as e:
+        if "429" not in str(e):
+            raise
+        print("Rate limit hit during single-shot MCQ generation. Backing off for 10 seconds...")
+        record_retry("llm.single_shot_batch", "429")
+        await asyncio.sleep(10)
+        response = await llm.ainvoke(prompt)
+
+    data = safe_json_parse(response.content)
+    items = data.get("mcqs", []) if isinstance(data, dict) else []
+
+    mcqs = []
+    for item in items:
+        if isinstance(item, dict):
+            mcq = _build_mcq(item, topic)
+            if mcq:
+                mcqs.append(mcq)
+
+    return mcqs
@@ -1,24 +1,27 @@
 # app/nodes/distractor_node.py
 
 import random
+from app.core.instrumentation import instrument
 from app.core.llm import get_llm
 from app.utils.json_parser import safe_json_parse
 
+# The combined answer + distractor call runs at temperature 0 so the answer
+# key is deterministic; variety comes from sampling 3 of these candidates
+DISTRACTOR_CANDIDATES = 5
 
-async def generate_mcq(grounded_item: dict):
-    """
-    Generate exactly 3 distractors for a grounded correct answer,
-    then shuffle 4 total options and assign correct_index.
-    """
-    question = grounded_item.get("question", "")
-    correct_answer = grounded_item.get("answer", "")
-    topic_id = grounded_item.get("topic_id", "")
-    
-    # Check if the generator passed down the full dictionary with conceptual tags
-    # If the retrieval logic passes it properly.
-    concept_tags = grounded_item.get("concept_tags", [])
+DISTRACTOR_RULES = """
+Rules:
+- Distractors MUST be extremely short (maximum 15 words each). Each option must be a single concise phrase or number.
+- Only ONE correct answer can exist. Ensure the distractors are unambiguously incorrect but plausible.
+- Must be the same short length and style as the correct answer.
+- Must NOT repeat the correct answer or be synonymous with it.
+- NO "All of the above", "None of the above", or "A and B" style options.
+- Return STRICT JSON.
+"""
 
-    prompt = f"""
+
+def _distractor_prompt(question: str, correct_answer: str) -> str:
+    return f"""
 You are an expert MCQ generator formulating questions from retrieved context.
 
 Question:
@@ -28,34 +31,92 @@ Correct Answer (grounded in context):
 {correct_answer}
 
 Generate exactly 3 plausible but incorrect distractors.
+{DISTRACTOR_RULES}
+Output format:
+{{
+  "distractors": [
+    "option1",
+    "option2",
+    "option3"
+  ]
+}}
+"""
 
-Rules:
-- Distractors MUST be extremely short (maximum 15 words each). Each option must be a single concise phrase or number.
-- Only ONE correct answer can exist. Ensure the 3 distractors are unambiguously incorrect but plausible.
-- Must be the same short length and style as the correct answer.
-- Must NOT repeat the correct answer or be synonymous with it.
-- NO "All of the above", "None of the above", or "A and B" style options.
-- Return STRICT JSON.
 
+def _answer_and_distractor_prompt(question: str, context: str) -> str:
+    return f"""
+You are an expert MCQ generator formulating questions from retrieved context.
+
+Textbook Context:
+{context}
+
+Question:
+{question}
+
+First write the correct answer using ONLY the textbook context above
+(maximum 15 words, a single concise phrase or number).
+Then generate exactly {DISTRACTOR_CANDIDATES} plausible but incorrect distractors.
+{DISTRACTOR_RULES}
 Output format:
 {{
+  "answer": "correct answer",
   "distractors": [
     "option1",
     "option2",
-    "option3"
+    "option3",
+    "option4",
+    "option5"
   ]
 }}
 """
 
-    llm = get_llm(temperature=0.7)
+
+@instrument("mcq", "distractor")
+async def generate_mcq(grounded_item: dict):
+    """
+    Generate exactly 3 distractors for a grounded correct answer,
+    then shuffle 4 total options and assign correct_index.
+    Items grounded with textbook context (no answer yet) get the correct
+    answer extracted from that context in the same LLM call, at temperature 0,
+    and 3 of its DISTRACTOR_CANDIDATES distractors picked at random.
+    """
+    question = grounded_item.get("question", "")
+    correct_answer = grounded_item.get("answer", "")
+    topic_id = grounded_item.get("topic_id", "")
+    
+    # Check if the generator passed down the full dictionary with conceptual tags
+    # If the retrieval logic passes it properly.
+    concept_tags = grounded_item.get("concept_tags", [])
+
+    if correct_answer:
+        prompt = _distractor_prompt(question, correct_answer)
+        llm = get_llm(temperature=0.7, rate_limited=True)
+    else:
+        # Retrieval-only grounding returns textbook context instead of an answer,
+        # so the correct answer is extracted in the same call as the distractors.
+        prompt = _answer_and_distractor_prompt(question, grounded_item.get("context", ""))
+        llm = get_llm(temperature=0.0, rate_limited=True)
+
     response = await llm.ainvoke(prompt)
 
     data = safe_json_parse(response.content)
 
-    if "distractors" not in data or len(data["distractors"]) != 3:
-        raise ValueError("Invalid distractor format from LLM - must generate exactly 3 distractors.")
-
-    distractors = data["distractors"]
+    if correct_answer:
+        if "distractors" not in data or len(data["distractors"]) != 3:
+            raise ValueError("Invalid distractor format from LLM - must generate exactly 3 distractors.")
+        distractors = data["distractors"]
+    else:
+        correct_answer = str(data.get("answer", "")).strip()
+        if not correct_answer:
+            raise ValueError("Invalid answer format from LLM - missing grounded correct answer.")
+
+        candidates = list(dict.fromkeys(
+            str(d).strip() for d in data.get("distractors") or []
+            if str(d).strip() and str(d).strip().lower() != correct_answer.lower()
+        ))
+        if len(candidates) < 3:
+            raise ValueError("Invalid distractor format from LLM - fewer than 3 usable distractors.")
+        distractors = random.sample(candidates, 3)
 
     # Build exactly 4 options list
     options = distractors + [correct_answer]
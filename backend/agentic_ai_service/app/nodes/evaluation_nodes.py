@@ -2,25 +2,32 @@
 
 from app.schemas.evaluation import EvaluationState
 from app.core.llm import get_llm
-from app.core.database import students_collection
-from app.services.content_client import query_content_service
+from app.core.config import settings
+from app.core.database import performance_history_collection, student_mastery_collection, students_collection
+from app.core.instrumentation import instrument
+from app.services.content_client import ground_queries
 from datetime import datetime
+import re
 
 
+def performance_level(score: float) -> str:
+    if score >= 70:
+        return "strong"
+    elif score >= 50:
+        return "average"
+    return "weak"
+
+
+@instrument("evaluation", "performance_analysis")
 def performance_analyzer_node(state: EvaluationState) -> EvaluationState:
     score = (state["correct_answers"] / state["total_questions"]) * 100
     state["score"] = round(score, 2)
-    
-    if score >= 70:
-        state["performance_level"] = "strong"
-    elif score >= 50:
-        state["performance_level"] = "average"
-    else:
-        state["performance_level"] = "weak"
+    state["performance_level"] = performance_level(score)
         
     return state
 
 
+@instrument("evaluation", "weak_topic_identifier")
 def weak_topic_identifier_node(state: EvaluationState) -> EvaluationState:
     weak_concepts = set()
     strong_concepts = set()
@@ -49,17 +56,23 @@ def weak_topic_identifier_node(state: EvaluationState) -> EvaluationState:
 
 from app.utils.json_parser import safe_json_parse
 
-async def recommendation_node(state: EvaluationState) -> EvaluationState:
+@instrument("evaluation", "recommendation")
+async def recommendation_node(state: EvaluationState) -> dict:
+    """Returns only {"recommendations": ...}; runs in parallel with feedback."""
     if not state["weak_topics"]:
-        state["recommendations"] = "Keep up the excellent work!"
-        return state
+        return {"recommendations": "Keep up the excellent work!"}
         
-    # Attempt to retrieve context for the weakest topic
+    # Retrieval-only grounding for the weakest topic (no /ask LLM hop)
     weakest_topic = state["weak_topics"][0]
     query = f"topic_id: {weakest_topic} OR {weakest_topic}"
-    result = await query_content_service(question=query, top_k=3)
-    
-    context = result.get("answer", "") if result else ""
+    try:
+        results = await ground_queries([query], top_k=3)
+        chunks = results[0].get("chunks", []) if results else []
+    except Exception as e:
+        print(f"Recommendation grounding failed: {e}")
+        chunks = []
+
+    context = "\n\n".join(c.get("text", "") for c in chunks)
     
     prompt = f"""
     The student recently struggled with the topic '{weakest_topic}' in '{state['subject']}'.
@@ -82,13 +95,14 @@ async def recommendation_node(state: EvaluationState) -> EvaluationState:
     
     try:
         data = safe_json_parse(response.content)
-        state["recommendations"] = data.get("recommendations", "").strip()
+        return {"recommendations": data.get("recommendations", "").strip()}
     except Exception:
-        state["recommendations"] = "Focus on reviewing your weak topics and practice more."
-    return state
+        return {"recommendations": "Focus on reviewing your weak topics and practice more."}
 
 
-async def advancement_node(state: EvaluationState) -> EvaluationState:
+@instrument("evaluation", "advancement")
+async def advancement_node(state: EvaluationState) -> dict:
+    """Returns only {"recommendations": ...}; runs in parallel with feedback."""
     prompt = f"""
     The student recently scored {state['score']}% on a '{state['subject']}' assessment for topic '{state['topic']}'.
     They demonstrate strong mastery of the concepts.
@@ -108,47 +122,164 @@ async def advancement_node(state: EvaluationState) -> EvaluationState:
     
     try:
         data = safe_json_parse(response.content)
-        state["recommendations"] = data.get("recommendations", "").strip()
+        return {"recommendations": data.get("recommendations", "").strip()}
     except Exception:
-        state["recommendations"] = "You're doing great! Keep tackling advanced material in this subject."
-    return state
-
+        return {"recommendations": "You're doing great! Keep tackling advanced material in this subject."}
 
-async def mongodb_update_node(state: EvaluationState) -> EvaluationState:
-    student_id = state.get("student_id")
-    if not student_id:
-        return state
 
-    # Structure the history entry
-    history_entry = {
+def _history_entry(state: EvaluationState, assessed_at: datetime) -> dict:
+    return {
         "quiz_id": state["quiz_id"],
         "subject": state["subject"],
         "topic": state["topic"],
         "score": state["score"],
-        "assessed_at": datetime.utcnow()
+        "assessed_at": assessed_at
     }
 
-    # Increment logic for weak topics
-    weakness_inc = {f"weakness_counter.{wt}": 1 for wt in state["weak_topics"]}
-    
+
+def student_update(state: EvaluationState, assessed_at: datetime | None = None) -> dict:
+    """
+    The students_collection update for one scored evaluation. The student
+    document stays bounded: a $slice-capped recent window plus running
+    summary stats; the full history lives in performance_history buckets.
+    """
+    assessed_at = assessed_at or datetime.utcnow()
+
     # Update strength map logic
     strength_set = {f"topic_strength_map.{st}": "mastered" for st in state["strong_topics"]}
     strength_set.update({f"topic_strength_map.{wt}": "struggling" for wt in state["weak_topics"]})
 
-    update_doc = {
-        "$push": {"performance_history": history_entry},
+    return {
+        "$push": {
+            "recent_performance": {
+                "$each": [_history_entry(state, assessed_at)],
+                "$slice": -settings.RECENT_PERFORMANCE_LIMIT
+            }
+        },
+        "$inc": {
+            "performance_summary.assessments": 1,
+            "performance_summary.score_sum": state["score"]
+        },
+        "$max": {"performance_summary.best_score": state["score"]},
+        "$min": {"performance_summary.lowest_score": state["score"]},
         "$set": {
-            "last_assessed": datetime.utcnow(),
+            "last_assessed": assessed_at,
+            "performance_summary.last_score": state["score"],
             **strength_set
         }
     }
-    
-    if weakness_inc:
-        update_doc["$inc"] = weakness_inc
+
+
+def history_bucket_update(state: EvaluationState, assessed_at: datetime | None = None) -> tuple[dict, dict]:
+    """
+    (filter, update) appending one evaluation to the student's monthly
+    performance_history bucket. A full bucket no longer matches the filter,
+    so the upsert starts a new one for the same month.
+    """
+    assessed_at = assessed_at or datetime.utcnow()
+
+    bucket_filter = {
+        "student_id": state["student_id"],
+        "month": assessed_at.strftime("%Y-%m"),
+        "count": {"$lt": settings.PERFORMANCE_BUCKET_MAX_ENTRIES}
+    }
+
+    # Increment logic for weak topics
+    weakness_inc = {f"weakness_counter.{wt}": 1 for wt in state["weak_topics"]}
+
+    update_doc = {
+        "$push": {"entries": _history_entry(state, assessed_at)},
+        "$inc": {"count": 1, "score_sum": state["score"], **weakness_inc},
+        "$min": {"first_assessed": assessed_at},
+        "$max": {"last_assessed": assessed_at}
+    }
+
+    return bucket_filter, update_doc
+
+
+def concept_key(tag: str) -> str:
+    """Field-name-safe key for a concept tag (no '.', '$' or spaces)."""
+    return re.sub(r"[^a-z0-9]+", "_", str(tag).lower()).strip("_") or "unknown"
+
+
+def concept_counts(state: EvaluationState) -> dict[str, tuple[int, int]]:
+    """{concept tag: (attempts, correct)} for one scored quiz."""
+    counts: dict[str, list[int]] = {}
+    for detail in state["details"]:
+        # Fallback to topic_id if concept_tags is somehow empty
+        tags = detail.get("concept_tags") or [detail.get("topic_id", state.get("topic", "Unknown"))]
+        for tag in dict.fromkeys(tags):
+            entry = counts.setdefault(tag, [0, 0])
+            entry[0] += 1
+            entry[1] += int(detail["is_correct"])
+    return {tag: (attempts, correct) for tag, (attempts, correct) in counts.items()}
+
+
+def _decayed(field: str, value: float) -> dict:
+    """
+    Aggregation expression: EMA of `field` with the new observation `value`.
+    A missing previous value is seeded with the observation itself.
+    """
+    alpha = settings.MASTERY_EMA_ALPHA
+    return {"$add": [alpha * value, {"$multiply": [1 - alpha, {"$ifNull": [f"${field}", value]}]}]}
+
+
+def mastery_update(state: EvaluationState,
+                   counts: dict[str, tuple[int, int]],
+                   assessed_at: datetime | None = None) -> list[dict]:
+    """
+    Aggregation-pipeline update for the student_mastery document: per-concept
+    attempt/correct counters and an exponentially decayed mastery score, all
+    computed by Mongo against the current values in one atomic update.
+    """
+    assessed_at = assessed_at or datetime.utcnow()
+
+    # Tags that only differ in case/punctuation share one concept entry
+    merged: dict[str, list] = {}
+    for tag, (attempts, correct) in counts.items():
+        entry = merged.setdefault(concept_key(tag), [tag, 0, 0])
+        entry[1] += attempts
+        entry[2] += correct
+
+    concept_fields = {}
+    for key, (tag, attempts, correct) in merged.items():
+        field = f"concepts.{key}"
+        concept_fields[field] = {
+            "concept": {"$literal": tag},
+            "attempts": {"$add": [{"$ifNull": [f"${field}.attempts", 0]}, attempts]},
+            "correct": {"$add": [{"$ifNull": [f"${field}.correct", 0]}, correct]},
+            "mastery": _decayed(f"{field}.mastery", correct / attempts),
+            "last_seen": assessed_at
+        }
+
+    return [{
+        "$set": {
+            **concept_fields,
+            "quizzes_taken": {"$add": [{"$ifNull": ["$quizzes_taken", 0]}, 1]},
+            "overall_mastery": _decayed("overall_mastery", state["score"] / 100),
+            "updated_at": assessed_at
+        }
+    }]
+
+
+@instrument("evaluation", "mongodb_update")
+async def mongodb_update_node(state: EvaluationState) -> EvaluationState:
+    student_id = state.get("student_id")
+    if not student_id:
+        return state
+
+    assessed_at = datetime.utcnow()
+    bucket_filter, bucket_update = history_bucket_update(state, assessed_at)
 
     await students_collection.update_one(
         {"student_id": student_id},
-        update_doc,
+        student_update(state, assessed_at),
+        upsert=True
+    )
+    await performance_history_collection.update_one(bucket_filter, bucket_update, upsert=True)
+    await student_mastery_collection.update_one(
+        {"student_id": student_id},
+        mastery_update(state, concept_counts(state), assessed_at),
         upsert=True
     )
 
@@ -1,10 +1,16 @@
 # app/nodes/feedback_node.py
 
 from app.core.llm import get_llm
+from app.core.instrumentation import instrument
 from app.utils.json_parser import safe_json_parse
 from app.schemas.evaluation import EvaluationState
 
-async def generate_feedback(state: EvaluationState) -> EvaluationState:
+@instrument("evaluation", "feedback")
+async def generate_feedback(state: EvaluationState) -> dict:
+    """
+    Returns only {"feedback": ...} so it can run in parallel with the
+    recommendation branch without conflicting state writes.
+    """
 
     weak_questions = [
         item["question"]
@@ -13,8 +19,7 @@ async def generate_feedback(state: EvaluationState) -> EvaluationState:
     ]
 
     if not weak_questions:
-        state["feedback"] = "Excellent performance. You've demonstrated a strong understanding of all tested concepts."
-        return state
+        return {"feedback": "Excellent performance. You've demonstrated a strong understanding of all tested concepts."}
 
     prompt = f"""
 You are an academic tutor providing feedback to a student.
@@ -41,6 +46,4 @@ Return STRICT JSON:
     response = await llm.ainvoke(prompt)
 
     parsed = safe_json_parse(response.content)
-    state["feedback"] = parsed.get("summary", "Keep practicing the topics you struggled with.")
-    
-    return state
\ No newline at end of file
+    return {"feedback": parsed.get("summary", "Keep practicing the topics you struggled with.")}
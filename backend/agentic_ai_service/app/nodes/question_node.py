@@ -1,42 +1,44 @@
 # app/nodes/question_node.py
 
 import asyncio
+from app.core.instrumentation import instrument, record_retry
 from app.core.llm import get_llm
 from app.utils.json_parser import safe_json_parse
 
 
-async def generate_concept_questions(
+def _normalize_questions(data) -> list[dict]:
+    if not (isinstance(data, dict) and "questions" in data):
+        return []
+    # Normalize: map 'topic' → 'topic_id' for downstream pipeline compatibility
+    for q in data["questions"]:
+        if "topic" in q and "topic_id" not in q:
+            q["topic_id"] = q["topic"]
+    return data["questions"]
+
+
+@instrument("mcq", "question_batch")
+async def generate_question_batch(
     subject: str,
     topic: str | None,
     difficulty: str,
-    num_questions: int,
+    batch_size: int,
     class_level: str | None = None,
-):
+) -> list[dict]:
     """
-    Generate conceptual questions in batches to avoid rate limits.
-    Uses an academic prompt constrained to the given class syllabus.
+    Generate one batch of conceptual questions with a single LLM call.
+    Pacing is handled by the pipeline LLM rate limiter; a 429 gets one retry.
     """
-    llm = get_llm(temperature=0.2)
-    all_questions: list[dict] = []
-
-    # Buffer (+2) to ensure we hit num_questions after any filtering
-    target_count = num_questions + 2
-    # Reduced batch size to strictly respect 6000 TPM Groq limit
-    batch_size = 3
+    # Never cached: the same prompt must keep producing new questions
+    llm = get_llm(temperature=0.2, cache=False, rate_limited=True)
 
-    num_batches = (target_count + batch_size - 1) // batch_size
+    # Build the class/topic focus context lines
+    class_line = f"Class Level: {class_level}" if class_level else ""
+    topic_line = f"Topic (focus strictly on this): {topic}" if topic else ""
 
-    for i in range(num_batches):
-        current_batch_size = min(batch_size, target_count - (i * batch_size))
-
-        # Build the class/topic focus context lines
-        class_line = f"Class Level: {class_level}" if class_level else ""
-        topic_line = f"Topic (focus strictly on this): {topic}" if topic else ""
-
-        prompt = f"""
+    prompt = f"""
 You are an expert academic question generator.
 
-Generate {current_batch_size} unique, non-repeating questions based on the following criteria:
+Generate {batch_size} unique, non-repeating questions based on the following criteria:
 
 Subject: {subject}
 {class_line}
@@ -78,43 +80,19 @@ Output format MUST be:
 }}
 """
 
-        if i > 0:
-            # 6000 TPM = 100 tokens/sec. Need time for tokens to replenish.
-            await asyncio.sleep(4.5)
-
-        try:
-            response = await llm.ainvoke(prompt)
-            data = safe_json_parse(response.content)
-
-            if isinstance(data, dict) and "questions" in data:
-                # Normalize: map 'topic' → 'topic_id' for downstream pipeline compatibility
-                for q in data["questions"]:
-                    if "topic" in q and "topic_id" not in q:
-                        q["topic_id"] = q["topic"]
-                all_questions.extend(data["questions"])
-
-        except Exception as e:
-            print(f"Error in batch {i+1}: {e}")
-            if "429" in str(e):
-                print("Rate limit hit. Backing off for 10 seconds...")
-                await asyncio.sleep(10)
-                try:
-                    response = await llm.ainvoke(prompt)
-                    data = safe_json_parse(response.content)
-                    if isinstance(data, dict) and "questions" in data:
-                        for q in data["questions"]:
-                            if "topic" in q and "topic_id" not in q:
-                                q["topic_id"] = q["topic"]
-                        all_questions.extend(data["questions"])
-                except Exception as retry_e:
-                    print(f"Retry failed for batch {i+1}: {retry_e}")
-            continue
-
-    if len(all_questions) < num_questions:
-        raise ValueError(
-            f"LLM generated fewer than {num_questions} questions. "
-            f"Only got {len(all_questions)}."
-        )
-
-    return all_questions[:num_questions]
-
+    try:
+        response = await llm.ainvoke(prompt)
+        return _normalize_questions(safe_json_parse(response.content))
+
+    except Exception as e:
+        print(f"Error in question batch: {e}")
+        if "429" in str(e):
+            print("Rate limit hit. Backing off for 10 seconds...")
+            record_retry("llm.question_batch", "429")
+            await asyncio.sleep(10)
+            try:
+                response = await llm.ainvoke(prompt)
+                return _normalize_questions(safe_json_parse(response.content))
+            except Exception as retry_e:
+                print(f"Retry failed for question batch: {retry_e}")
+        return []
@@ -2,14 +2,16 @@
 
 import asyncio
 from app.core.config import settings
-from app.services.content_client import query_content_service
+from app.core.instrumentation import instrument, record_retry
+from app.services.content_client import ground_queries
 from app.core.llm import get_llm
 from app.utils.json_parser import safe_json_parse
 
 
+@instrument("mcq", "fallback_answer")
 async def _fallback_generate_answer(question_text: str, subject: str, topic: str | None) -> str:
     """Generate an answer directly from the LLM without RAG if retrieval fails."""
-    llm = get_llm(temperature=0.3)
+    llm = get_llm(temperature=0.3, rate_limited=True)
     topic_str = f" on the topic of {topic}" if topic else ""
     prompt = f"""
 You are an expert in {subject}{topic_str}.
@@ -35,6 +37,7 @@ Output format MUST be:
         print(f"Fallback generation failed: {e}")
         if "429" in str(e):
             print("Fallback hit 429 Rate Limit. Backing off for 12 seconds...")
+            record_retry("llm.fallback_answer", "429")
             await asyncio.sleep(12)
             try:
                 response = await llm.ainvoke(prompt)
@@ -45,63 +48,99 @@ Output format MUST be:
         return ""
 
 
-async def _retrieve_single(question: dict,
-                           subject: str,
-                           topic: str | None,
-                           top_k: int,
-                           max_retries: int = 2):
-    """
-    Retrieve grounded answer for a single question.
-    Retry max 2 times if confidence < threshold.
-    If RAG fails or service hits 429, fallback to generating an out-of-syllabus answer.
-    """
-    
-    # Extract topic_id or chapter_id if available to support fallback
-    topic_id = question.get("topic_id", topic)
-    chapter_id = question.get("chapter_id", subject)
-    q_text = question["question"] if isinstance(question, dict) else question
-    
+# Minimum amount of retrieved text needed before a question counts as grounded
+MIN_CONTEXT_LENGTH = 200
+
+
+def _question_text(question) -> str:
+    return question["question"] if isinstance(question, dict) else question
+
+
+def _primary_query(q_text: str, subject: str, topic: str | None) -> str:
     # Inject subject/topic into query for better retrieval
     if topic:
-        query = f"{subject} - {topic}: {q_text}"
-    else:
-        query = f"{subject}: {q_text}"
-
-    for attempt in range(max_retries + 1):
-        # Attempt standard retrieval first, fallback on subsequent attempts
-        if attempt > 0:
-            # Fallback retrieval using metadata if available
-            fallback_query = f"topic_id: {topic_id} OR chapter_id: {chapter_id}"
-            result = await query_content_service(question=fallback_query, top_k=top_k)
-        else:
-            result = await query_content_service(question=query, top_k=top_k)
-
-        if not result:
-            continue
+        return f"{subject} - {topic}: {q_text}"
+    return f"{subject}: {q_text}"
 
-        confidence = result.get("confidence", 0)
-        answer = result.get("answer", "")
-        
-        # Validation step: Protect against Content Service passing off API errors directly as text context
-        if "Error generating answer" in answer or "429" in answer:
-            continue
 
-        # Validation step: If retrieved_context < minimum length, retry using fallback
-        if len(answer) < 200:
+def _fallback_query(question, subject: str, topic: str | None) -> str:
+    # Fallback retrieval using metadata if available
+    topic_id = question.get("topic_id", topic) if isinstance(question, dict) else topic
+    chapter_id = question.get("chapter_id", subject) if isinstance(question, dict) else subject
+    return f"topic_id: {topic_id} OR chapter_id: {chapter_id}"
+
+
+def _grounded_item(question, q_text: str, result: dict, topic: str | None) -> dict | None:
+    """Validate one grounding result; return the grounded item or None."""
+    chunks = result.get("chunks", []) if result else []
+    confidence = result.get("confidence", 0) if result else 0
+    context = "\n\n".join(c.get("text", "") for c in chunks)
+
+    # Validation step: If retrieved_context < minimum length, retry using fallback
+    if len(context) < MIN_CONTEXT_LENGTH:
+        return None
+
+    if confidence < settings.CONFIDENCE_THRESHOLD:
+        return None
+
+    topic_id = question.get("topic_id", topic) if isinstance(question, dict) else topic
+    return {
+        "question": q_text,
+        "context": context,
+        "confidence": confidence,
+        "topic_id": topic_id
+    }
+
+
+@instrument("mcq", "grounding")
+async def _ground_batch(questions: list,
+                        subject: str,
+                        topic: str | None,
+                        top_k: int) -> list[dict | None]:
+    """
+    Ground many questions with retrieval-only content-service calls.
+    One batched call for the primary queries, one more for the metadata
+    fallback queries of whatever did not pass validation.
+    Returns one grounded item (or None) per question, in order.
+    """
+    q_texts = [_question_text(q) for q in questions]
+    grounded: list[dict | None] = [None] * len(questions)
+
+    rounds = [
+        lambda i: _primary_query(q_texts[i], subject, topic),
+        lambda i: _fallback_query(questions[i], subject, topic),
+    ]
+
+    for build_query in rounds:
+        pending = [i for i, item in enumerate(grounded) if item is None]
+        if not pending:
+            break
+
+        queries = [build_query(i) for i in pending]
+        # Identical fallback queries only need to be retrieved once
+        unique_queries = list(dict.fromkeys(queries))
+
+        try:
+            results = await ground_queries(unique_queries, top_k)
+        except Exception as e:
+            print(f"Grounding request failed: {e}")
             continue
 
-        if confidence >= settings.CONFIDENCE_THRESHOLD and answer:
-            return {
-                "question": q_text,
-                "answer": answer,
-                "confidence": confidence,
-                "topic_id": topic_id
-            }
+        by_query = dict(zip(unique_queries, results))
+        for i, query in zip(pending, queries):
+            grounded[i] = _grounded_item(questions[i], q_texts[i], by_query.get(query), topic)
+
+    return grounded
+
+
+async def _answer_without_context(question, subject: str, topic: str | None):
+    """If RAG fails entirely, fallback to zero-shot generation."""
+    q_text = _question_text(question)
+    topic_id = question.get("topic_id", topic) if isinstance(question, dict) else topic
 
-    # If RAG fails entirely, fallback to zero-shot generation
     print(f"RAG failed for: {q_text}. Generating fallback answer directly...")
     fallback_answer = await _fallback_generate_answer(q_text, subject, topic)
-    
+
     if fallback_answer:
         return {
             "question": q_text,
@@ -113,40 +152,49 @@ async def _retrieve_single(question: dict,
     return None  # failed completely
 
 
-async def retrieve_valid_questions(questions: list,
+async def retrieve_single_question(question: dict,
                                    subject: str,
                                    topic: str | None,
-                                   top_k: int = 4,
-                                   required_count: int = 20):
+                                   top_k: int):
     """
-    Runs retrieval in parallel and returns only valid grounded questions.
-    Batches execution to avoid hitting rate limits on the external service or our LLM fallbacks.
-    Stops when required_count reached.
+    Retrieve grounding context for a single question.
+    If RAG fails or the content service is unavailable, fallback to
+    generating an out-of-syllabus answer.
     """
-    results = []
-    batch_size = 5
-    
-    for i in range(0, len(questions), batch_size):
-        batch = questions[i:i + batch_size]
-        tasks = [
-            _retrieve_single(q, subject, topic, top_k)
-            for q in batch
-        ]
-        
-        if i > 0:
-            await asyncio.sleep(2.5)
-            
-        print(f"Retrieving context for batch {i//batch_size + 1} / {(len(questions) + batch_size - 1)//batch_size}...")
-        batch_results = await asyncio.gather(*tasks)
-        results.extend(batch_results)
-
-    print("========== RETRIEVAL RESULTS ==========")
-    valid = [r for r in results if r is not None]
-    print(f"Successfully retrieved/generated context for {len(valid)} questions.")
-    print("=======================================")
-
-    if len(valid) == 0:
-        raise ValueError("Retrieval failed to ground any questions. Empty context cannot proceed to MCQ generator.")
-
-    # Return only required_count
-    return valid[:required_count]
\ No newline at end of file
+    grounded = (await _ground_batch([question], subject, topic, top_k))[0]
+    if grounded:
+        return grounded
+
+    return await _answer_without_context(question, subject, topic)
+
+
+@instrument("mcq", "topic_retrieval")
+async def retrieve_topic_context(subject: str,
+                                 topic: str | None,
+                                 top_k: int = 6,
+                                 class_level: str | None = None) -> list[dict]:
+    """
+    Retrieve grounding chunks for a whole topic with one batched grounding call.
+    Returns unique chunks ordered by similarity (empty if retrieval fails).
+    """
+    topic_text = topic.replace("_", " ") if topic else ""
+    queries = [
+        f"{subject} - {topic}" if topic else subject,
+        f"{subject}: {topic_text}" if topic_text else f"{subject} {class_level or ''}".strip(),
+        f"topic_id: {topic} OR chapter_id: {subject}",
+    ]
+
+    try:
+        results = await ground_queries(list(dict.fromkeys(queries)), top_k)
+    except Exception as e:
+        print(f"Topic grounding request failed: {e}")
+        return []
+
+    chunks_by_id: dict[str, dict] = {}
+    for result in results:
+        for chunk in result.get("chunks", []):
+            key = chunk.get("id") or chunk.get("text", "")
+            if key not in chunks_by_id or chunk.get("similarity", 0) > chunks_by_id[key].get("similarity", 0):
+                chunks_by_id[key] = chunk
+
+    return sorted(chunks_by_id.values(), key=lambda c: c.get("similarity", 0), reverse=True)
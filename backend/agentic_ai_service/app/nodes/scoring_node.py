@@ -1,64 +1,63 @@
 # app/nodes/scoring_node.py
 
+import numpy as np
+
+from app.core.instrumentation import instrument
 from app.schemas.evaluation import EvaluationState
 
+
+def resolve_answer_index(option_map: dict[str, int], user_input) -> int:
+    """
+    Map one submitted answer to an option index: raw int, {"selected_option": ...}
+    dict, or a UserAnswer object. option_map is the question's compiled
+    option → index map; unknown options resolve to -1.
+    """
+    if isinstance(user_input, int):
+        return user_input
+
+    if isinstance(user_input, dict):
+        selected_option = user_input.get("selected_option")
+    else:
+        # Handle Pydantic UserAnswer object directly if not converted to dict
+        selected_option = getattr(user_input, "selected_option", None)
+
+    return option_map.get(selected_option, -1)
+
+
+@instrument("evaluation", "scoring")
 def evaluate_answers(state: EvaluationState) -> EvaluationState:
     """
     Deterministic scoring node compatible with LangGraph.
     Accepts user_answers as either raw ints (indexes) or objects (question string, selected_option string).
     """
     quiz = state["quiz_data"]
+    compiled = quiz["compiled"]
     user_answers = state["answers"]
     questions = quiz["questions"]
 
     if len(user_answers) != len(questions):
         raise ValueError("Number of answers does not match number of questions")
 
-    correct_count = 0
-    detailed_results = []
-
-    for idx, question in enumerate(questions):
-        correct_index = question["correct_index"]
-        topic_id = question.get("topic_id", quiz.get("topic", ""))
-        
-        # Parse what the user sent
-        user_input = user_answers[idx]
-        user_index = -1
-        
-        if isinstance(user_input, int):
-            user_index = user_input
-        elif isinstance(user_input, dict):
-            # Try to map the string option to the index
-            selected_option = user_input.get("selected_option")
-            options = question.get("options", [])
-            for opt_idx, opt in enumerate(options):
-                if opt == selected_option:
-                    user_index = opt_idx
-                    break
-        elif hasattr(user_input, "selected_option"):
-            # Handle Pydantic UserAnswer object directly if not converted to dict
-            selected_option = user_input.selected_option
-            options = question.get("options", [])
-            for opt_idx, opt in enumerate(options):
-                if opt == selected_option:
-                    user_index = opt_idx
-                    break
-
-        is_correct = user_index == correct_index
-
-        if is_correct:
-            correct_count += 1
+    # Parse what the user sent, then one vectorized comparison with the answer key
+    user_indexes = np.array(
+        [resolve_answer_index(option_map, answer) for option_map, answer in zip(compiled["option_maps"], user_answers)],
+        dtype=np.int64,
+    ).reshape(len(questions))
+    correct = user_indexes == compiled["correct_array"]
 
-        detailed_results.append({
+    detailed_results = [
+        {
             "question": question["question"],
-            "is_correct": is_correct,
-            "correct_index": correct_index,
-            "user_index": user_index,
-            "topic_id": topic_id,
+            "is_correct": bool(correct[idx]),
+            "correct_index": int(compiled["correct_array"][idx]),
+            "user_index": int(user_indexes[idx]),
+            "topic_id": question.get("topic_id", quiz.get("topic", "")),
             "concept_tags": question.get("concept_tags", [])
-        })
+        }
+        for idx, question in enumerate(questions)
+    ]
 
-    state["correct_answers"] = correct_count
+    state["correct_answers"] = int(correct.sum())
     state["details"] = detailed_results
     state["total_questions"] = len(questions)
 
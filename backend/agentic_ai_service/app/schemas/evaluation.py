@@ -1,7 +1,7 @@
 # app/schemas/evaluation.py
 
-from pydantic import BaseModel
-from typing import List, Dict, Any, TypedDict, Union
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Literal, Optional, TypedDict, Union
 import operator
 from typing import Annotated
 
@@ -16,9 +16,13 @@ class EvaluationRequest(BaseModel):
     quiz_id: str
     # Accept either the index (int) or the structured object for ease of use
     user_answers: List[Union[int, UserAnswer]]
+    # Return the score right away; feedback/recommendations follow via
+    # GET /api/mcq/evaluations/{evaluation_id} or its /stream endpoint
+    async_feedback: bool = False
 
 
 class EvaluationResponse(BaseModel):
+    evaluation_id: Optional[str] = None
     quiz_id: str
     total_questions: int
     correct_answers: int
@@ -28,6 +32,34 @@ class EvaluationResponse(BaseModel):
     feedback: str
     # improvement_suggestions: List[str]
     recommendations: str = ""
+    feedback_status: Literal["pending", "ready", "failed"] = "ready"
+
+
+class BulkSubmission(BaseModel):
+    student_id: str
+    user_answers: List[Union[int, UserAnswer]]
+
+
+class BulkEvaluationRequest(BaseModel):
+    quiz_id: str
+    submissions: List[BulkSubmission] = Field(..., min_length=1, max_length=500)
+    # Skip LLM feedback/recommendations entirely (scores and concept stats only)
+    generate_feedback: bool = True
+
+
+class BulkEvaluationResult(EvaluationResponse):
+    student_id: str
+
+
+class BulkEvaluationResponse(BaseModel):
+    quiz_id: str
+    total_questions: int
+    total_submissions: int
+    average_score: float
+    question_accuracy: List[float]
+    concept_accuracy: Dict[str, float]
+    distinct_feedback_patterns: int
+    results: List[BulkEvaluationResult]
 
 
 class EvaluationState(TypedDict):
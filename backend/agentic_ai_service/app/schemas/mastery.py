@@ -0,0 +1,24 @@
+# app/schemas/mastery.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ConceptMastery(BaseModel):
+    concept: str
+    attempts: int
+    correct: int
+    accuracy: float
+    # Exponentially decayed accuracy: recent quizzes weigh more
+    mastery: float
+    last_seen: Optional[datetime] = None
+
+
+class StudentMasteryResponse(BaseModel):
+    student_id: str
+    quizzes_taken: int
+    overall_mastery: float
+    concepts: List[ConceptMastery]
+    updated_at: Optional[datetime] = None
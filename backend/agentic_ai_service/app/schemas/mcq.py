@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Literal
 
 from pydantic import BaseModel, field_validator
 
@@ -9,6 +9,11 @@ class MCQRequest(BaseModel):
     difficulty: str
     num_questions: int = 20
     top_k: int = 6
+    # "pipeline": per-question stages; "single_shot": K full MCQs per LLM call
+    mode: Literal["pipeline", "single_shot"] = "pipeline"
+    # Serve from the pre-generated question bank when it can cover the quiz
+    use_bank: bool = True
+    student_id: str | None = None  # avoids repeating bank questions per student
 
 
 class MCQ(BaseModel):
@@ -30,3 +35,10 @@ class MCQResponse(BaseModel):
     topic: str  # the resolved topic_id that was used
     questions: List[MCQ]
 
+
+class MCQJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    result: MCQResponse | None = None
+    error: str | None = None
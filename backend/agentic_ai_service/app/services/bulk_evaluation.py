@@ -0,0 +1,204 @@
+# app/services/bulk_evaluation.py
+"""
+Classroom (bulk) evaluation: one quiz, many submissions.
+
+The quiz is loaded once and every submission is scored together as an
+(students × questions) answer matrix. Concept results come from one matrix
+product with a (questions × concepts) incidence matrix. LLM feedback is
+generated once per distinct set of wrong answers and shared by every
+student with that set.
+"""
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import performance_history_collection, student_mastery_collection, students_collection
+from app.core.instrumentation import instrument
+from app.nodes.evaluation_nodes import (
+    advancement_node,
+    history_bucket_update,
+    mastery_update,
+    performance_level,
+    recommendation_node,
+    student_update,
+)
+from app.nodes.feedback_node import generate_feedback
+from app.nodes.scoring_node import resolve_answer_index
+from app.services.evaluation_repository import save_evaluations
+from app.services.quiz_repository import get_quiz_by_id
+
+
+def _answer_matrix(option_maps: list[dict], submissions: list) -> np.ndarray:
+    """(students × questions) matrix of selected option indexes (-1 = unanswerable)."""
+    for submission in submissions:
+        if len(submission.user_answers) != len(option_maps):
+            raise ValueError(
+                f"Number of answers does not match number of questions for student {submission.student_id}"
+            )
+
+    return np.array(
+        [
+            [resolve_answer_index(option_map, answer) for option_map, answer in zip(option_maps, submission.user_answers)]
+            for submission in submissions
+        ],
+        dtype=np.int64,
+    ).reshape(len(submissions), len(option_maps))
+
+
+FALLBACK_FEEDBACK = {"feedback": "Keep practicing the topics you struggled with."}
+FALLBACK_RECOMMENDATIONS = {"recommendations": "Review the questions you missed and revisit those topics."}
+
+
+async def _pattern_feedback(state: dict, with_feedback: bool, semaphore: asyncio.Semaphore) -> dict:
+    """
+    Feedback + recommendations for one wrong-answer pattern (both LLM branches
+    in parallel). A failed branch falls back to generic text so one LLM error
+    cannot fail the whole class.
+    """
+    if not with_feedback:
+        return {"feedback": "", "recommendations": ""}
+
+    branch = advancement_node if state["performance_level"] == "strong" else recommendation_node
+    async with semaphore:
+        feedback, recommendations = await asyncio.gather(
+            generate_feedback(state), branch(state), return_exceptions=True
+        )
+    if isinstance(feedback, Exception):
+        print(f"Bulk feedback generation failed for {state['student_id']}: {feedback}")
+        feedback = FALLBACK_FEEDBACK
+    if isinstance(recommendations, Exception):
+        print(f"Bulk recommendations failed for {state['student_id']}: {recommendations}")
+        recommendations = FALLBACK_RECOMMENDATIONS
+    return {**feedback, **recommendations}
+
+
+@instrument("evaluation", "bulk")
+async def run_bulk_evaluation(quiz_id: str, submissions: list, with_feedback: bool = True) -> dict:
+    quiz = await get_quiz_by_id(quiz_id)
+
+    if not quiz:
+        raise ValueError("Quiz not found")
+
+    questions = quiz["questions"]
+    if not questions:
+        raise ValueError("Quiz has no questions")
+
+    compiled = quiz["compiled"]
+    answers = _answer_matrix(compiled["option_maps"], submissions)
+
+    # (students × questions) correctness, scores in one vectorized pass
+    correct = answers == compiled["correct_array"]
+    correct_counts = correct.sum(axis=1)
+    scores = np.round(correct_counts / len(questions) * 100, 2)
+
+    # (questions × concepts) incidence matrix → per-student right/wrong hits per concept
+    concepts = [entry["concept"] for entry in compiled["concept_index"]]
+    incidence = np.zeros((len(questions), len(concepts)), dtype=np.int64)
+    for c_idx, entry in enumerate(compiled["concept_index"]):
+        incidence[entry["questions"], c_idx] = 1
+
+    right_hits = correct.astype(np.int64) @ incidence
+    wrong_hits = (~correct).astype(np.int64) @ incidence
+    concept_totals = incidence.sum(axis=0) * len(submissions)
+    concept_accuracy = right_hits.sum(axis=0) / np.maximum(concept_totals, 1)
+
+    attempts = incidence.sum(axis=0)
+
+    states = []
+    mastery_counts = []
+    for s_idx, submission in enumerate(submissions):
+        # A concept is strong only if it was never missed (same rule as weak_topic_identifier_node)
+        weak = [concepts[c] for c in np.flatnonzero(wrong_hits[s_idx])]
+        strong = [concepts[c] for c in np.flatnonzero((right_hits[s_idx] > 0) & (wrong_hits[s_idx] == 0))]
+        score = float(scores[s_idx])
+
+        states.append({
+            "student_id": submission.student_id,
+            "quiz_id": quiz_id,
+            "subject": quiz.get("subject", ""),
+            "topic": quiz.get("topic", "General"),
+            "correct_answers": int(correct_counts[s_idx]),
+            "total_questions": len(questions),
+            "score": score,
+            "weak_topics": weak,
+            "strong_topics": strong,
+            "performance_level": performance_level(score),
+            "details": [
+                {"question": questions[q]["question"], "is_correct": False}
+                for q in np.flatnonzero(~correct[s_idx])
+            ],
+        })
+        mastery_counts.append({
+            tag: (int(attempts[c]), int(right_hits[s_idx, c])) for c, tag in enumerate(concepts)
+        })
+
+    # Students with the same wrong answers get identical prompts: generate once, share
+    patterns: dict[tuple, list[int]] = {}
+    for s_idx in range(len(submissions)):
+        patterns.setdefault(tuple(np.flatnonzero(~correct[s_idx]).tolist()), []).append(s_idx)
+
+    print(f"Bulk evaluation: {len(submissions)} submissions, {len(patterns)} distinct wrong-answer patterns.")
+    semaphore = asyncio.Semaphore(settings.BULK_FEEDBACK_CONCURRENCY)
+    pattern_results = await asyncio.gather(*[
+        _pattern_feedback(states[members[0]], with_feedback, semaphore) for members in patterns.values()
+    ])
+    for members, result in zip(patterns.values(), pattern_results):
+        for s_idx in members:
+            states[s_idx].update(result)
+
+    # One bulk write each for student profiles and history buckets, one insert_many for evaluation records
+    assessed_at = datetime.utcnow()
+    await students_collection.bulk_write(
+        [
+            UpdateOne({"student_id": state["student_id"]}, student_update(state, assessed_at), upsert=True)
+            for state in states
+        ],
+        ordered=False,
+    )
+    await performance_history_collection.bulk_write(
+        [
+            UpdateOne(*history_bucket_update(state, assessed_at), upsert=True)
+            for state in states
+        ],
+        # Ordered: a student submitted twice must see their own bucket count
+        ordered=True,
+    )
+    await student_mastery_collection.bulk_write(
+        [
+            UpdateOne({"student_id": state["student_id"]}, mastery_update(state, counts, assessed_at), upsert=True)
+            for state, counts in zip(states, mastery_counts)
+        ],
+        # Ordered for the same reason: each update folds into the previous EMA
+        ordered=True,
+    )
+    evaluation_ids = await save_evaluations(states, feedback_status="ready")
+
+    return {
+        "quiz_id": quiz_id,
+        "total_questions": len(questions),
+        "total_submissions": len(submissions),
+        "average_score": round(float(scores.mean()), 2),
+        "question_accuracy": [round(float(x), 4) for x in correct.mean(axis=0)],
+        "concept_accuracy": {tag: round(float(acc), 4) for tag, acc in zip(concepts, concept_accuracy)},
+        "distinct_feedback_patterns": len(patterns),
+        "results": [
+            {
+                "evaluation_id": evaluation_id,
+                "student_id": state["student_id"],
+                "quiz_id": quiz_id,
+                "total_questions": state["total_questions"],
+                "correct_answers": state["correct_answers"],
+                "score_percentage": state["score"],
+                "strong_areas": state["strong_topics"],
+                "weak_areas": state["weak_topics"],
+                "feedback": state["feedback"],
+                "recommendations": state["recommendations"],
+                "feedback_status": "ready",
+            }
+            for state, evaluation_id in zip(states, evaluation_ids)
+        ],
+    }
@@ -1,16 +1,247 @@
+import asyncio
+import random
+import time
+from collections import deque
+
 import httpx
 from app.core.config import settings
+from app.core.instrumentation import record_retry
+from app.core.tracing import client_span
+
+
+# Must match the max_length of GroundingRequest.queries in the content service
+GROUNDING_MAX_QUERIES = 64
+EMBED_MAX_TEXTS = 128
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the content service circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` failures; open -> half_open after
+    `reset_timeout` seconds, letting a single probe request through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of request latencies used to pick the hedging delay."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> float | None:
+        if len(self.samples) < settings.CONTENT_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+_client: httpx.AsyncClient | None = None
+_breaker = CircuitBreaker(
+    failure_threshold=settings.CONTENT_BREAKER_FAILURES,
+    reset_timeout=settings.CONTENT_BREAKER_RESET_SECONDS,
+)
+_latency = LatencyTracker()
+
+
+async def start_content_client():
+    """Create the long-lived pooled client (called from the FastAPI lifespan)."""
+    get_content_client()
+
+
+async def close_content_client():
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
-async def query_content_service(question: str, top_k: int):
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            f"{settings.CONTENT_SERVICE_URL}/api/qa/ask",
-            json={
-                "question": question,
-                "top_k": top_k
-            }
+def get_content_client() -> httpx.AsyncClient:
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.CONTENT_SERVICE_URL,
+            http2=settings.CONTENT_HTTP2,
+            timeout=settings.CONTENT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.CONTENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CONTENT_MAX_KEEPALIVE,
+            ),
         )
+    return _client
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After on 429s."""
+    if response is not None and response.status_code == 429:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.CONTENT_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
 
+    ceiling = min(settings.CONTENT_RETRY_MAX_DELAY, settings.CONTENT_RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+async def _send_once(path: str, payload: dict) -> dict:
+    started = time.perf_counter()
+    with client_span(f"POST content_service{path}", {"http.request.method": "POST", "url.path": path}) as headers:
+        response = await get_content_client().post(path, json=payload, headers=headers)
         response.raise_for_status()
-        return response.json()
\ No newline at end of file
+    _latency.record(time.perf_counter() - started)
+    return response.json()
+
+
+async def _send_hedged(path: str, payload: dict) -> dict:
+    """
+    Send the request; if it has not answered within the observed p95 latency,
+    send a duplicate and take whichever succeeds first.
+    """
+    hedge_delay = _latency.p95()
+    if hedge_delay is None:
+        return await _send_once(path, payload)
+
+    tasks = {asyncio.create_task(_send_once(path, payload))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done:
+            tasks.add(asyncio.create_task(_send_once(path, payload)))
+
+        error: BaseException | None = None
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _post(path: str, payload: dict, hedge: bool = False) -> dict:
+    """
+    POST to the content service through the pooled client with jittered
+    retries on 5xx/429/transport errors, guarded by the circuit breaker.
+    Only idempotent calls may set hedge=True.
+    """
+    if not _breaker.allow():
+        raise CircuitOpenError(f"Content service circuit is open; skipping {path}")
+    # The single half-open probe must settle the breaker however it ends,
+    # or every later call is rejected
+    probe = _breaker.state == "half_open"
+    settled = False
+
+    send = _send_hedged if hedge and settings.CONTENT_HEDGE_ENABLED else _send_once
+
+    try:
+        for attempt in range(settings.CONTENT_RETRIES + 1):
+            response = None
+            try:
+                result = await send(path, payload)
+                _breaker.record_success()
+                settled = True
+                return result
+
+            except httpx.HTTPStatusError as e:
+                response = e.response
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # The service answered; a 4xx is the caller's problem
+                    _breaker.record_success()
+                    settled = True
+                    raise
+                if attempt == settings.CONTENT_RETRIES:
+                    _breaker.record_failure()
+                    settled = True
+                    raise
+
+            except httpx.TransportError:
+                if attempt == settings.CONTENT_RETRIES:
+                    _breaker.record_failure()
+                    settled = True
+                    raise
+
+            record_retry(f"content_service{path}", str(response.status_code) if response is not None else "transport")
+            delay = _retry_delay(attempt, response)
+            print(f"Content service call {path} failed (attempt {attempt + 1}). Retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+    finally:
+        # Cancelled, bad JSON, ...: no verdict, so reopen and probe again later
+        if probe and not settled and _breaker.state == "half_open":
+            _breaker.record_failure()
+
+
+async def ground_queries(queries: list[str], top_k: int) -> list[dict]:
+    """
+    Retrieval-only grounding for many queries via /api/qa/ground.
+    Returns one {"query", "chunks", "confidence"} result per query, in order.
+    No LLM call and no persistence happen on the content service side.
+    """
+    batches = [
+        queries[i:i + GROUNDING_MAX_QUERIES]
+        for i in range(0, len(queries), GROUNDING_MAX_QUERIES)
+    ]
+
+    responses = await asyncio.gather(*[
+        _post("/api/qa/ground", {"queries": batch, "top_k": top_k}, hedge=True)
+        for batch in batches
+    ])
+
+    return [result for response in responses for result in response["results"]]
+
+
+async def embed_texts(texts: list[str]) -> list[list[float]]:
+    """
+    Normalized embeddings for many texts via /api/qa/embed, in input order.
+    Pure computation on the content service, so it is safe to hedge.
+    """
+    batches = [
+        texts[i:i + EMBED_MAX_TEXTS]
+        for i in range(0, len(texts), EMBED_MAX_TEXTS)
+    ]
+
+    responses = await asyncio.gather(*[
+        _post("/api/qa/embed", {"texts": batch}, hedge=True)
+        for batch in batches
+    ])
+
+    return [embedding for response in responses for embedding in response["embeddings"]]
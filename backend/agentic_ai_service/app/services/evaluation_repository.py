@@ -0,0 +1,79 @@
+# app/services/evaluation_repository.py
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.core.database import evaluations_collection
+
+
+def _evaluation_doc(state: dict, feedback_status: str) -> dict:
+    return {
+        "student_id": state["student_id"],
+        "quiz_id": state["quiz_id"],
+        "subject": state["subject"],
+        "topic": state["topic"],
+        "total_questions": state["total_questions"],
+        "correct_answers": state["correct_answers"],
+        "score_percentage": state["score"],
+        "performance_level": state["performance_level"],
+        "strong_areas": state.get("strong_topics", []),
+        "weak_areas": state.get("weak_topics", []),
+        "feedback": state.get("feedback", ""),
+        "recommendations": state.get("recommendations", ""),
+        "feedback_status": feedback_status,
+        "created_at": datetime.utcnow(),
+    }
+
+
+async def save_evaluation(state: dict, feedback_status: str) -> str:
+    """
+    Store a scored evaluation. feedback_status is "ready" when feedback and
+    recommendations are already in `state`, "pending" while they are generated.
+    """
+    result = await evaluations_collection.insert_one(_evaluation_doc(state, feedback_status))
+
+    return str(result.inserted_id)
+
+
+async def save_evaluations(states: list[dict], feedback_status: str) -> list[str]:
+    """Store many scored evaluations with one insert_many; returns ids in order."""
+    if not states:
+        return []
+
+    result = await evaluations_collection.insert_many(
+        [_evaluation_doc(state, feedback_status) for state in states]
+    )
+
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+
+async def complete_evaluation(evaluation_id: str,
+                              feedback: str,
+                              recommendations: str,
+                              feedback_status: str = "ready"):
+    await evaluations_collection.update_one(
+        {"_id": ObjectId(evaluation_id)},
+        {"$set": {
+            "feedback": feedback,
+            "recommendations": recommendations,
+            "feedback_status": feedback_status,
+            "feedback_completed_at": datetime.utcnow(),
+        }},
+    )
+
+
+async def get_evaluation(evaluation_id: str):
+    """
+    Fetch evaluation by ID.
+    """
+    if not ObjectId.is_valid(evaluation_id):
+        return None
+
+    evaluation = await evaluations_collection.find_one({"_id": ObjectId(evaluation_id)})
+
+    if not evaluation:
+        return None
+
+    evaluation["_id"] = str(evaluation["_id"])
+    return evaluation
@@ -0,0 +1,148 @@
+# app/services/job_queue.py
+"""
+Mongo-backed MCQ generation job queue.
+
+Workers claim jobs with an atomic find_one_and_update that sets a lease;
+they extend the lease with heartbeats while generating. A job whose lease
+expired (worker crashed or lost) becomes claimable again until it runs out
+of attempts.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database import mcq_jobs_collection
+from app.core.tracing import trace_carrier
+
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.MCQ_JOB_LEASE_SECONDS)
+
+
+async def enqueue_job(payload: dict, topic: str) -> str:
+    now = datetime.utcnow()
+    result = await mcq_jobs_collection.insert_one({
+        "status": "queued",
+        "payload": payload,
+        "topic": topic,
+        # Lets the worker continue the enqueuing request's trace
+        "trace_context": trace_carrier(),
+        "attempts": 0,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    })
+    return str(result.inserted_id)
+
+
+async def claim_job(worker_id: str) -> dict | None:
+    """Atomically lease the oldest queued (or lease-expired) job."""
+    now = datetime.utcnow()
+    return await mcq_jobs_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lt": now}},
+            ],
+            "attempts": {"$lt": settings.MCQ_JOB_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": worker_id,
+                "lease_expires_at": _lease_expiry(),
+                "heartbeat_at": now,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def heartbeat(job_id, worker_id: str) -> bool:
+    """Extend the lease; returns False if this worker no longer owns the job."""
+    now = datetime.utcnow()
+    result = await mcq_jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "lease_owner": worker_id},
+        {"$set": {"lease_expires_at": _lease_expiry(), "heartbeat_at": now, "updated_at": now}},
+    )
+    return result.matched_count == 1
+
+
+async def complete_job(job_id, worker_id: str, result: dict) -> bool:
+    update = await mcq_jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "lease_owner": worker_id},
+        {"$set": {"status": "done", "result": result, "lease_expires_at": None, "updated_at": datetime.utcnow()}},
+    )
+    return update.matched_count == 1
+
+
+async def fail_job(job_id, worker_id: str, error: str, error_status: int, retryable: bool) -> bool:
+    """Record a failure; retryable failures go back to the queue while attempts remain."""
+    job = await mcq_jobs_collection.find_one({"_id": job_id}, {"attempts": 1})
+    requeue = retryable and job and job["attempts"] < settings.MCQ_JOB_MAX_ATTEMPTS
+
+    update = await mcq_jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "lease_owner": worker_id},
+        {"$set": {
+            "status": "queued" if requeue else "failed",
+            "error": error,
+            "error_status": error_status,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": datetime.utcnow(),
+        }},
+    )
+    return update.matched_count == 1
+
+
+async def requeue_expired_jobs() -> int:
+    """
+    Sweep jobs whose lease expired: re-queue them, or mark them failed once
+    they have used up their attempts. Returns the number of jobs touched.
+    """
+    now = datetime.utcnow()
+    expired = {"status": "running", "lease_expires_at": {"$lt": now}}
+
+    failed = await mcq_jobs_collection.update_many(
+        {**expired, "attempts": {"$gte": settings.MCQ_JOB_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "error": "Job lease expired too many times", "error_status": 500,
+                  "lease_owner": None, "lease_expires_at": None, "updated_at": now}},
+    )
+    requeued = await mcq_jobs_collection.update_many(
+        expired,
+        {"$set": {"status": "queued", "lease_owner": None, "lease_expires_at": None, "updated_at": now}},
+    )
+    return failed.modified_count + requeued.modified_count
+
+
+async def get_job(job_id: str) -> dict | None:
+    if not ObjectId.is_valid(job_id):
+        return None
+    return await mcq_jobs_collection.find_one({"_id": ObjectId(job_id)})
+
+
+async def wait_for_job(job_id: str, timeout: float) -> dict | None:
+    """Long-poll: return the job once finished, or its current state after `timeout` seconds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            return job
+        await asyncio.sleep(min(settings.MCQ_JOB_POLL_INTERVAL_SECONDS, remaining))
@@ -0,0 +1,34 @@
+# app/services/mastery_repository.py
+
+from app.core.database import student_mastery_collection
+
+
+async def get_student_mastery(student_id: str):
+    """
+    Fetch the precomputed mastery document; concepts are sorted weakest first.
+    """
+    doc = await student_mastery_collection.find_one({"student_id": student_id})
+
+    if not doc:
+        return None
+
+    concepts = [
+        {
+            "concept": entry["concept"],
+            "attempts": entry["attempts"],
+            "correct": entry["correct"],
+            "accuracy": round(entry["correct"] / entry["attempts"], 4) if entry["attempts"] else 0.0,
+            "mastery": round(entry["mastery"], 4),
+            "last_seen": entry.get("last_seen"),
+        }
+        for entry in (doc.get("concepts") or {}).values()
+    ]
+    concepts.sort(key=lambda c: c["mastery"])
+
+    return {
+        "student_id": student_id,
+        "quizzes_taken": doc.get("quizzes_taken", 0),
+        "overall_mastery": round(doc.get("overall_mastery", 0.0), 4),
+        "concepts": concepts,
+        "updated_at": doc.get("updated_at"),
+    }
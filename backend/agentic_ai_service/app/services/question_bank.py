@@ -0,0 +1,175 @@
+# app/services/question_bank.py
+
+import asyncio
+import hashlib
+import random
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.database import question_bank_collection, question_bank_served_collection
+from app.graphs.mcq_graph import run_mcq_pipeline
+from app.utils.class_topic_mapper import CLASS_TOPIC_MAP
+
+
+def _bank_key(class_level: str, topic_id: str, difficulty: str) -> dict:
+    """
+    Banks are keyed by (class_level, topic_id, difficulty); subject aliases
+    such as "maths"/"mathematics" resolve to the same topic and share a bank.
+    """
+    return {
+        "class_level": class_level.strip().lower(),
+        "topic_id": topic_id,
+        "difficulty": difficulty.strip().lower(),
+    }
+
+
+def _question_hash(question: str) -> str:
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _to_quiz_question(doc: dict) -> dict:
+    """Strip bank bookkeeping and reshuffle options so repeats look fresh."""
+    options = list(doc["options"])
+    correct_answer = options[doc["correct_index"]]
+    random.shuffle(options)
+
+    return {
+        "question": doc["question"],
+        "options": options,
+        "correct_index": options.index(correct_answer),
+        "topic_id": doc.get("topic_id"),
+        "concept_tags": doc.get("concept_tags", []),
+    }
+
+
+async def count_bank(class_level: str, topic_id: str, difficulty: str) -> int:
+    return await question_bank_collection.count_documents(_bank_key(class_level, topic_id, difficulty))
+
+
+async def add_to_bank(subject: str,
+                      class_level: str,
+                      topic_id: str,
+                      difficulty: str,
+                      mcqs: list[dict]) -> int:
+    """
+    Store validated MCQs in the bank. Questions already in the bank
+    (same normalized text) are skipped by the unique index.
+    Returns the number of questions inserted.
+    """
+    if not mcqs:
+        return 0
+
+    key = _bank_key(class_level, topic_id, difficulty)
+    docs = [
+        {
+            **key,
+            "subject": subject.strip().lower(),
+            "question": mcq["question"],
+            "options": [str(opt) for opt in mcq["options"]],
+            "correct_index": mcq["correct_index"],
+            "concept_tags": mcq.get("concept_tags", []),
+            "question_hash": _question_hash(mcq["question"]),
+            "created_at": datetime.now(timezone.utc),
+        }
+        for mcq in mcqs
+    ]
+
+    try:
+        result = await question_bank_collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        return e.details.get("nInserted", 0)
+
+
+async def draw_quiz_from_bank(class_level: str,
+                              topic_id: str,
+                              difficulty: str,
+                              num_questions: int,
+                              student_id: str | None = None) -> list[dict] | None:
+    """
+    Assemble a quiz from the bank. Questions the student has not been served
+    yet are preferred; previously served ones only fill any shortfall.
+    Returns None when the bank is too small to serve the quiz.
+    """
+    key = _bank_key(class_level, topic_id, difficulty)
+
+    if await question_bank_collection.count_documents(key) < num_questions:
+        return None
+
+    seen_ids = []
+    if student_id:
+        seen_ids = await question_bank_served_collection.distinct(
+            "question_id", {"student_id": student_id, **key}
+        )
+
+    picked = await question_bank_collection.aggregate([
+        {"$match": {**key, "_id": {"$nin": seen_ids}}},
+        {"$sample": {"size": num_questions}},
+    ]).to_list(None)
+
+    if len(picked) < num_questions:
+        picked += await question_bank_collection.aggregate([
+            {"$match": {**key, "_id": {"$in": seen_ids}}},
+            {"$sample": {"size": num_questions - len(picked)}},
+        ]).to_list(None)
+
+    if len(picked) < num_questions:
+        return None
+
+    served = [
+        {**key, "student_id": student_id, "question_id": doc["_id"], "served_at": datetime.now(timezone.utc)}
+        for doc in picked
+        if student_id and doc["_id"] not in seen_ids
+    ]
+    if served:
+        try:
+            await question_bank_served_collection.insert_many(served, ordered=False)
+        except BulkWriteError:
+            # A concurrent quiz for the same student already recorded these
+            pass
+
+    return [_to_quiz_question(doc) for doc in picked]
+
+
+def _bank_targets() -> list[tuple[str, str, str]]:
+    """Unique (subject, class_level, topic_id) banks from the curriculum map."""
+    targets = {}
+    for (subject, class_level), topic_id in CLASS_TOPIC_MAP.items():
+        targets.setdefault((class_level, topic_id), subject)
+    return [(subject.title(), class_level.title(), topic_id) for (class_level, topic_id), subject in targets.items()]
+
+
+async def refill_bank(subject: str, class_level: str, topic_id: str, difficulty: str) -> int:
+    """Top up one bank if it is below the low-water mark."""
+    count = await count_bank(class_level, topic_id, difficulty)
+    if count >= settings.QUESTION_BANK_LOW_WATER:
+        return 0
+
+    needed = min(settings.QUESTION_BANK_TARGET - count, settings.QUESTION_BANK_REFILL_BATCH)
+    print(f"Refilling question bank {class_level} / {topic_id} / {difficulty}: {count} → +{needed}")
+
+    mcqs = await run_mcq_pipeline(
+        subject=subject,
+        topic=topic_id,
+        difficulty=difficulty,
+        num_questions=needed,
+        class_level=class_level,
+        mode="single_shot",
+    )
+    return await add_to_bank(subject, class_level, topic_id, difficulty, mcqs)
+
+
+async def run_refill_loop():
+    """Background worker: periodically top up every bank below the low-water mark."""
+    while True:
+        for subject, class_level, topic_id in _bank_targets():
+            for difficulty in settings.QUESTION_BANK_DIFFICULTIES:
+                try:
+                    await refill_bank(subject, class_level, topic_id, difficulty)
+                except Exception as e:
+                    print(f"Question bank refill failed for {class_level} / {topic_id} / {difficulty}: {e}")
+
+        await asyncio.sleep(settings.QUESTION_BANK_REFILL_INTERVAL_SECONDS)
@@ -0,0 +1,90 @@
+# app/services/question_dedup.py
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.instrumentation import stage_timer
+from app.services.content_client import embed_texts
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+class QuestionDeduplicator:
+    """
+    Rejects generated questions that are near-duplicates of questions already
+    accepted for the same quiz.
+
+    Each batch is embedded in one call to the content service; similarity to
+    every accepted question (and to earlier questions of the same batch) is
+    one matrix product over normalized vectors. If embeddings are unavailable
+    the filter degrades to exact (normalized) text matching.
+    """
+
+    def __init__(self, threshold: float | None = None):
+        self.threshold = settings.QUESTION_DEDUP_THRESHOLD if threshold is None else threshold
+        self.accepted_keys: set[str] = set()
+        self.accepted_vectors: np.ndarray | None = None
+
+    async def _embed(self, texts: list[str]) -> np.ndarray | None:
+        if not settings.QUESTION_DEDUP_ENABLED:
+            return None
+        try:
+            vectors = np.asarray(await embed_texts(texts), dtype=np.float32)
+        except Exception as e:
+            print(f"Question embedding failed, falling back to exact dedup: {e}")
+            return None
+
+        # Re-normalize defensively so dot products are cosine similarities
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _near_duplicates(self, vectors: np.ndarray, rejected: np.ndarray) -> np.ndarray:
+        """Extend `rejected` with batch rows too similar to accepted or earlier kept batch rows."""
+        rejected = rejected.copy()
+
+        if self.accepted_vectors is not None and len(self.accepted_vectors):
+            rejected |= (vectors @ self.accepted_vectors.T).max(axis=1) >= self.threshold
+
+        # Within the batch, row i clashes with any earlier row j < i above the threshold;
+        # only clashes with rows that are themselves kept count
+        within = np.triu(vectors @ vectors.T >= self.threshold, k=1)
+        for i in range(len(vectors)):
+            if not rejected[i]:
+                rejected |= within[i]
+        return rejected
+
+    async def filter(self, items: list[dict], field: str = "question") -> list[dict]:
+        """
+        Return the items that are not duplicates and remember them as accepted.
+        Items with an empty `field` are dropped.
+        """
+        candidates = []
+        batch_keys = set()
+        for item in items:
+            key = normalize_text(item.get(field, ""))
+            if key and key not in self.accepted_keys and key not in batch_keys:
+                batch_keys.add(key)
+                candidates.append((key, item))
+
+        if not candidates:
+            return []
+
+        with stage_timer("mcq", "dedup_embed"):
+            vectors = await self._embed([item[field] for _, item in candidates])
+
+        # Exact keys may have been accepted by a concurrent batch during the embed call
+        keep = np.array([key not in self.accepted_keys for key, _ in candidates])
+        if vectors is not None:
+            keep = ~self._near_duplicates(vectors, ~keep)
+            kept_vectors = vectors[keep]
+            self.accepted_vectors = kept_vectors if self.accepted_vectors is None \
+                else np.vstack([self.accepted_vectors, kept_vectors])
+
+        accepted = [item for (key, item), ok in zip(candidates, keep) if ok]
+        self.accepted_keys.update(key for (key, _), ok in zip(candidates, keep) if ok)
+
+        if len(accepted) < len(candidates):
+            print(f"Dedup rejected {len(candidates) - len(accepted)} near-duplicate question(s).")
+        return accepted
@@ -0,0 +1,71 @@
+# app/services/quiz_generation.py
+
+from app.core.config import settings
+from app.core.instrumentation import record_cache
+from app.graphs.mcq_graph import run_mcq_pipeline
+from app.schemas.mcq import MCQRequest
+from app.services.question_bank import add_to_bank, draw_quiz_from_bank
+from app.services.quiz_repository import save_quiz
+
+
+async def _save_and_respond(request: MCQRequest, topic: str, mcqs: list[dict]) -> dict:
+    quiz_id = await save_quiz(
+        subject=request.subject,
+        class_level=request.class_level,
+        topic=topic,
+        difficulty=request.difficulty,
+        questions=mcqs,
+    )
+
+    return {
+        "quiz_id": quiz_id,
+        "subject": request.subject,
+        "class_level": request.class_level,
+        "topic": topic,
+        "questions": mcqs,
+    }
+
+
+async def quiz_from_bank(request: MCQRequest, topic: str) -> dict | None:
+    """
+    Assemble and save a quiz from the question bank (Mongo reads only).
+    Returns None if the bank is disabled, opted out of, or too small.
+    """
+    if not (settings.QUESTION_BANK_ENABLED and request.use_bank):
+        return None
+
+    mcqs = await draw_quiz_from_bank(
+        class_level=request.class_level,
+        topic_id=topic,
+        difficulty=request.difficulty,
+        num_questions=request.num_questions or 20,
+        student_id=request.student_id,
+    )
+    record_cache("question_bank", mcqs is not None)
+    if mcqs is None:
+        return None
+
+    return await _save_and_respond(request, topic, mcqs)
+
+
+async def generate_quiz(request: MCQRequest, topic: str) -> dict:
+    """
+    Run the live MCQ pipeline, grow the question bank with the result and save the quiz.
+    """
+    mcqs = await run_mcq_pipeline(
+        subject=request.subject,
+        topic=topic,
+        difficulty=request.difficulty,
+        num_questions=request.num_questions or 20,
+        top_k=request.top_k or 6,
+        class_level=request.class_level,
+        mode=request.mode,
+    )
+
+    # Freshly generated, validated MCQs also grow the bank
+    try:
+        await add_to_bank(request.subject, request.class_level, topic, request.difficulty, mcqs)
+    except Exception as e:
+        print(f"Failed to add generated MCQs to the question bank: {e}")
+
+    return await _save_and_respond(request, topic, mcqs)
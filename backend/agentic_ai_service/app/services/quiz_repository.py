@@ -1,10 +1,27 @@
 # app/services/quiz_repository.py
 
+from collections import OrderedDict
 from datetime import datetime
 
 from bson import ObjectId
 
+from app.core.config import settings
 from app.core.database import quizzes_collection
+from app.core.instrumentation import record_cache
+from app.utils.quiz_compiler import compile_quiz, load_compiled
+
+
+# quiz_id -> quiz with its compiled form loaded. Quizzes are never modified
+# after save_quiz, so entries only leave the cache through LRU eviction.
+_quiz_cache: OrderedDict[str, dict] = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_put(quiz_id: str, quiz: dict):
+    _quiz_cache[quiz_id] = quiz
+    _quiz_cache.move_to_end(quiz_id)
+    while len(_quiz_cache) > settings.QUIZ_CACHE_MAX_ENTRIES:
+        _quiz_cache.popitem(last=False)
 
 
 async def save_quiz(
@@ -15,7 +32,7 @@ async def save_quiz(
     questions: list,
 ):
     """
-    Store quiz in MongoDB.
+    Store quiz in MongoDB, together with its compiled (scoring) form.
     """
 
     quiz_doc = {
@@ -24,22 +41,51 @@ async def save_quiz(
         "topic": topic,
         "difficulty": difficulty,
         "questions": questions,
+        "compiled": compile_quiz(questions, topic),
         "created_at": datetime.utcnow(),
     }
 
     result = await quizzes_collection.insert_one(quiz_doc)
+    quiz_id = str(result.inserted_id)
+
+    # A freshly generated quiz is about to be taken: warm the cache
+    quiz_doc["_id"] = quiz_id
+    quiz_doc["compiled"] = load_compiled(quiz_doc)
+    _cache_put(quiz_id, quiz_doc)
 
-    return str(result.inserted_id)
+    return quiz_id
 
 
 async def get_quiz_by_id(quiz_id: str):
     """
-    Fetch quiz by ID.
+    Fetch quiz by ID, from the in-memory LRU when possible.
+    The returned quiz carries its loaded compiled form under "compiled";
+    treat it as read-only, it is shared with other requests.
     """
+    quiz = _quiz_cache.get(quiz_id)
+    if quiz is not None:
+        _quiz_cache.move_to_end(quiz_id)
+        _cache_stats["hits"] += 1
+        record_cache("quiz", True)
+        return quiz
+
+    _cache_stats["misses"] += 1
+    record_cache("quiz", False)
     quiz = await quizzes_collection.find_one({"_id": ObjectId(quiz_id)})
 
     if not quiz:
         return None
 
     quiz["_id"] = str(quiz["_id"])
+    quiz["compiled"] = load_compiled(quiz)
+    _cache_put(quiz_id, quiz)
     return quiz
+
+
+def get_quiz_cache_stats() -> dict:
+    lookups = _cache_stats["hits"] + _cache_stats["misses"]
+    return {
+        **_cache_stats,
+        "entries": len(_quiz_cache),
+        "hit_ratio": round(_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
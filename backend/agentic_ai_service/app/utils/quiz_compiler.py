@@ -0,0 +1,56 @@
+# app/utils/quiz_compiler.py
+
+import numpy as np
+
+
+# Bump when the stored layout changes; older quizzes are recompiled on load
+COMPILED_QUIZ_VERSION = 1
+
+
+def compile_quiz(questions: list[dict], default_topic: str | None) -> dict:
+    """
+    Scoring-ready form of a quiz, stored on the quiz document at save time:
+    the correct-index vector, concept tags per question (falling back to
+    topic_id like weak_topic_identifier_node) and a concept → question index.
+    Everything is BSON-safe: option texts never become field names.
+    """
+    concepts = []
+    concept_index: dict[str, list[int]] = {}
+    for q_idx, question in enumerate(questions):
+        tags = question.get("concept_tags") or [question.get("topic_id", default_topic or "Unknown")]
+        tags = list(dict.fromkeys(tags))
+        concepts.append(tags)
+        for tag in tags:
+            concept_index.setdefault(tag, []).append(q_idx)
+
+    return {
+        "version": COMPILED_QUIZ_VERSION,
+        "correct_index": [question["correct_index"] for question in questions],
+        "concepts": concepts,
+        "concept_index": [{"concept": tag, "questions": idxs} for tag, idxs in concept_index.items()],
+    }
+
+
+def load_compiled(quiz: dict) -> dict:
+    """
+    In-memory form used for scoring: the stored compiled quiz (recompiled
+    if missing or outdated) plus a NumPy correct-index array and one
+    option → index map per question for O(1) string-answer lookup.
+    """
+    compiled = quiz.get("compiled")
+    if not compiled or compiled.get("version") != COMPILED_QUIZ_VERSION:
+        compiled = compile_quiz(quiz["questions"], quiz.get("topic"))
+
+    option_maps = []
+    for question in quiz["questions"]:
+        option_map: dict[str, int] = {}
+        for opt_idx, opt in enumerate(question.get("options", [])):
+            # First occurrence wins, matching the old linear scan
+            option_map.setdefault(opt, opt_idx)
+        option_maps.append(option_map)
+
+    return {
+        **compiled,
+        "correct_array": np.asarray(compiled["correct_index"], dtype=np.int64),
+        "option_maps": option_maps,
+    }
@@ -0,0 +1,157 @@
+# app/workers/mcq_worker.py
+"""
+MCQ generation worker.
+
+Claims jobs from the Mongo-backed queue and runs the MCQ pipeline outside the
+API process. Run any number of these on any node:
+
+    python -m app.workers.mcq_worker --concurrency 4
+
+With QUESTION_BANK_REFILL_ENABLED=true (set it on one worker) the process
+also keeps the question bank topped up.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import traceback
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.database import ensure_indexes
+from app.core.llm import close_llm_clients
+from app.core.tracing import continue_trace, setup_tracing, shutdown_tracing
+from app.schemas.mcq import MCQRequest
+from app.services.content_client import close_content_client
+from app.services.job_queue import (
+    claim_job,
+    complete_job,
+    fail_job,
+    heartbeat,
+    requeue_expired_jobs,
+)
+from app.services.question_bank import run_refill_loop
+from app.services.quiz_generation import generate_quiz
+
+
+async def _heartbeat_loop(job_id, worker_id: str):
+    """Keep the lease alive; returns as soon as the lease is lost."""
+    interval = settings.MCQ_JOB_LEASE_SECONDS / 3
+    while True:
+        await asyncio.sleep(interval)
+        if not await heartbeat(job_id, worker_id):
+            print(f"[{worker_id}] Lost lease on job {job_id}")
+            return
+
+
+async def _generate_traced(job: dict, request: MCQRequest) -> dict:
+    """Run the pipeline as part of the trace of the request that enqueued the job."""
+    attributes = {"job.id": str(job["_id"]), "job.attempt": job["attempts"]}
+    with continue_trace("mcq.job", job.get("trace_context"), attributes):
+        return await generate_quiz(request, job["topic"])
+
+
+async def process_job(job: dict, worker_id: str):
+    job_id = job["_id"]
+    try:
+        request = MCQRequest(**job["payload"])
+    except ValidationError as e:
+        # Retrying cannot fix a bad payload
+        await fail_job(job_id, worker_id, str(e), error_status=400, retryable=False)
+        return
+
+    work = asyncio.create_task(_generate_traced(job, request))
+    lease = asyncio.create_task(_heartbeat_loop(job_id, worker_id))
+
+    try:
+        await asyncio.wait({work, lease}, return_when=asyncio.FIRST_COMPLETED)
+
+        if not work.done():
+            # Lease lost: another worker may already own the job
+            work.cancel()
+            return
+
+        try:
+            result = work.result()
+        except ValueError as e:
+            await fail_job(job_id, worker_id, str(e), error_status=400, retryable=False)
+            return
+        except Exception as e:
+            traceback.print_exc()
+            await fail_job(job_id, worker_id, str(e), error_status=500, retryable=True)
+            return
+
+        await complete_job(job_id, worker_id, result)
+        print(f"[{worker_id}] Completed job {job_id} (quiz {result['quiz_id']})")
+
+    finally:
+        work.cancel()
+        lease.cancel()
+
+
+async def run_worker(worker_id: str):
+    """Claim-and-process loop for one worker slot."""
+    loop = asyncio.get_running_loop()
+    last_sweep = 0.0
+
+    while True:
+        if loop.time() - last_sweep >= settings.MCQ_JOB_LEASE_SECONDS:
+            last_sweep = loop.time()
+            try:
+                await requeue_expired_jobs()
+            except Exception as e:
+                print(f"[{worker_id}] Expired-lease sweep failed: {e}")
+
+        try:
+            job = await claim_job(worker_id)
+        except Exception as e:
+            print(f"[{worker_id}] Failed to claim job: {e}")
+            job = None
+
+        if job is None:
+            await asyncio.sleep(settings.MCQ_JOB_POLL_INTERVAL_SECONDS)
+            continue
+
+        print(f"[{worker_id}] Claimed job {job['_id']} (attempt {job['attempts']})")
+        try:
+            await process_job(job, worker_id)
+        except Exception as e:
+            # Keep this slot alive; the job's lease expires and the sweep
+            # re-queues it (or fails it once attempts are used up)
+            print(f"[{worker_id}] Failed to process job {job['_id']}: {e}")
+            traceback.print_exc()
+
+
+def worker_id_prefix() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def main(concurrency: int):
+    if settings.TRACING_ENABLED:
+        setup_tracing(
+            "agentic_ai_service.worker",
+            settings.TRACE_FILE,
+            settings.TRACE_OTLP_ENDPOINT,
+            settings.TRACE_SAMPLE_RATIO,
+        )
+    await ensure_indexes()
+    prefix = worker_id_prefix()
+    loops = [run_worker(f"{prefix}:{i}") for i in range(concurrency)]
+    if settings.QUESTION_BANK_ENABLED and settings.QUESTION_BANK_REFILL_ENABLED:
+        loops.append(run_refill_loop())
+    try:
+        await asyncio.gather(*loops)
+    finally:
+        await close_content_client()
+        await close_llm_clients()
+        shutdown_tracing()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knowscope MCQ generation worker")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs processed in parallel by this process")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency))
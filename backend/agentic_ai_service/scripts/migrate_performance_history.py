@@ -0,0 +1,138 @@
+# scripts/migrate_performance_history.py
+"""
+One-off migration: move unbounded student history into performance_history buckets.
+
+For every student document that still has a `performance_history` array or a
+`weakness_counter` map:
+  - history entries are copied into monthly buckets (at most
+    PERFORMANCE_BUCKET_MAX_ENTRIES entries each)
+  - the legacy weakness_counter is added to the bucket of the latest month
+  - the student keeps only `recent_performance` (last RECENT_PERFORMANCE_LIMIT
+    entries) plus `performance_summary`, and the legacy fields are removed
+
+Buckets are tagged with the source student document and replaced on every
+run before the student update removes the legacy fields, so an interrupted
+run can simply be re-run.
+
+Usage (from backend/agentic_ai_service):
+    python -m scripts.migrate_performance_history [--dry-run]
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.database import ensure_indexes, performance_history_collection, students_collection
+
+
+def _buckets(student_id: str, history: list[dict], weakness_counter: dict) -> list[dict]:
+    by_month = defaultdict(list)
+    for entry in history:
+        assessed_at = entry.get("assessed_at") or datetime.utcnow()
+        by_month[assessed_at.strftime("%Y-%m")].append(entry)
+
+    if not by_month and weakness_counter:
+        by_month[datetime.utcnow().strftime("%Y-%m")] = []
+
+    buckets = []
+    for month in sorted(by_month):
+        entries = sorted(by_month[month], key=lambda e: e.get("assessed_at") or datetime.min)
+        size = settings.PERFORMANCE_BUCKET_MAX_ENTRIES
+        for i in range(0, max(len(entries), 1), size):
+            chunk = entries[i:i + size]
+            dates = [e["assessed_at"] for e in chunk if e.get("assessed_at")]
+            buckets.append({
+                "student_id": student_id,
+                "month": month,
+                "entries": chunk,
+                "count": len(chunk),
+                "score_sum": sum(e.get("score", 0) for e in chunk),
+                "weakness_counter": {},
+                "first_assessed": min(dates) if dates else None,
+                "last_assessed": max(dates) if dates else None,
+                "migrated_from": student_id,
+            })
+
+    if buckets and weakness_counter:
+        buckets[-1]["weakness_counter"] = dict(weakness_counter)
+    return buckets
+
+
+def _summary(history: list[dict]) -> dict:
+    scores = [e.get("score", 0) for e in history]
+    if not scores:
+        return {"assessments": 0, "score_sum": 0}
+    return {
+        "assessments": len(scores),
+        "score_sum": sum(scores),
+        "best_score": max(scores),
+        "lowest_score": min(scores),
+        "last_score": scores[-1],
+    }
+
+
+async def migrate(dry_run: bool = False) -> int:
+    await ensure_indexes()
+
+    legacy = {"$or": [{"performance_history": {"$exists": True}}, {"weakness_counter": {"$exists": True}}]}
+    migrated = 0
+
+    async for student in students_collection.find(legacy):
+        student_id = student.get("student_id")
+        history = sorted(
+            student.get("performance_history") or [],
+            key=lambda e: e.get("assessed_at") or datetime.min,
+        )
+        weakness_counter = student.get("weakness_counter") or {}
+        buckets = _buckets(student_id, history, weakness_counter)
+
+        print(f"{student_id}: {len(history)} history entries → {len(buckets)} bucket(s)")
+        if dry_run:
+            migrated += 1
+            continue
+
+        recent = history[-settings.RECENT_PERFORMANCE_LIMIT:]
+        # Merge with anything written by the new code path since deployment
+        summary = _summary(history)
+        existing = student.get("performance_summary") or {}
+        summary["assessments"] += existing.get("assessments", 0)
+        summary["score_sum"] += existing.get("score_sum", 0)
+        for key, pick in (("best_score", max), ("lowest_score", min)):
+            values = [v for v in (summary.get(key), existing.get(key)) if v is not None]
+            if values:
+                summary[key] = pick(values)
+        if "last_score" in existing:
+            summary["last_score"] = existing["last_score"]
+
+        merged_recent = (recent + (student.get("recent_performance") or []))[-settings.RECENT_PERFORMANCE_LIMIT:]
+
+        # Buckets first: a crash before the student update leaves the legacy fields in place
+        await performance_history_collection.delete_many({"migrated_from": student_id})
+        if buckets:
+            await performance_history_collection.insert_many(buckets)
+
+        result = await students_collection.update_one(
+            {"_id": student["_id"], **legacy},
+            {
+                "$set": {"recent_performance": merged_recent, "performance_summary": summary},
+                "$unset": {"performance_history": "", "weakness_counter": ""},
+            },
+        )
+        migrated += result.modified_count
+
+    return migrated
+
+
+async def main(dry_run: bool):
+    count = await migrate(dry_run=dry_run)
+    print(f"{'Would migrate' if dry_run else 'Migrated'} {count} student(s).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move student performance history into monthly buckets")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be migrated without writing")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dry_run))
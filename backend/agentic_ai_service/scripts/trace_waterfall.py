@@ -0,0 +1,122 @@
+# scripts/trace_waterfall.py
+"""
+Render traces exported by the services (JSON-lines span files) as waterfalls.
+
+Spans from several files are merged by trace id, so one quiz generation can
+be followed from the agentic service into the content service.
+
+Usage (from backend/agentic_ai_service):
+    python -m scripts.trace_waterfall traces/agentic_ai_service.jsonl \\
+        ../content_service/traces/content_service.jsonl [--trace ID] [--slowest N]
+
+Without --trace, lists the slowest traces and draws the slowest one.
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+
+BAR_WIDTH = 50
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_spans(paths: list[str]) -> dict[str, list[dict]]:
+    """trace_id -> spans (from every file)."""
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                raw = json.loads(line)
+                traces[raw["context"]["trace_id"][2:]].append({
+                    "span_id": raw["context"]["span_id"],
+                    "parent_id": raw.get("parent_id"),
+                    "name": raw["name"],
+                    "service": raw["resource"]["attributes"].get("service.name", "?"),
+                    "start": _timestamp(raw["start_time"]),
+                    "end": _timestamp(raw["end_time"]),
+                    "error": raw["status"]["status_code"] == "ERROR",
+                })
+    return traces
+
+
+def _roots(spans: list[dict]) -> list[dict]:
+    ids = {span["span_id"] for span in spans}
+    return sorted(
+        (span for span in spans if span["parent_id"] not in ids),
+        key=lambda span: span["start"],
+    )
+
+
+def trace_duration(spans: list[dict]) -> float:
+    return max(span["end"] for span in spans) - min(span["start"] for span in spans)
+
+
+def render(trace_id: str, spans: list[dict]) -> str:
+    children = defaultdict(list)
+    for span in spans:
+        children[span["parent_id"]].append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span["start"])
+
+    origin = min(span["start"] for span in spans)
+    total = max(trace_duration(spans), 1e-9)
+    name_width = max(len(span["name"]) for span in spans) + 2 * 8
+
+    lines = [f"trace {trace_id}  ({total * 1000:.1f} ms, {len(spans)} spans)"]
+
+    def walk(span: dict, depth: int):
+        offset = span["start"] - origin
+        duration = span["end"] - span["start"]
+        left = int(offset / total * BAR_WIDTH)
+        width = max(1, int(duration / total * BAR_WIDTH))
+        bar = " " * left + ("!" if span["error"] else "█") * width
+        label = ("  " * depth + span["name"]).ljust(name_width)
+        lines.append(
+            f"{label} {span['service'][:22]:<22} {offset * 1000:>9.1f} {duration * 1000:>9.1f} ms  |{bar:<{BAR_WIDTH}}|"
+        )
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in _roots(spans):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def main(paths: list[str], trace_id: str | None, slowest: int):
+    traces = load_spans(paths)
+    if not traces:
+        print("No spans found.")
+        return
+
+    if trace_id is None:
+        ranked = sorted(traces.items(), key=lambda item: trace_duration(item[1]), reverse=True)
+        print(f"Slowest {min(slowest, len(ranked))} of {len(ranked)} traces:")
+        for tid, spans in ranked[:slowest]:
+            root = _roots(spans)[0]
+            services = sorted({span["service"] for span in spans})
+            print(f"  {tid}  {trace_duration(spans) * 1000:>9.1f} ms  {root['name']}  [{', '.join(services)}]")
+        print()
+        trace_id = ranked[0][0]
+
+    spans = traces.get(trace_id)
+    if not spans:
+        print(f"Trace {trace_id} not found.")
+        return
+    print(render(trace_id, spans))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show exported traces as waterfalls")
+    parser.add_argument("files", nargs="+", help="JSON-lines span files written by the services")
+    parser.add_argument("--trace", help="Trace id (as in the x-trace-id response header)")
+    parser.add_argument("--slowest", type=int, default=10, help="How many of the slowest traces to list")
+    args = parser.parse_args()
+
+    main(args.files, args.trace, args.slowest)
@@ -22,3 +22,6 @@ conversations_collection = db["conversations"]
 messages_collection = db["messages"]
 
 textbook_collection = db["textbooks"]
+
+# Revoked JWTs, written by the user service on logout (TTL-pruned on expires_at)
+blacklist_collection = db["token_blacklist"]
@@ -0,0 +1,177 @@
+# shared/instrumentation.py
+"""
+Prometheus metrics and per-request timing for the Knowscope services.
+
+Copied verbatim into each service (agentic: app/core/instrumentation.py,
+content: app/instrumentation.py); keep the copies in sync.
+
+- @instrument(pipeline, stage) wraps graph nodes and pipeline stages
+  (sync or async) with a latency histogram and a trace span.
+- stage_timer(pipeline, stage) does the same for a block of code.
+- record_llm_tokens / record_retry / record_cache count LLM usage,
+  retries and cache lookups.
+- TimingMiddleware records HTTP latency per route and adds a
+  Server-Timing header with the stages that ran during the request.
+- metrics_response() renders everything for a /metrics endpoint.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from opentelemetry import trace
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from starlette.responses import Response
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+STAGE_LATENCY = Histogram(
+    "knowscope_stage_duration_seconds",
+    "Duration of graph nodes and pipeline stages",
+    ["pipeline", "stage", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_LATENCY = Histogram(
+    "knowscope_http_request_duration_seconds",
+    "HTTP request duration by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "knowscope_llm_tokens",
+    "Tokens per LLM call",
+    ["model", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+RETRIES = Counter(
+    "knowscope_retries_total",
+    "Retried calls by operation and reason",
+    ["operation", "reason"],
+)
+CACHE_REQUESTS = Counter(
+    "knowscope_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+_tracer = trace.get_tracer("knowscope")
+
+# Stage timings of the current request: {"pipeline.stage": [total_seconds, calls]}.
+# Tasks spawned while handling a request share the same dict.
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+def _observe(pipeline: str, stage: str, status: str, seconds: float):
+    STAGE_LATENCY.labels(pipeline, stage, status).observe(seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(f"{pipeline}.{stage}", [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str):
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with _tracer.start_as_current_span(f"{pipeline}.{stage}"):
+            yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _observe(pipeline, stage, status, time.perf_counter() - start)
+
+
+def instrument(pipeline: str, stage: str):
+    """Decorator: time a graph node or pipeline stage (sync or async function)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage_timer(pipeline, stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with stage_timer(pipeline, stage):
+                return func(*args, **kwargs)
+        return sync_wrapper
+
+    return decorator
+
+
+def record_llm_tokens(model: str, prompt_tokens: int | None, completion_tokens: int | None):
+    if prompt_tokens is not None:
+        LLM_TOKENS.labels(model, "prompt").observe(prompt_tokens)
+    if completion_tokens is not None:
+        LLM_TOKENS.labels(model, "completion").observe(completion_tokens)
+
+
+def record_retry(operation: str, reason: str):
+    RETRIES.labels(operation, reason).inc()
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _server_timing(timings: dict, total: float) -> str:
+    parts = []
+    for name, (seconds, calls) in sorted(timings.items(), key=lambda item: -item[1][0]):
+        desc = f';desc="x{calls}"' if calls > 1 else ""
+        parts.append(f"{name};dur={seconds * 1000:.1f}{desc}")
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: HTTP latency histogram per route template, plus a
+    Server-Timing header summing each instrumented stage in the request
+    (concurrent calls of the same stage add up, with their count in desc).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Route template (not the raw path) keeps label cardinality bounded
+            route = scope.get("route")
+            HTTP_LATENCY.labels(
+                scope.get("method", ""),
+                getattr(route, "path", "unmatched"),
+                str(status["code"]),
+            ).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
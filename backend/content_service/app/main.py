@@ -7,11 +7,27 @@ Run from the `content_service/` directory:
     uvicorn app.main:app --reload --port 8001
 """
 
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.instrumentation import TimingMiddleware, metrics_response
+from app.tracing import TraceIdMiddleware, setup_tracing, shutdown_tracing
 from routes.ingest import router as ingest_router
 from routes.qa import router as qa_router
+from routes.syllabusrout import router as textbook_router
+from routes.token_revocation import start_revocation_sync, stop_revocation_sync
+
+
+# Distributed tracing (opt-in): spans go to a local JSON-lines file (works
+# offline), and to an OTLP/HTTP collector when TRACE_OTLP_ENDPOINT is set
+if os.getenv("TRACING_ENABLED", "false").lower() == "true":
+    setup_tracing(
+        "content_service",
+        os.getenv("TRACE_FILE", "traces/content_service.jsonl"),
+        os.getenv("TRACE_OTLP_ENDPOINT"),
+        float(os.getenv("TRACE_SAMPLE_RATIO", "1.0")),
+    )
 
 
 @asynccontextmanager
@@ -19,13 +35,18 @@ async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle."""
     # Startup
     from app.vector_store import vector_store
+    from app.database import blacklist_collection
     stats = await vector_store.get_stats()
+    # Revoked-token Bloom filter, reloaded from the user service's blacklist
+    await start_revocation_sync(blacklist_collection)
     print("=" * 50)
     print("  🚀 Knowscope Content Service started")
     print(f"  📦 ChromaDB total chunks: {stats.get('total_chunks', 0)}")
     print("=" * 50)
     yield
     # Shutdown (nothing to clean up for ChromaDB persistent client)
+    await stop_revocation_sync()
+    shutdown_tracing()
     print("🛑 Knowscope Content Service shutting down")
 
 
@@ -40,6 +61,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-route latency histograms + Server-Timing header (see /metrics)
+app.add_middleware(TimingMiddleware)
+
+# Trace id of each request in the x-trace-id response header
+app.add_middleware(TraceIdMiddleware)
+
 # CORS middleware — restrict origins in production
 app.add_middleware(
     CORSMiddleware,
@@ -52,6 +79,7 @@ app.add_middleware(
 # Include routers
 app.include_router(ingest_router)
 app.include_router(qa_router)
+app.include_router(textbook_router)
 
 
 @app.get("/", tags=["Health"])
@@ -70,7 +98,12 @@ async def root():
             "delete_book":   "DELETE /ingest/book/{book_id}",
             "ask_question":  "POST /api/qa/ask",
             "search_chunks": "POST /api/qa/search",
+            "ground_queries": "POST /api/qa/ground",
+            "embed_texts": "POST /api/qa/embed",
+            "upload_textbook": "POST /api/textbook/upload-textbook",
+            "download_textbook": "GET  /api/textbook/download/{textbook_id}",
             "vector_stats":  "GET  /api/qa/stats",
+            "metrics":       "GET  /metrics",
             "api_docs":      "GET  /docs"
         }
     }
@@ -79,4 +112,10 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: RAG node/stage latency, HTTP latency per route, LLM tokens."""
+    return metrics_response()
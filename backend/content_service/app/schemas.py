@@ -9,6 +9,17 @@ class QuestionRequest(BaseModel):
     conversation_id: Optional[str] = Field(None, description="Existing conversation ID")
 
 
+class GroundingRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=64)
+    top_k: Optional[int] = Field(5, ge=1, le=20)
+    class_filter: Optional[int] = Field(None, description="Restrict to one class")
+    subject_filter: Optional[str] = Field(None, description="Restrict to one subject")
+
+
+class EmbeddingRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=128)
+
+
 class MessageResponse(BaseModel):
     question: str
     answer: str
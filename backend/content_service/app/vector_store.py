@@ -2,10 +2,11 @@ import chromadb
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 import os
+from app.instrumentation import instrument
 
 # Initialize ChromaDB client with persistent storage
 chroma_client = chromadb.PersistentClient(
-    path="./chroma_db_data",  # Vector DB stored here
+    path=os.getenv("CHROMA_PATH", "./chroma_db_data"),  # Vector DB stored here (CHROMA_PATH overrides, e.g. for benchmarks)
     settings=Settings(
         anonymized_telemetry=False,
         allow_reset=True
@@ -66,6 +67,36 @@ class VectorStore:
         return len(chunks)
     
     @staticmethod
+    def _build_where(class_filter: Optional[int], subject_filter: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Build the ChromaDB where clause for the optional metadata filters."""
+        where_clause = {}
+        if class_filter is not None:
+            where_clause["class"] = str(class_filter)
+        if subject_filter:
+            where_clause["subject"] = subject_filter.lower()
+        return where_clause if where_clause else None
+
+    @staticmethod
+    def _format_results(results: Dict[str, Any], query_index: int) -> List[Dict[str, Any]]:
+        """Format the hits of one query from a ChromaDB query() response."""
+        formatted_results = []
+        ids = results['ids'][query_index]
+        for i in range(len(ids)):
+            distance = results['distances'][query_index][i]
+            # Convert distance to similarity score (cosine distance to cosine similarity)
+            similarity = 1 - distance if distance <= 1 else 0
+
+            formatted_results.append({
+                'id': ids[i],
+                'text': results['documents'][query_index][i],
+                'metadata': results['metadatas'][query_index][i],
+                'similarity': round(similarity, 4)
+            })
+
+        return formatted_results
+
+    @staticmethod
+    @instrument("vector_store", "search")
     async def search_similar(
         query_embedding: List[float],
         class_filter: Optional[int] = None,
@@ -75,42 +106,53 @@ class VectorStore:
         """
         Search similar chunks with metadata filters
         """
-        # Build where clause for filtering
-        where_clause = {}
-        if class_filter is not None:
-            where_clause["class"] = str(class_filter)
-        if subject_filter:
-            where_clause["subject"] = subject_filter.lower()
-        
         try:
             # Query ChromaDB
             results = collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_k,
-                where=where_clause if where_clause else None,
+                where=VectorStore._build_where(class_filter, subject_filter),
                 include=["documents", "metadatas", "distances"]
             )
-            
-            # Format results
-            formatted_results = []
-            if results['ids'][0]:
-                for i in range(len(results['ids'][0])):
-                    # Convert distance to similarity score (cosine distance to cosine similarity)
-                    similarity = 1 - results['distances'][0][i] if results['distances'][0][i] <= 1 else 0
-                    
-                    formatted_results.append({
-                        'id': results['ids'][0][i],
-                        'text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'similarity': round(similarity, 4)
-                    })
-            
-            return formatted_results
-            
+
+            return VectorStore._format_results(results, 0)
+
         except Exception as e:
             print(f"Error searching vector store: {e}")
             return []
-    
+
+    @staticmethod
+    @instrument("vector_store", "search_batch")
+    async def search_similar_batch(
+        query_embeddings: List[List[float]],
+        class_filter: Optional[int] = None,
+        subject_filter: Optional[str] = None,
+        top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search similar chunks for many queries with a single ChromaDB query call.
+        Returns one result list per query embedding, in the same order.
+        """
+        if not query_embeddings:
+            return []
+
+        try:
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=top_k,
+                where=VectorStore._build_where(class_filter, subject_filter),
+                include=["documents", "metadatas", "distances"]
+            )
+
+            return [
+                VectorStore._format_results(results, i)
+                for i in range(len(query_embeddings))
+            ]
+
+        except Exception as e:
+            print(f"Error batch searching vector store: {e}")
+            return [[] for _ in query_embeddings]
+
     @staticmethod
     async def delete_book_chunks(book_id: str):
         """
@@ -18,6 +18,7 @@ from services.chapter_pipeline import build_chapters
 from services.topic_extractor import build_topics
 from services.chunk_builder import build_chunks
 from app.vector_store import vector_store
+from app.instrumentation import stage_timer
 
 router = APIRouter(prefix="/ingest", tags=["Ingestion"])
 
@@ -62,7 +63,8 @@ async def ingest_pdf(
 
     try:
         # ── Step 1: Extract pages ────────────────────────────────────────────
-        pages = extract_pages(tmp_path)
+        with stage_timer("ingest", "extract_pages"):
+            pages = extract_pages(tmp_path)
         if not pages:
             raise HTTPException(
                 status_code=422,
@@ -76,16 +78,20 @@ async def ingest_pdf(
             page["subject"] = subject.strip().lower()
 
         # ── Step 2: Store raw pages in MongoDB ───────────────────────────────
-        await raw_pages_collection.insert_many(pages)
+        with stage_timer("ingest", "store_pages"):
+            await raw_pages_collection.insert_many(pages)
 
         # ── Step 3: Build chapters ───────────────────────────────────────────
-        chapters = await build_chapters(book_id)
+        with stage_timer("ingest", "build_chapters"):
+            chapters = await build_chapters(book_id)
 
         # ── Step 4: Build topics ─────────────────────────────────────────────
-        await build_topics(book_id)
+        with stage_timer("ingest", "build_topics"):
+            await build_topics(book_id)
 
         # ── Step 5: Build chunks + embeddings → ChromaDB ─────────────────────
-        total_chunks = await build_chunks(book_id, class_number, subject.strip().lower())
+        with stage_timer("ingest", "build_chunks"):
+            total_chunks = await build_chunks(book_id, class_number, subject.strip().lower())
 
     finally:
         os.unlink(tmp_path)
@@ -1,13 +1,31 @@
 # shared/jwt_utils.py
 import os
+import time
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from fastapi import Depends, Header, HTTPException
 from jose import jwt, JWTError, ExpiredSignatureError, JWSError
 from dotenv import load_dotenv
+from .token_revocation import blacklist, lookup
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET")
 ALGORITHM = os.getenv("JWT_ALGORITHM")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+# sha256(token) -> (exp timestamp, claims). Only tokens that passed full
+# signature verification get in, and each entry dies at the token's own exp,
+# so a hit is exactly as trustworthy as re-verifying.
+_verified_tokens: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+# sha256(token) -> exp timestamp, for tokens revoked in this process
+_revoked_tokens: dict[str, float] = {}
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 def create_access_token(data: dict, expires_minutes: int = 60):
@@ -17,16 +35,141 @@ def create_access_token(data: dict, expires_minutes: int = 60):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str):
+def _cache_put(key: str, expires_at: float, claims: dict):
+    _verified_tokens[key] = (expires_at, claims)
+    _verified_tokens.move_to_end(key)
+    while len(_verified_tokens) > TOKEN_CACHE_MAX_ENTRIES:
+        _verified_tokens.popitem(last=False)
+
+
+def is_revoked(key: str, now: float | None = None) -> bool:
+    expires_at = _revoked_tokens.get(key)
+    if expires_at is None:
+        return False
+    if expires_at <= (now or time.time()):
+        # Expired anyway; signature verification rejects it from here on
+        del _revoked_tokens[key]
+        return False
+    return True
+
+
+def revoke_token(token: str, expires_at: float | None = None):
+    """
+    Drop a token from the verified cache and reject it until it expires.
+    `expires_at` defaults to the token's own (unverified) exp claim.
+    """
+    key = token_hash(token)
+    _verified_tokens.pop(key, None)
+
+    now = time.time()
+    if expires_at is None:
+        try:
+            expires_at = float(jwt.get_unverified_claims(token).get("exp") or 0)
+        except JWTError:
+            return
+    if expires_at > now:
+        _revoked_tokens[key] = expires_at
+
+    for stale in [k for k, exp in _revoked_tokens.items() if exp <= now]:
+        del _revoked_tokens[stale]
+
+
+def _verify_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
         if not user_id:
             raise JWTError("Invalid token payload")
-        return {"user_id": user_id, "email": payload.get("email")}
+        return payload
     except ExpiredSignatureError:
         raise JWTError("Token expired")
     except JWSError:
         raise JWTError("Signature verification failed")
     except JWTError as e:
         raise JWTError(f"Invalid token: {str(e)}")
+
+
+def decode_access_token(token: str):
+    """
+    Claims of a valid access token: {"user_id", "email", "role"}.
+    Repeat calls with the same token are served from an LRU of verified
+    tokens instead of re-running the signature check.
+    """
+    key = token_hash(token)
+    now = time.time()
+    if is_revoked(key, now):
+        raise JWTError("Token revoked")
+
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        expires_at, claims = cached
+        if expires_at > now:
+            _verified_tokens.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return dict(claims)
+        del _verified_tokens[key]
+        raise JWTError("Token expired")
+
+    _cache_stats["misses"] += 1
+    payload = _verify_access_token(token)
+    claims = {
+        "user_id": payload["user_id"],
+        "email": payload.get("email"),
+        "role": payload.get("role"),
+    }
+    # Tokens without an exp claim are valid forever; never cache those
+    if payload.get("exp") is not None:
+        _cache_put(key, float(payload["exp"]), claims)
+    return dict(claims)
+
+
+async def is_token_revoked(token: str) -> bool:
+    """
+    Check the shared blacklist (see token_revocation): free unless the
+    Bloom filter has the token, one Mongo lookup if it does.
+    """
+    expires_at = await lookup(token_hash(token))
+    if expires_at is None:
+        return False
+    # Remember it here so decode_access_token rejects it without I/O
+    revoke_token(token, expires_at)
+    return True
+
+
+async def blacklist_token(token: str, expires_at: float):
+    """Revoke a token in this process and, through the blacklist, in every service."""
+    revoke_token(token, expires_at)
+    await blacklist(token_hash(token), expires_at)
+
+
+def token_cache_stats() -> dict:
+    return {
+        "entries": len(_verified_tokens),
+        "max_entries": TOKEN_CACHE_MAX_ENTRIES,
+        "revoked": len(_revoked_tokens),
+        **_cache_stats,
+    }
+
+
+async def get_current_user_from_header(authorization: str = Header(...)):
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid auth header")
+    token = authorization.split(" ")[1]
+    try:
+        current_user = decode_access_token(token)
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    try:
+        revoked = await is_token_revoked(token)
+    except Exception:
+        # Fail closed: a possibly revoked token is not let through
+        raise HTTPException(status_code=503, detail="Token revocation check unavailable")
+    if revoked:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return current_user
+
+
+async def require_admin(current_user: dict = Depends(get_current_user_from_header)):
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
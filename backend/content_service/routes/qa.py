@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException,Depends,Header
+from fastapi import APIRouter, HTTPException,Depends
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from .jwt_utils import decode_access_token 
+from .jwt_utils import get_current_user_from_header
 from typing import List
 from datetime import datetime,timezone
-from app.schemas import QuestionRequest, MessageResponse, ConversationResponse, ConversationSummaryResponse ,CreateConversationRequest
+from app.schemas import QuestionRequest, GroundingRequest, EmbeddingRequest, MessageResponse, ConversationResponse, ConversationSummaryResponse ,CreateConversationRequest
 from services.qa_service import create_user_if_not_exists, get_or_create_conversation, save_message
 from app.database import conversations_collection, messages_collection
 from services.qa_service import get_user_conversations,get_conversation_messages
@@ -12,22 +12,12 @@ from bson import ObjectId
 
 
 
-router = APIRouter(prefix="/api/qa", tags=["Question Answering"])
+router = APIRouter(prefix="/api/qa", tags=["QA"])
 
-async def get_current_user_from_header(authorization: str = Header(...)):
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid auth header")
-    token = authorization.split(" ")[1]
-    try:
-        return decode_access_token(token)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=str(e))
-    
-    
 
 @router.get("/me")
 async def read_my_profile(current_user: dict = Depends(get_current_user_from_header)):
-    # current_user = {'user_id': ..., 'email': ...}
+    # current_user = {'user_id': ..., 'email': ..., 'role': ...}
     return {"message": "Current user fetched successfully", "user": current_user}
 
 
@@ -63,14 +53,22 @@ class SearchResponse(BaseModel):
     total_found: int
 
 
+class GroundingResult(BaseModel):
+    query: str
+    chunks: List[dict]
+    confidence: float
+
+
+class GroundingResponse(BaseModel):
+    results: List[GroundingResult]
+
+
+class EmbeddingResponse(BaseModel):
+    model: str
+    embeddings: List[List[float]]
 
 
-router = APIRouter(prefix="/api/qa", tags=["QA"])
 
-# Dummy auth dependency (replace with your JWT auth)
-async def get_current_user_from_header():
-    # Example hardcoded user, replace with JWT decoding
-    return {"user_id": "user123", "email": "user@example.com"}
 
 # --------------------------
 # Ask question endpoint
@@ -251,6 +249,65 @@ async def search_chunks(request: QuestionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─────────────────────────────────────────────
+# POST /api/qa/ground  — Batched retrieval-only grounding
+# ─────────────────────────────────────────────
+
+@router.post("/ground", response_model=GroundingResponse)
+async def ground_queries(request: GroundingRequest):
+    """
+    Return ranked chunks and a confidence score for many queries at once.
+    One batched embedding pass and one multi-query ChromaDB call; no LLM and
+    nothing is persisted, so callers like the agentic MCQ pipeline can ground
+    questions cheaply.
+    """
+    try:
+        from services.embedding_service import generate_embeddings
+        from app.vector_store import vector_store
+
+        embeddings = await generate_embeddings(request.queries)
+        chunk_lists = await vector_store.search_similar_batch(
+            query_embeddings=embeddings,
+            class_filter=request.class_filter,
+            subject_filter=request.subject_filter,
+            top_k=request.top_k
+        )
+
+        results = []
+        for query, chunks in zip(request.queries, chunk_lists):
+            # Average similarity of retrieved chunks as confidence (same as /ask)
+            confidence = round(
+                sum(c["similarity"] for c in chunks) / len(chunks), 4
+            ) if chunks else 0.0
+            results.append(GroundingResult(query=query, chunks=chunks, confidence=confidence))
+
+        return GroundingResponse(results=results)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─────────────────────────────────────────────
+# POST /api/qa/embed  — Batched text embeddings
+# ─────────────────────────────────────────────
+
+@router.post("/embed", response_model=EmbeddingResponse)
+async def embed_texts(request: EmbeddingRequest):
+    """
+    Embed many texts in one batched pass with the same normalized model used
+    for the vector store. Lets other services (e.g. the agentic MCQ dedup
+    stage) compare texts by cosine similarity without loading a model.
+    """
+    try:
+        from services.embedding_service import generate_embeddings, MODEL_NAME
+
+        embeddings = await generate_embeddings(request.texts)
+        return EmbeddingResponse(model=MODEL_NAME, embeddings=embeddings)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ─────────────────────────────────────────────
 # GET /api/qa/stats  — Vector store statistics
 # ─────────────────────────────────────────────
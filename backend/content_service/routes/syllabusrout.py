@@ -1,9 +1,13 @@
-from fastapi import APIRouter, UploadFile, File, Form,Header,Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form,Header,Depends,Request
+from fastapi.responses import JSONResponse, FileResponse, Response
 from datetime import datetime
 import os
-from PyPDF2 import PdfReader
-import shutil
+import time
+import hashlib
+from collections import OrderedDict
+from uuid import uuid4
+import anyio
+import pypdfium2 as pdfium
 from app.database import textbook_collection
 from bson import ObjectId
 from fastapi import HTTPException
@@ -30,6 +34,155 @@ router = APIRouter(prefix="/api/textbook", tags=["Text Book"])
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "textbooks")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://localhost:8001")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Browsers revalidate with If-None-Match (cheap 304) after this
+DOWNLOAD_MAX_AGE = int(os.getenv("TEXTBOOK_DOWNLOAD_MAX_AGE", "3600"))
+
+# textbook_id -> (file_path, file_name). PDF viewers send many Range requests
+# per book; this keeps them from costing a Mongo lookup each.
+_download_paths: OrderedDict[str, tuple[str, str]] = OrderedDict()
+DOWNLOAD_PATHS_MAX_ENTRIES = 1024
+
+# class_name -> (built_at, catalog views). Uploads and deletes invalidate the
+# class in this process; the TTL bounds staleness from other workers.
+_catalog_cache: dict[int, tuple[float, dict]] = {}
+# class_name -> invalidation count; a rebuild that started before the latest
+# upload/delete must not store its (stale) result
+_catalog_generation: dict[int, int] = defaultdict(int)
+CATALOG_CACHE_TTL = float(os.getenv("TEXTBOOK_CATALOG_TTL", "300"))
+
+
+def _download_url(textbook_id) -> str:
+    return f"{PUBLIC_BASE_URL}/api/textbook/download/{textbook_id}"
+
+
+def _invalidate_catalog(class_name: int):
+    _catalog_generation[class_name] += 1
+    _catalog_cache.pop(class_name, None)
+
+
+def _etag(stat: os.stat_result) -> str:
+    # Changes whenever the file is replaced (new mtime) or resized
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _write_upload(file: UploadFile, destination: str) -> tuple[int, str]:
+    """
+    Stream the upload to a temp file in 1 MiB chunks, then swap it in atomically.
+    Returns (size in bytes, sha256 hex) computed on the way through.
+    """
+    tmp_path = f"{destination}.{uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                await out.write(chunk)
+        # Readers of an older file with this name never see a partial write
+        await anyio.Path(tmp_path).replace(destination)
+    finally:
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
+    return size, digest.hexdigest()
+
+
+def _count_pages(file_path: str) -> int:
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def _page_count(file_path: str) -> int:
+    """Page count parsed off the event loop; 0 if the PDF cannot be read."""
+    try:
+        return await anyio.to_thread.run_sync(_count_pages, file_path)
+    except Exception as e:
+        print(f"Error reading PDF {file_path}: {e}")
+        return 0
+
+
+async def _backfill_file_info(book: dict):
+    """Store page_count / file_size / sha256 on a textbook uploaded before they existed."""
+    file_path = book.get("file_path")
+    if not file_path or not os.path.exists(file_path):
+        print(f"File not found: {file_path}")
+        return
+    info = {
+        "page_count": await _page_count(file_path),
+        "file_size": os.path.getsize(file_path),
+        "sha256": await anyio.to_thread.run_sync(_hash_file, file_path),
+    }
+    book.update(info)
+    await textbook_collection.update_one({"_id": book["_id"]}, {"$set": info})
+
+
+async def _class_catalog(class_name: int) -> dict:
+    """
+    All catalog views of one class, built from a single Mongo query and
+    cached until an upload/delete in the class (or CATALOG_CACHE_TTL).
+    """
+    cached = _catalog_cache.get(class_name)
+    if cached and time.monotonic() - cached[0] < CATALOG_CACHE_TTL:
+        return cached[1]
+
+    generation = _catalog_generation[class_name]
+    books = [book async for book in textbook_collection.find({"class_name": class_name})]
+    for book in books:
+        if book.get("page_count") is None:
+            await _backfill_file_info(book)
+
+    grouped_data = defaultdict(list)
+    textbooks = []
+    page_counts = []
+    for book in books:
+        grouped_data[book["subject"]].append({
+            "id": str(book["_id"]),
+            "part": book["part"],
+            "file_name": book["file_name"],
+            "file_url": _download_url(book["_id"]),
+            "uploaded_at": book["uploaded_at"]
+        })
+        textbooks.append({
+            "id": str(book["_id"]),
+            "class_name": book["class_name"],
+            "subject": book["subject"],
+            "part": book["part"],
+            "file_name": book["file_name"],
+            "file_url": _download_url(book["_id"]),
+            "uploaded_at": book["uploaded_at"]
+        })
+        page_counts.append({
+            "subject": book["subject"],
+            "part": book["part"],
+            "page_count": book.get("page_count", 0),
+            "file_size": book.get("file_size"),
+        })
+
+    catalog = {
+        "grouped": [{"subject": subject, "parts": parts} for subject, parts in grouped_data.items()],
+        "textbooks": textbooks,
+        "page_counts": page_counts,
+    }
+    if _catalog_generation[class_name] == generation:
+        _catalog_cache[class_name] = (time.monotonic(), catalog)
+    return catalog
 
 
 
@@ -38,19 +191,24 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 async def upload_textbook(class_name: int = Form(...),subject: str = Form(...),part: str = Form(...),file: UploadFile = File(...),current_admin: dict = Depends(require_admin)):
     filename = os.path.basename(file.filename)
     file_location = os.path.join(UPLOAD_FOLDER, filename)
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    file_size, sha256 = await _write_upload(file, file_location)
+    textbook_id = ObjectId()
     textbook_data = {
+        "_id": textbook_id,
         "class_name": class_name,
         "subject": subject,
         "part": part,
         "file_name": filename,
         "file_path": file_location, 
-        "file_url": f"http://localhost:8001/static/textbooks/{filename}",
+        "file_url": _download_url(textbook_id),
+        "page_count": await _page_count(file_location),
+        "file_size": file_size,
+        "sha256": sha256,
         "uploaded_at": datetime.utcnow(),
         "uploaded_by": current_admin["user_id"]
     }
     result = await textbook_collection.insert_one(textbook_data)
+    _invalidate_catalog(class_name)
 
     return JSONResponse({
         "message": "Textbook uploaded successfully",
@@ -61,20 +219,7 @@ async def upload_textbook(class_name: int = Form(...),subject: str = Form(...),p
 
 @router.get("/textbooksnames/{class_name}")
 async def get_textbooks_grouped(class_name: int):
-    cursor = textbook_collection.find({"class_name": class_name})
-    grouped_data = defaultdict(list)
-    async for book in cursor:
-        grouped_data[book["subject"]].append({
-            "id": str(book["_id"]),
-            "part": book["part"],
-            "file_name": book["file_name"],
-            "file_url": book["file_url"],
-            "uploaded_at": book["uploaded_at"]
-        })
-    result = []
-    for subject, parts in grouped_data.items():
-        result.append({"subject": subject,"parts": parts})
-    return result
+    return (await _class_catalog(class_name))["grouped"]
 
 
 
@@ -82,21 +227,7 @@ async def get_textbooks_grouped(class_name: int):
 
 @router.get("/textbooksshowbyclass/{class_name}")
 async def get_textbooks(class_name: int):
-    textbooks = []
-    cursor = textbook_collection.find({"class_name": class_name})
-
-    async for book in cursor:
-        textbooks.append({
-            "id": str(book["_id"]),
-            "class_name": book["class_name"],
-            "subject": book["subject"],
-            "part": book["part"],
-            "file_name": book["file_name"],
-            "file_url": book["file_url"],
-            "uploaded_at": book["uploaded_at"]
-        })
-
-    return textbooks
+    return (await _class_catalog(class_name))["textbooks"]
 
 
 @router.get("/textbookbysubject/{class_subject}")
@@ -111,7 +242,7 @@ async def get_textbooks(class_subject: str):
             "subject": book["subject"],
             "part": book["part"],
             "file_name": book["file_name"],
-            "file_url": book["file_url"],
+            "file_url": _download_url(book["_id"]),
             "uploaded_at": book["uploaded_at"]})
     return textbooks
 
@@ -133,6 +264,8 @@ async def delete_textbook(textbook_id: str):
     if file_path and os.path.exists(file_path):
         os.remove(file_path)
     await textbook_collection.delete_one({"_id": ObjectId(textbook_id)})
+    _download_paths.pop(textbook_id, None)
+    _invalidate_catalog(book.get("class_name"))
 
     return {
         "message": "Textbook deleted successfully"
@@ -143,30 +276,57 @@ async def delete_textbook(textbook_id: str):
 
 
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
 @router.get("/textbooks_with_pagecount/{class_name}")
 async def get_textbooks_with_pages(class_name: int):
-    textbooks = []
-    cursor = textbook_collection.find({"class_name": class_name})
-
-    async for book in cursor:
-        file_path = os.path.join(BASE_DIR, book["file_path"])
-        page_count = 0
-
-        if os.path.exists(file_path):
-            try:
-                pdf = PdfReader(file_path)
-                page_count = len(pdf.pages)
-            except Exception as e:
-                print(f"Error reading PDF {file_path}: {e}")
-        else:
-            print(f"File not found: {file_path}")
-
-        textbooks.append({
-            "subject": book["subject"],
-            "part": book["part"],
-            "page_count": page_count
-        })
-
-    return textbooks
\ No newline at end of file
+    # page_count is stored at upload (older books are backfilled once)
+    return (await _class_catalog(class_name))["page_counts"]
+
+
+
+
+@router.get("/download/{textbook_id}")
+async def download_textbook(textbook_id: str, request: Request):
+    """
+    Serve a textbook PDF with HTTP Range support (PDF viewers fetch only the
+    pages they show) and ETag / If-None-Match revalidation (repeat views get 304).
+    """
+    cached = _download_paths.get(textbook_id)
+    if cached is None:
+        if not ObjectId.is_valid(textbook_id):
+            raise HTTPException(status_code=400, detail="Invalid textbook ID")
+        book = await textbook_collection.find_one({"_id": ObjectId(textbook_id)}, {"file_path": 1, "file_name": 1})
+        if not book:
+            raise HTTPException(status_code=404, detail="Textbook not found")
+        cached = (book["file_path"], book["file_name"])
+        _download_paths[textbook_id] = cached
+        while len(_download_paths) > DOWNLOAD_PATHS_MAX_ENTRIES:
+            _download_paths.popitem(last=False)
+    else:
+        _download_paths.move_to_end(textbook_id)
+    file_path, file_name = cached
+
+    try:
+        stat = await anyio.Path(file_path).stat()
+    except FileNotFoundError:
+        _download_paths.pop(textbook_id, None)
+        raise HTTPException(status_code=404, detail="Textbook file not found")
+
+    etag = _etag(stat)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={DOWNLOAD_MAX_AGE}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse streams from disk in a threadpool and answers Range /
+    # If-Range requests with 206 (keeping our ETag)
+    return FileResponse(
+        file_path,
+        media_type="application/pdf",
+        filename=file_name,
+        content_disposition_type="inline",
+        headers=headers,
+        stat_result=stat,
+    )
@@ -0,0 +1,449 @@
+"""
+Ingestion throughput benchmark
+==============================
+Run from the content_service directory:
+    python scripts/bench_ingest.py --books 2 --chapters 10 --pages-per-chapter 15
+
+What it does:
+  1. Generates realistic textbook PDFs: title page, a "Contents" page in the
+     format toc_extractor expects, chapters with running headers, page-number
+     footers, topic subheadings, wrapped paragraphs and an exercise section
+     of questions. No PDF library needed; see write_pdf().
+  2. Runs the ingestion stages exactly as POST /ingest/pdf does —
+     extract_pages → store_pages → build_chapters → build_topics → build_chunks —
+     against a local Mongo (MONGO_URI, or --mongo mock) and a temporary Chroma
+     directory (CHROMA_PATH).
+  3. Reports per stage: wall time, CPU time (all threads, including the
+     embedding executor), peak RSS during the stage, and pages/sec or chunks/sec.
+  4. Writes JSON results (tagged with the git commit) and removes the
+     benchmark books from Mongo afterwards.
+
+--embedder random replaces SentenceTransformer.encode with random vectors to
+measure the pipeline without model cost; the model is still loaded on import.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# ── Path setup ──────────────────────────────────────────────
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
+sys.path.insert(0, parent_dir)
+
+from bench_rag import RandomEncoder, EMBEDDING_DIM, VOCABULARY, git_commit  # noqa: E402
+
+# A4 in points; 10pt Helvetica body text
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 60
+LINE_HEIGHT = 14
+CHARS_PER_LINE = 88
+BODY_LINES = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT - 4  # minus header/footer space
+
+CHAPTER_TITLES = [
+    "Chemical Reactions and Equations", "Acids Bases and Salts", "Metals and Non Metals",
+    "Carbon and its Compounds", "Life Processes", "Control and Coordination",
+    "How do Organisms Reproduce", "Heredity and Evolution", "Light Reflection and Refraction",
+    "The Human Eye and the Colourful World", "Electricity", "Magnetic Effects of Electric Current",
+    "Our Environment", "Sources of Energy", "Management of Natural Resources",
+]
+TOPIC_TITLES = [
+    "Introduction", "Types of Reactions", "Properties and Uses", "Important Processes",
+    "Everyday Applications", "Experimental Observations", "Factors Affecting the Process",
+    "Summary of Key Ideas", "Historical Background", "Structure and Function",
+]
+
+
+# ─────────────────────────────────────────────
+# Minimal PDF writer (text only, Helvetica, WinAnsi)
+# ─────────────────────────────────────────────
+
+def _pdf_string(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: list[list[tuple[str, int, bool, int, int]]]):
+    """
+    pages: one list per page of (text, font_size, bold, x, y) lines.
+    Writes a valid PDF 1.4 with one content stream per page.
+    """
+    objects: list[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree id is known
+    pages_id = add(b"")
+    regular = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    bold = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for lines in pages:
+        stream = "".join(
+            f"BT /{'F2' if is_bold else 'F1'} {size} Tf {x} {y} Td ({_pdf_string(text)}) Tj ET\n"
+            for text, size, is_bold, x, y in lines
+        ).encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"endstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, regular, bold, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# ─────────────────────────────────────────────
+# Synthetic textbook
+# ─────────────────────────────────────────────
+
+def _sentence(rng: random.Random) -> str:
+    # Short enough to end on the line it starts on: a wrapped line that starts
+    # a sentence and has no period would look like a subheading to build_topics
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(5, 9))]
+    return " ".join(words).capitalize() + "."
+
+
+def _wrap(text: str) -> list[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > CHARS_PER_LINE:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _chapter_lines(rng: random.Random, index: int, title: str, pages: int, questions: int) -> list[tuple[str, bool]]:
+    """Body lines (text, is_heading) for one chapter, roughly `pages` pages long."""
+    budget = pages * BODY_LINES
+    lines: list[tuple[str, bool]] = [(f"Chapter {index}", True), (title, True)]
+
+    topic_titles = rng.sample(TOPIC_TITLES, len(TOPIC_TITLES))
+    topic = 0
+    while len(lines) < budget - questions - 2:
+        # Subheadings are letter-only lines, as topic_extractor splits on them
+        lines.append((topic_titles[topic % len(topic_titles)], True))
+        topic += 1
+        for _ in range(rng.randint(3, 6)):
+            paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(6, 12)))
+            lines.extend((line, False) for line in _wrap(paragraph))
+
+    lines.append(("Exercises", True))
+    for q in range(questions):
+        a, b = rng.choice(VOCABULARY), rng.choice(VOCABULARY)
+        lines.append((f"{q + 1}. What is the relationship between {a} and {b} in this chapter?", False))
+    return lines
+
+
+def build_book(path: str, subject: str, class_number: int, chapters: int,
+               pages_per_chapter: int, questions: int, seed: int) -> int:
+    """Write one synthetic textbook; returns its page count."""
+    rng = random.Random(seed)
+    header = f"{subject.title()} - Class {class_number}"
+
+    chapter_bodies = []
+    for c in range(chapters):
+        title = CHAPTER_TITLES[c % len(CHAPTER_TITLES)]
+        if c >= len(CHAPTER_TITLES):
+            title = f"{title} Part {c // len(CHAPTER_TITLES) + 1}"
+        chapter_bodies.append((title, _chapter_lines(rng, c + 1, title, pages_per_chapter, questions)))
+
+    # Page 1 title, page 2 contents, chapters from page 3
+    start_pages, page = [], 3
+    for _, body in chapter_bodies:
+        start_pages.append(page)
+        page += -(-len(body) // BODY_LINES)
+
+    top = PAGE_HEIGHT - MARGIN
+    pdf_pages = [
+        [
+            (f"{subject.title()}", 28, True, MARGIN, top - 200),
+            (f"Textbook for Class {class_number}", 16, False, MARGIN, top - 240),
+            ("Synthetic edition generated for ingestion benchmarks", 10, False, MARGIN, top - 280),
+        ],
+        [("Contents", 18, True, MARGIN, top)] + [
+            (f"{i + 1} {title} - {start}", 11, False, MARGIN, top - 40 - i * 18)
+            for i, ((title, _), start) in enumerate(zip(chapter_bodies, start_pages))
+        ],
+    ]
+
+    for _, body in chapter_bodies:
+        for offset in range(0, len(body), BODY_LINES):
+            number = len(pdf_pages) + 1
+            lines = [(header, 8, False, MARGIN, PAGE_HEIGHT - 30)]
+            y = top - LINE_HEIGHT
+            for text, is_heading in body[offset:offset + BODY_LINES]:
+                lines.append((text, 12 if is_heading else 10, is_heading, MARGIN, y))
+                y -= LINE_HEIGHT
+            lines.append((f"Page {number}", 8, False, PAGE_WIDTH // 2 - 15, 30))
+            pdf_pages.append(lines)
+
+    write_pdf(path, pdf_pages)
+    return len(pdf_pages)
+
+
+# ─────────────────────────────────────────────
+# Resource measurement
+# ─────────────────────────────────────────────
+
+def _current_rss_mb() -> float | None:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageMeter:
+    """Wall time, CPU time and peak RSS of one stage (RSS sampled every 10 ms)."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self.peak_rss = 0.0
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            rss = _current_rss_mb()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss, rss)
+
+    def __enter__(self):
+        self.peak_rss = _current_rss_mb() or 0.0
+        if self.peak_rss:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self.peak_rss = max(self.peak_rss, _current_rss_mb() or 0.0)
+        else:
+            # No /proc: fall back to the process-lifetime peak
+            self.peak_rss = _peak_rss_mb()
+        return False
+
+
+# ─────────────────────────────────────────────
+# Benchmark
+# ─────────────────────────────────────────────
+
+STAGES = ["extract_pages", "store_pages", "build_chapters", "build_topics", "build_chunks"]
+
+
+async def ingest_book(pdf_path: str, book_id: str, class_number: int, subject: str) -> dict:
+    """The /ingest/pdf pipeline, one stage at a time; returns per-stage measurements."""
+    from app.database import raw_pages_collection, topics_collection
+    from services.pdf_loader import extract_pages
+    from services.chapter_pipeline import build_chapters
+    from services.topic_extractor import build_topics
+    from services.chunk_builder import build_chunks
+
+    stats = {}
+
+    with StageMeter() as meter:
+        pages = extract_pages(pdf_path)
+    stats["extract_pages"] = (meter, len(pages))
+
+    for page in pages:
+        page["book_id"] = book_id
+        page["class"] = class_number
+        page["subject"] = subject
+
+    with StageMeter() as meter:
+        await raw_pages_collection.insert_many(pages)
+    stats["store_pages"] = (meter, len(pages))
+
+    with StageMeter() as meter:
+        chapters = await build_chapters(book_id)
+    stats["build_chapters"] = (meter, len(chapters))
+
+    with StageMeter() as meter:
+        await build_topics(book_id)
+    stats["build_topics"] = (meter, await topics_collection.count_documents({"book_id": book_id}))
+
+    with StageMeter() as meter:
+        chunks = await build_chunks(book_id, class_number, subject)
+    stats["build_chunks"] = (meter, chunks)
+
+    return stats
+
+
+async def cleanup(book_ids: list[str]):
+    from app.database import raw_pages_collection, chapters_collection, topics_collection, chunks_collection
+
+    for collection in (raw_pages_collection, chapters_collection, topics_collection, chunks_collection):
+        await collection.delete_many({"book_id": {"$in": book_ids}})
+
+
+async def run_benchmark(args) -> dict:
+    chroma_dir = tempfile.mkdtemp(prefix="knowscope_bench_ingest_chroma_")
+    pdf_dir = args.pdf_dir or tempfile.mkdtemp(prefix="knowscope_bench_pdfs_")
+    os.makedirs(pdf_dir, exist_ok=True)
+    os.environ["CHROMA_PATH"] = chroma_dir
+    os.environ.setdefault("TRACING_ENABLED", "false")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("MONGO_DB", "knowscope_bench")
+
+    if args.mongo == "mock":
+        try:
+            import motor.motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mongo mock needs mongomock-motor (pip install mongomock-motor), or use --mongo real")
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    import services.embedding_service as embedding_service
+    if args.embedder == "random":
+        embedding_service.model = RandomEncoder(EMBEDDING_DIM)
+
+    book_ids = [f"__bench_ingest_{i + 1}__" for i in range(args.books)]
+    books = []
+    totals = {stage: {"wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_mb": 0.0, "items": 0} for stage in STAGES}
+
+    try:
+        for i, book_id in enumerate(book_ids):
+            path = os.path.join(pdf_dir, f"{book_id}.pdf")
+            started = time.perf_counter()
+            page_count = build_book(
+                path, "science", 10, args.chapters, args.pages_per_chapter, args.questions, args.seed + i
+            )
+            size_kb = os.path.getsize(path) / 1024
+            print(f"[PDF] {book_id}: {page_count} pages, {size_kb:.0f} KB "
+                  f"(generated in {time.perf_counter() - started:.2f}s)")
+
+            stats = await ingest_book(path, book_id, 10, "science")
+            book = {"book_id": book_id, "pdf_pages": page_count, "pdf_kb": round(size_kb, 1), "stages": {}}
+            for stage in STAGES:
+                meter, items = stats[stage]
+                book["stages"][stage] = {
+                    "wall_seconds": round(meter.wall_seconds, 4),
+                    "cpu_seconds": round(meter.cpu_seconds, 4),
+                    "peak_rss_mb": round(meter.peak_rss, 1),
+                    "items": items,
+                }
+                total = totals[stage]
+                total["wall_seconds"] += meter.wall_seconds
+                total["cpu_seconds"] += meter.cpu_seconds
+                total["peak_rss_mb"] = max(total["peak_rss_mb"], meter.peak_rss)
+                total["items"] += items
+            books.append(book)
+    finally:
+        await cleanup(book_ids)
+        shutil.rmtree(chroma_dir, ignore_errors=True)
+        if not args.pdf_dir:
+            shutil.rmtree(pdf_dir, ignore_errors=True)
+
+    pages = totals["extract_pages"]["items"]
+    for stage, total in totals.items():
+        wall = total["wall_seconds"]
+        total["pages_per_sec"] = round(pages / wall, 2) if wall else None
+        if stage == "build_chunks":
+            total["chunks_per_sec"] = round(total["items"] / wall, 2) if wall else None
+        for key in ("wall_seconds", "cpu_seconds"):
+            total[key] = round(total[key], 4)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "books": args.books,
+            "chapters_per_book": args.chapters,
+            "pages_per_chapter": args.pages_per_chapter,
+            "questions_per_chapter": args.questions,
+            "embedder": args.embedder,
+            "mongo": args.mongo,
+        },
+        "totals": totals,
+        "books": books,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'stage':<16}{'wall s':>10}{'cpu s':>10}{'cpu/wall':>10}{'peak RSS MB':>13}{'items':>8}{'pages/s':>10}{'chunks/s':>10}")
+    for stage, total in report["totals"].items():
+        wall = total["wall_seconds"]
+        ratio = total["cpu_seconds"] / wall if wall else 0.0
+        print(
+            f"{stage:<16}{wall:>10.3f}{total['cpu_seconds']:>10.3f}{ratio:>10.2f}"
+            f"{total['peak_rss_mb']:>13.1f}{total['items']:>8}"
+            f"{total['pages_per_sec'] or 0:>10.1f}{total.get('chunks_per_sec') or 0:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF ingestion pipeline on synthetic textbooks")
+    parser.add_argument("--books", type=int, default=1)
+    parser.add_argument("--chapters", type=int, default=8, help="Chapters per book")
+    parser.add_argument("--pages-per-chapter", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=8, help="Exercise questions per chapter")
+    parser.add_argument("--embedder", choices=["model", "random"], default="model")
+    parser.add_argument("--mongo", choices=["real", "mock"], default="real", help="MONGO_URI or mongomock")
+    parser.add_argument("--pdf-dir", help="Keep the generated PDFs here")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON results path (default: bench_results/ingest_<commit>.json)")
+    args = parser.parse_args()
+
+    if min(args.books, args.chapters, args.pages_per_chapter) < 1:
+        parser.error("--books, --chapters and --pages-per-chapter must be positive")
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    output = args.output or os.path.join(parent_dir, "bench_results", f"ingest_{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+RAG query latency benchmark
+===========================
+Run from the content_service directory:
+    python scripts/bench_rag.py --chunks 100000 --concurrency 1,8,32 --requests 400
+
+What it does:
+  1. Builds a synthetic corpus (random unit vectors + filler text with
+     realistic metadata) of --chunks chunks in a temporary Chroma directory
+     (or reuses --corpus-dir if it already holds enough chunks).
+  2. Replaces the Groq client with a local fake whose latency follows
+     --llm-latency-ms / --llm-jitter-ms, and (by default) Mongo with mongomock.
+     With --llm-url the real Groq client is used against that server instead
+     (e.g. backend/fake_llm_service, to include HTTP, rate limits and 429s).
+  3. Drives POST /api/qa/ask and /api/qa/search in-process (ASGI, no network)
+     at each concurrency level.
+  4. Reports p50/p95/p99 latency and throughput per endpoint and level, with a
+     per-node breakdown taken from the Server-Timing header (rag.embed_question,
+     rag.retrieve_chunks, rag.generate_answer, vector_store.search, ...).
+  5. Writes everything as JSON (tagged with the git commit) so runs on two
+     commits can be compared:
+        python scripts/bench_rag.py ... --baseline bench_results/rag_<old>.json
+
+--embedder random skips the SentenceTransformer encode (queries get random
+vectors) to isolate Chroma + graph overhead; the model is still loaded on
+import, as in production.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+# ── Path setup ──────────────────────────────────────────────
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
+sys.path.insert(0, parent_dir)
+
+EMBEDDING_DIM = 384  # BAAI/bge-small-en-v1.5
+SUBJECTS = ["science", "maths", "social science", "english", "hindi"]
+VOCABULARY = (
+    "photosynthesis chlorophyll energy light water carbon dioxide oxygen cell nucleus "
+    "membrane tissue organ respiration digestion enzyme acid base salt metal reaction "
+    "equation force motion velocity acceleration gravity pressure sound wave electric "
+    "current circuit resistance magnet field lens mirror reflection refraction atom "
+    "molecule element compound mixture solution triangle angle polygon circle area "
+    "volume fraction ratio percentage algebra polynomial linear quadratic probability "
+    "statistics river mountain climate soil forest resource agriculture industry trade "
+    "democracy constitution parliament rights history empire revolution colonial map "
+    "population migration economy money bank credit sector development poem story"
+).split()
+QUESTION_TEMPLATES = [
+    "Explain {a} and {b}.",
+    "What is the role of {a} in {b}?",
+    "Describe how {a} affects {b}.",
+    "Define {a} with an example.",
+    "Differentiate between {a} and {b}.",
+]
+
+
+# ─────────────────────────────────────────────
+# Fakes: Groq client and embedding model
+# ─────────────────────────────────────────────
+
+class _FakeCompletions:
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    async def create(self, model: str, messages: list, **kwargs):
+        delay_ms = max(0.0, random.gauss(self.latency_ms, self.jitter_ms))
+        await asyncio.sleep(delay_ms / 1000)
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(
+                content="Synthetic benchmark answer based on the textbook context."
+            ))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=64),
+        )
+
+
+class FakeGroq:
+    """Stands in for AsyncGroq: chat.completions.create with configurable latency."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(latency_ms, jitter_ms))
+
+
+class RandomEncoder:
+    """Stands in for SentenceTransformer.encode: random unit vectors."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.rng = np.random.default_rng()
+
+    def encode(self, texts, normalize_embeddings: bool = True):
+        single = isinstance(texts, str)
+        vectors = self.rng.standard_normal((1 if single else len(texts), self.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if single else vectors
+
+
+# ─────────────────────────────────────────────
+# Synthetic corpus
+# ─────────────────────────────────────────────
+
+def build_corpus(collection, size: int, dim: int, seed: int, max_batch: int) -> float:
+    """Fill the collection up to `size` chunks; returns seconds spent inserting."""
+    existing = collection.count()
+    if existing >= size:
+        print(f"[CORPUS] Reusing {existing} existing chunks")
+        return 0.0
+
+    rng = np.random.default_rng(seed + existing)
+    vocabulary = np.array(VOCABULARY)
+    started = time.perf_counter()
+
+    for start in range(existing, size, max_batch):
+        n = min(max_batch, size - start)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        ids, documents, metadatas = [], [], []
+        for i in range(start, start + n):
+            book = i // 2000
+            chapter = (i // 200) % 10 + 1
+            topic = (i // 20) % 10 + 1
+            ids.append(f"bench_book_{book}_ch{chapter}_t{topic}_c{i % 20 + 1}")
+            documents.append(" ".join(rng.choice(vocabulary, 80)))
+            metadatas.append({
+                "book_id": f"bench_book_{book}",
+                "class": str(6 + book % 7),
+                "subject": SUBJECTS[book % len(SUBJECTS)],
+                "chapter_index": str(chapter),
+                "chapter_title": f"Chapter {chapter}",
+                "topic_index": str(topic),
+                "topic_title": f"Topic {topic}",
+                "chunk_index": str(i % 20 + 1),
+            })
+
+        collection.add(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+        done = start + n
+        if done == size or (done // max_batch) % 10 == 0:
+            rate = (done - existing) / (time.perf_counter() - started)
+            print(f"   {done}/{size} chunks ({rate:.0f} chunks/s)")
+
+    return time.perf_counter() - started
+
+
+def make_questions(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        rng.choice(QUESTION_TEMPLATES).format(a=rng.choice(VOCABULARY), b=rng.choice(VOCABULARY))
+        for _ in range(count)
+    ]
+
+
+# ─────────────────────────────────────────────
+# Load generation and reporting
+# ─────────────────────────────────────────────
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    stages = {}
+    for part in (header or "").split(","):
+        fields = part.strip().split(";")
+        name = fields[0].strip()
+        for field in fields[1:]:
+            if field.strip().startswith("dur="):
+                stages[name] = float(field.strip()[4:])
+    return stages
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    array = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(array, 50)), 2),
+        "p95": round(float(np.percentile(array, 95)), 2),
+        "p99": round(float(np.percentile(array, 99)), 2),
+        "mean": round(float(array.mean()), 2),
+        "max": round(float(array.max()), 2),
+    }
+
+
+async def run_level(client, endpoint: str, concurrency: int, total: int, questions: list[str], top_k: int) -> dict:
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = {}
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            payload = {"question": questions[i % len(questions)], "top_k": top_k}
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/qa/{endpoint}", json=payload)
+            except Exception:
+                errors += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            for name, ms in parse_server_timing(response.headers.get("server-timing")).items():
+                if name != "total":
+                    stages.setdefault(name, []).append(ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": percentiles(latencies),
+        "stages_ms": {name: percentiles(values) for name, values in sorted(stages.items())},
+    }
+
+
+def print_result(result: dict):
+    latency = result["latency_ms"]
+    print(
+        f"  {result['endpoint']:<7} c={result['concurrency']:<4} "
+        f"{result['throughput_rps']:>8.1f} req/s  "
+        f"p50 {latency.get('p50', 0):>8.1f}  p95 {latency.get('p95', 0):>8.1f}  "
+        f"p99 {latency.get('p99', 0):>8.1f} ms  errors {result['errors']}"
+    )
+    for name, stage in result["stages_ms"].items():
+        print(f"      {name:<28} p50 {stage['p50']:>8.1f}  p95 {stage['p95']:>8.1f}  p99 {stage['p99']:>8.1f} ms")
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+
+    print(f"\n[COMPARE] vs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for result in results:
+        old = previous.get((result["endpoint"], result["concurrency"]))
+        if old is None:
+            continue
+        deltas = []
+        for key in ("p50", "p95", "p99"):
+            before, after = old["latency_ms"].get(key), result["latency_ms"].get(key)
+            if before:
+                deltas.append(f"{key} {(after - before) / before * 100:+.1f}%")
+        before_rps = old["throughput_rps"]
+        if before_rps:
+            deltas.append(f"throughput {(result['throughput_rps'] - before_rps) / before_rps * 100:+.1f}%")
+        print(f"  {result['endpoint']:<7} c={result['concurrency']:<4} " + "  ".join(deltas))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=parent_dir, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ─────────────────────────────────────────────
+# Main
+# ─────────────────────────────────────────────
+
+async def run_benchmark(args) -> dict:
+    # Environment must be in place before any app module is imported
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="knowscope_bench_chroma_")
+    os.environ["CHROMA_PATH"] = corpus_dir
+    os.environ.setdefault("TRACING_ENABLED", "false")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("MONGO_DB", "knowscope_bench")
+    os.environ.setdefault("JWT_SECRET", "knowscope-bench-secret")
+    os.environ.setdefault("JWT_ALGORITHM", "HS256")
+
+    if args.mongo == "mock":
+        try:
+            import motor.motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mongo mock needs mongomock-motor (pip install mongomock-motor), or use --mongo real")
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    if args.llm_url:
+        # Must be set before gpt_service builds its client on import
+        os.environ["GROQ_BASE_URL"] = args.llm_url
+        os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    import httpx
+    import services.embedding_service as embedding_service
+    import services.gpt_service as gpt_service
+    from app.vector_store import chroma_client, collection
+    from app.main import app
+    from routes.jwt_utils import create_access_token
+
+    dim = EMBEDDING_DIM
+    if args.embedder == "random":
+        embedding_service.model = RandomEncoder(dim)
+    else:
+        dim = embedding_service.model.get_sentence_embedding_dimension()
+    if not args.llm_url:
+        gpt_service.client = FakeGroq(args.llm_latency_ms, args.llm_jitter_ms)
+
+    try:
+        max_batch = min(5000, chroma_client.get_max_batch_size())
+    except AttributeError:
+        max_batch = 5000
+
+    print(f"[CORPUS] {args.chunks} chunks (dim {dim}) in {corpus_dir}")
+    insert_seconds = build_corpus(collection, args.chunks, dim, args.seed, max_batch)
+
+    questions = make_questions(max(args.requests, 100), args.seed)
+    results = []
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        # /ask requires a bearer token; one user for the whole run, like a busy session
+        token = create_access_token({"user_id": "bench-user", "email": "bench@example.com", "role": "student"})
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=300) as client:
+            for endpoint in args.endpoints:
+                if args.warmup:
+                    await run_level(client, endpoint, 1, args.warmup, questions, args.top_k)
+                for concurrency in args.concurrency:
+                    print(f"\n[RUN] {endpoint} × {args.requests} requests at concurrency {concurrency}")
+                    result = await run_level(client, endpoint, concurrency, args.requests, questions, args.top_k)
+                    print_result(result)
+                    results.append(result)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "chunks": collection.count() if args.corpus_dir else args.chunks,
+            "embedding_dim": dim,
+            "embedder": args.embedder,
+            "mongo": args.mongo,
+            "top_k": args.top_k,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_url": args.llm_url,
+            "corpus_insert_seconds": round(insert_seconds, 2),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/qa/ask and /api/qa/search on a synthetic corpus")
+    parser.add_argument("--chunks", type=int, default=10_000, help="Synthetic corpus size (10k–1M)")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10, help="Warm-up requests per endpoint (not reported)")
+    parser.add_argument("--endpoints", default="ask,search", help="Comma-separated: ask, search")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="Mean fake Groq latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0, help="Std-dev of fake Groq latency")
+    parser.add_argument("--llm-url", help="Use the real Groq client against this base URL (e.g. fake_llm_service)")
+    parser.add_argument("--embedder", choices=["model", "random"], default="model")
+    parser.add_argument("--mongo", choices=["mock", "real"], default="mock", help="mongomock or MONGO_URI")
+    parser.add_argument("--corpus-dir", help="Keep/reuse the Chroma corpus here instead of a temp dir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON results path (default: bench_results/rag_<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    for endpoint in args.endpoints:
+        if endpoint not in ("ask", "search"):
+            parser.error(f"Unknown endpoint: {endpoint}")
+    if args.chunks < 1:
+        parser.error("--chunks must be positive")
+
+    report = asyncio.run(run_benchmark(args))
+
+    output = args.output or os.path.join(parent_dir, "bench_results", f"rag_{report['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Results written to {output}")
+
+    if args.baseline:
+        compare(report["results"], args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 from sentence_transformers import SentenceTransformer
 import asyncio
+from app.instrumentation import instrument
 
-model = SentenceTransformer("BAAI/bge-small-en-v1.5")
+MODEL_NAME = "BAAI/bge-small-en-v1.5"
 
+model = SentenceTransformer(MODEL_NAME)
 
+
+@instrument("embedding", "encode")
 async def generate_embedding(text: str) -> list[float]:
     loop = asyncio.get_running_loop()
     embedding = await loop.run_in_executor(
@@ -14,3 +18,20 @@ async def generate_embedding(text: str) -> list[float]:
         ).tolist()
     )
     return embedding
+
+
+@instrument("embedding", "encode_batch")
+async def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many texts in a single batched model.encode() pass."""
+    if not texts:
+        return []
+
+    loop = asyncio.get_running_loop()
+    embeddings = await loop.run_in_executor(
+        None,
+        lambda: model.encode(
+            texts,
+            normalize_embeddings=True
+        ).tolist()
+    )
+    return embeddings
@@ -116,14 +116,17 @@ from groq import AsyncGroq
 import os
 from typing import List, Dict, Any
 from dotenv import load_dotenv
+from app.instrumentation import record_llm_tokens
 
 load_dotenv()
 
 # Read API key from environment (.env file)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "").strip()
+# Optional override, e.g. the offline fake_llm_service for load testing
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "").strip() or None
 
 # Initialize async Groq client
-client = AsyncGroq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+client = AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL) if GROQ_API_KEY else None
 
 
 class GPTService:
@@ -205,6 +208,13 @@ ANSWER:"""
                 max_tokens=1000,
             )
 
+            if response.usage is not None:
+                record_llm_tokens(
+                    response.model,
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                )
+
             answer = response.choices[0].message.content
 
             return {
@@ -11,6 +11,7 @@ Students provide ONLY a question. The graph automatically:
 
 from typing import TypedDict, List, Dict, Any
 from langgraph.graph import StateGraph, END
+from app.instrumentation import instrument
 from services.embedding_service import generate_embedding
 from app.vector_store import vector_store
 from services.gpt_service import gpt_service
@@ -34,6 +35,7 @@ class RAGState(TypedDict):
 # Node 1: Embed the student's question
 # ─────────────────────────────────────────────
 
+@instrument("rag", "embed_question")
 async def embed_question(state: RAGState) -> RAGState:
     """Convert the question text into a vector embedding."""
     print(f"🔢 Embedding question: {state['question']}")
@@ -45,6 +47,7 @@ async def embed_question(state: RAGState) -> RAGState:
 # Node 2: Retrieve similar chunks from ALL textbooks
 # ─────────────────────────────────────────────
 
+@instrument("rag", "retrieve_chunks")
 async def retrieve_chunks(state: RAGState) -> RAGState:
     """
     Similarity search across ALL stored textbooks — no class/subject filter.
@@ -64,6 +67,7 @@ async def retrieve_chunks(state: RAGState) -> RAGState:
 # Node 3: Generate answer from retrieved context
 # ─────────────────────────────────────────────
 
+@instrument("rag", "generate_answer")
 async def generate_answer(state: RAGState) -> RAGState:
     """Generate an exam-style answer from retrieved textbook chunks."""
     chunks = state["chunks"]
@@ -0,0 +1,33 @@
+# app/config.py
+
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    # Latency before the first token: fixed, uniform (± jitter), normal
+    # (std-dev = jitter) or lognormal (median = LATENCY_MS, long tail)
+    LATENCY_DISTRIBUTION: Literal["fixed", "uniform", "normal", "lognormal"] = "lognormal"
+    LATENCY_MS: float = 600.0
+    LATENCY_JITTER_MS: float = 250.0
+    # Generation time added per completion token (also paces streaming)
+    MS_PER_COMPLETION_TOKEN: float = 2.0
+    STREAM_CHUNK_TOKENS: int = 4
+
+    # Rolling one-minute limits like Groq's; 0 disables a limit
+    TOKENS_PER_MINUTE: int = 12000
+    REQUESTS_PER_MINUTE: int = 30
+
+    # Fraction of requests answered with a 503 (retry testing)
+    ERROR_RATE: float = 0.0
+
+    # Fixed seed for reproducible content and latencies
+    SEED: int | None = None
+
+    class Config:
+        env_prefix = "FAKE_LLM_"
+        env_file = ".env"
+
+
+settings = Settings()
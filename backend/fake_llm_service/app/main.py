@@ -0,0 +1,227 @@
+# app/main.py
+"""
+Offline Groq / OpenAI-compatible chat-completions server for load and
+rate-limit testing. Point a service at it with GROQ_BASE_URL=http://host:port.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.config import settings
+from app.prompts import ResponseFactory, detect_family
+from app.rate_limiter import RateLimiter
+
+
+app = FastAPI(title="Knowscope Fake LLM Service")
+
+rng = random.Random(settings.SEED)
+responses = ResponseFactory(rng)
+limiter = RateLimiter(settings.REQUESTS_PER_MINUTE, settings.TOKENS_PER_MINUTE)
+stats: Counter = Counter()
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, close enough for rate limiting."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def sample_latency(override_ms: float | None = None) -> float:
+    """Seconds before the first token."""
+    if override_ms is not None:
+        return max(override_ms, 0.0) / 1000
+
+    mean, jitter = settings.LATENCY_MS, settings.LATENCY_JITTER_MS
+    distribution = settings.LATENCY_DISTRIBUTION
+    if distribution == "fixed":
+        ms = mean
+    elif distribution == "uniform":
+        ms = rng.uniform(mean - jitter, mean + jitter)
+    elif distribution == "normal":
+        ms = rng.gauss(mean, jitter)
+    else:
+        # Median = mean setting; jitter/mean sets how heavy the tail is
+        ms = mean * math.exp(rng.gauss(0, jitter / mean if mean else 0))
+    return max(ms, 0.0) / 1000
+
+
+def _error(status: int, message: str, error_type: str, code: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": error_type, "code": code}},
+        headers=headers,
+    )
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return _error(400, "Request body must be valid JSON", "invalid_request_error", "invalid_request")
+    if not isinstance(body, dict):
+        return _error(400, "Request body must be a JSON object", "invalid_request_error", "invalid_request")
+
+    messages = body.get("messages") or []
+    if not isinstance(messages, list) or not all(isinstance(m, dict) for m in messages):
+        return _error(400, "'messages' must be a list of message objects", "invalid_request_error", "invalid_request")
+    if not messages:
+        return _error(400, "'messages' is required", "invalid_request_error", "invalid_request")
+
+    override = request.headers.get("x-fake-latency-ms")
+    try:
+        override_ms = float(override) if override else None
+    except ValueError:
+        return _error(400, "x-fake-latency-ms must be a number", "invalid_request_error", "invalid_request")
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+    if max_tokens is not None and (not isinstance(max_tokens, int) or isinstance(max_tokens, bool)):
+        return _error(400, "'max_tokens' must be an integer", "invalid_request_error", "invalid_request")
+
+    model = body.get("model", "fake-llm")
+    prompt = _prompt_text(messages)
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    family = detect_family(prompt)
+    stats["requests"] += 1
+    stats[f"family.{family}"] += 1
+
+    if settings.ERROR_RATE and rng.random() < settings.ERROR_RATE:
+        stats["injected_errors"] += 1
+        return _error(503, "Service unavailable (injected by fake LLM)", "internal_server_error", "service_unavailable")
+
+    content = responses.build(family, prompt, json_mode)
+    prompt_tokens = estimate_tokens(prompt)
+    completion_tokens = estimate_tokens(content)
+    if max_tokens:
+        completion_tokens = min(completion_tokens, max_tokens)
+
+    error, headers = limiter.acquire(prompt_tokens + completion_tokens)
+    if error:
+        stats["rate_limited"] += 1
+        return _error(429, error["message"], error["type"], error["code"], headers)
+
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+
+    first_token = sample_latency(override_ms)
+    per_token = settings.MS_PER_COMPLETION_TOKEN / 1000
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "queue_time": 0.0,
+        "prompt_time": 0.0,
+        "completion_time": round(completion_tokens * per_token, 4),
+        "total_time": round(first_token + completion_tokens * per_token, 4),
+    }
+    headers["x-groq-prompt-family"] = family
+
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream(completion_id, created, model, content, usage, first_token, per_token,
+                    (body.get("stream_options") or {}).get("include_usage", False)),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    await asyncio.sleep(first_token + completion_tokens * per_token)
+    return JSONResponse(
+        content={
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "logprobs": None,
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+            "system_fingerprint": "fp_fake",
+            "x_groq": {"id": f"req_{completion_id}"},
+        },
+        headers=headers,
+    )
+
+
+async def _stream(completion_id: str, created: int, model: str, content: str,
+                  usage: dict, first_token: float, per_token: float, include_usage: bool):
+    def chunk(delta: dict, finish_reason: str | None = None, **extra) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+            **extra,
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    await asyncio.sleep(first_token)
+    yield chunk({"role": "assistant", "content": ""})
+
+    # ~4 characters per token, STREAM_CHUNK_TOKENS tokens per event
+    step = 4 * max(settings.STREAM_CHUNK_TOKENS, 1)
+    for start in range(0, len(content), step):
+        await asyncio.sleep(settings.STREAM_CHUNK_TOKENS * per_token)
+        yield chunk({"content": content[start:start + step]})
+
+    # Groq reports usage on the final chunk under x_groq
+    yield chunk({}, "stop", x_groq={"id": f"req_{completion_id}", "usage": usage})
+    if include_usage:
+        yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/openai/v1/models")
+@app.get("/v1/models")
+async def list_models():
+    return {
+        "object": "list",
+        "data": [{"id": "llama-3.3-70b-versatile", "object": "model", "owned_by": "fake-llm", "active": True}],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Request/family/429 counters and the current rate-limit window."""
+    return {
+        "counters": dict(stats),
+        "rate_limit": limiter.headers(time.monotonic()),
+        "config": settings.model_dump(),
+    }
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    global limiter
+
+    stats.clear()
+    limiter = RateLimiter(settings.REQUESTS_PER_MINUTE, settings.TOKENS_PER_MINUTE)
+    return {"status": "reset"}
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
@@ -0,0 +1,153 @@
+# app/prompts.py
+"""
+Prompt-family detection and schema-valid fake completions.
+
+Families mirror the prompts of the real services:
+  questions            question_node          {"questions": [...]}
+  mcqs                 batch_mcq_node         {"mcqs": [...]}
+  answer_distractors   distractor_node        {"answer", "distractors"}
+  distractors          distractor_node        {"distractors": [...]}
+  answer               retrieval fallback     {"answer"}
+  feedback             feedback_node          {"summary"}
+  recommendations      evaluation_nodes       {"recommendations"}
+  rag_answer           content gpt_service    plain text
+Anything else gets {"answer"} in JSON mode and plain text otherwise.
+"""
+
+import json
+import random
+import re
+
+WORDS = (
+    "energy force cell enzyme acid base salt metal carbon oxygen current circuit lens "
+    "mirror atom molecule element compound reaction pressure velocity gravity tissue "
+    "nucleus membrane polynomial triangle ratio probability climate soil resource "
+    "democracy constitution rights economy trade river population industry"
+).split()
+
+QUESTION_TEMPLATES = [
+    "What is the role of {a} in {b}?",
+    "How does {a} affect {b}?",
+    "Which property of {a} explains {b}?",
+    "Why is {a} important for {b}?",
+    "What happens to {a} when {b} increases?",
+    "Which statement best describes {a} in relation to {b}?",
+]
+
+
+def _match(pattern: str, text: str, default: str | None = None) -> str | None:
+    found = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+    return found.group(1).strip() if found else default
+
+
+def _count(prompt: str, default: int) -> int:
+    value = _match(r"Generate (?:exactly )?(\d+)", prompt)
+    return min(int(value), 50) if value else default
+
+
+def detect_family(prompt: str) -> str:
+    if '"mcqs"' in prompt:
+        return "mcqs"
+    if '"questions"' in prompt:
+        return "questions"
+    if '"distractors"' in prompt:
+        return "answer_distractors" if '"answer"' in prompt else "distractors"
+    if '"summary"' in prompt:
+        return "feedback"
+    if '"recommendations"' in prompt:
+        return "recommendations"
+    if '"answer"' in prompt:
+        return "answer"
+    if "STUDENT QUESTION:" in prompt:
+        return "rag_answer"
+    return "generic"
+
+
+class ResponseFactory:
+    """Builds the completion text for a prompt; `rng` makes runs reproducible."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def _words(self, n: int) -> list[str]:
+        return self.rng.sample(WORDS, n)
+
+    def _short_answer(self) -> str:
+        a, b = self._words(2)
+        return f"{a.capitalize()} transfers {b}"
+
+    def _options(self, correct: str) -> list[str]:
+        options: list[str] = []
+        while len(options) < 3:
+            option = self._short_answer()
+            if option != correct and option not in options:
+                options.append(option)
+        return options
+
+    def _question(self, subject: str, topic: str) -> str:
+        a, b = self._words(2)
+        text = self.rng.choice(QUESTION_TEMPLATES).format(a=a, b=b)
+        # A random tag keeps generated batches from being near-duplicates
+        return f"{text[:-1]} in {topic or subject} ({self.rng.randrange(10_000):04d})?"
+
+    def build(self, family: str, prompt: str, json_mode: bool) -> str:
+        subject = _match(r"^\s*Subject:\s*(.+)$", prompt) or _match(r"in '([^']+)'", prompt) or "General"
+        topic = _match(r"^\s*Topic \(focus strictly on this\):\s*(.+)$", prompt) or _match(r"topic '([^']+)'", prompt) or ""
+        difficulty = _match(r"^\s*Difficulty:\s*(.+)$", prompt, "medium")
+
+        if family == "questions":
+            return json.dumps({"questions": [
+                {
+                    "question": self._question(subject, topic),
+                    "difficulty": difficulty,
+                    "topic": topic or subject,
+                    "type": "mcq",
+                    "concept_tags": self._words(self.rng.randint(2, 4)),
+                }
+                for _ in range(_count(prompt, 5))
+            ]})
+
+        if family == "mcqs":
+            mcqs = []
+            for _ in range(_count(prompt, 5)):
+                correct = self._short_answer()
+                mcqs.append({
+                    "question": self._question(subject, topic),
+                    "correct_answer": correct,
+                    "distractors": self._options(correct),
+                    "topic": topic or subject,
+                    "concept_tags": self._words(self.rng.randint(2, 4)),
+                })
+            return json.dumps({"mcqs": mcqs})
+
+        if family == "answer_distractors":
+            correct = self._short_answer()
+            return json.dumps({"answer": correct, "distractors": self._options(correct)})
+
+        if family == "distractors":
+            correct = _match(r"Correct Answer[^\n]*:\s*\n(.+)$", prompt, "")
+            return json.dumps({"distractors": self._options(correct)})
+
+        if family == "feedback":
+            score = _match(r"Overall Score:\s*([\d.]+)%", prompt, "0")
+            return json.dumps({"summary": (
+                f"You scored {score}% in {subject}. Review the questions you missed, "
+                f"especially those on {' and '.join(self._words(2))}."
+            )})
+
+        if family == "recommendations":
+            bullets = "\n".join(
+                f"- Revise {a} and practise problems linking it to {b}."
+                for a, b in (self._words(2) for _ in range(_count(prompt, 3)))
+            )
+            return json.dumps({"recommendations": bullets})
+
+        if family == "answer" or (family == "generic" and json_mode):
+            return json.dumps({"answer": self._short_answer()})
+
+        question = _match(r"STUDENT QUESTION:\s*(.+)$", prompt, "the question")
+        sentences = [
+            f"{a.capitalize()} and {b} are closely related in this chapter."
+            for a, b in (self._words(2) for _ in range(self.rng.randint(3, 6)))
+        ]
+        return f"Answer to: {question}\n\n" + " ".join(sentences)
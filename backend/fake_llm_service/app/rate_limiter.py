@@ -0,0 +1,108 @@
+# app/rate_limiter.py
+
+import math
+import time
+from collections import deque
+
+
+def format_reset(seconds: float) -> str:
+    """Groq-style reset duration: "7.66s", "2m59.56s"."""
+    seconds = max(seconds, 0.0)
+    minutes, rest = divmod(seconds, 60)
+    return f"{int(minutes)}m{rest:.2f}s" if minutes else f"{rest:.2f}s"
+
+
+class MinuteWindow:
+    """Amount consumed over the last 60 seconds (0 limit = unlimited)."""
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._events: deque[tuple[float, int]] = deque()
+        self._used = 0
+
+    def _prune(self, now: float):
+        while self._events and now - self._events[0][0] >= self.WINDOW_SECONDS:
+            _, amount = self._events.popleft()
+            self._used -= amount
+
+    def used(self, now: float) -> int:
+        self._prune(now)
+        return self._used
+
+    def remaining(self, now: float) -> int:
+        return max(self.limit - self.used(now), 0)
+
+    def wait_for(self, amount: int, now: float) -> float:
+        """Seconds until `amount` fits in the window (0 if it fits now)."""
+        if not self.limit or self.used(now) + amount <= self.limit:
+            return 0.0
+
+        freed = self.limit - self._used
+        for timestamp, consumed in self._events:
+            freed += consumed
+            if freed >= amount:
+                return timestamp + self.WINDOW_SECONDS - now
+        # Larger than the whole limit: can never succeed
+        return self.WINDOW_SECONDS
+
+    def reset_after(self, now: float) -> float:
+        """Seconds until the window is completely empty again."""
+        self._prune(now)
+        return self._events[-1][0] + self.WINDOW_SECONDS - now if self._events else 0.0
+
+    def consume(self, amount: int, now: float):
+        self._events.append((now, amount))
+        self._used += amount
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits with Groq's headers."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = MinuteWindow(requests_per_minute)
+        self.tokens = MinuteWindow(tokens_per_minute)
+
+    def headers(self, now: float) -> dict[str, str]:
+        headers = {}
+        if self.requests.limit:
+            headers["x-ratelimit-limit-requests"] = str(self.requests.limit)
+            headers["x-ratelimit-remaining-requests"] = str(self.requests.remaining(now))
+            headers["x-ratelimit-reset-requests"] = format_reset(self.requests.reset_after(now))
+        if self.tokens.limit:
+            headers["x-ratelimit-limit-tokens"] = str(self.tokens.limit)
+            headers["x-ratelimit-remaining-tokens"] = str(self.tokens.remaining(now))
+            headers["x-ratelimit-reset-tokens"] = format_reset(self.tokens.reset_after(now))
+        return headers
+
+    def acquire(self, tokens: int) -> tuple[dict | None, dict[str, str]]:
+        """
+        Admit a request of `tokens` tokens. Returns (None, headers) when
+        admitted, or (error, headers incl. retry-after) when rate limited.
+        """
+        now = time.monotonic()
+        request_wait = self.requests.wait_for(1, now)
+        token_wait = self.tokens.wait_for(tokens, now)
+
+        if request_wait or token_wait:
+            headers = self.headers(now)
+            wait = max(request_wait, token_wait)
+            headers["retry-after"] = str(max(1, math.ceil(wait)))
+            if token_wait >= request_wait:
+                kind, limit, used, requested = "tokens per minute (TPM)", self.tokens.limit, self.tokens.used(now), tokens
+            else:
+                kind, limit, used, requested = "requests per minute (RPM)", self.requests.limit, self.requests.used(now), 1
+            error = {
+                "message": (
+                    f"Rate limit reached on {kind}: Limit {limit}, Used {used}, "
+                    f"Requested {requested}. Please try again in {wait:.2f}s."
+                ),
+                "type": "tokens" if "TPM" in kind else "requests",
+                "code": "rate_limit_exceeded",
+            }
+            return error, headers
+
+        self.requests.consume(1, now)
+        self.tokens.consume(tokens, now)
+        return None, self.headers(now)
@@ -1,3 +1,6 @@
+from app.utils import student_thumbnail
+
+
 def serialize_student(student) -> dict:
     return {
         "id": str(student["_id"]),
@@ -6,4 +9,5 @@ def serialize_student(student) -> dict:
         "medium": student.get("medium"),
         "learningstyle": student.get("learningstyle"),
         "image": student.get("image"), 
+        "thumbnail": student_thumbnail(student),
     }
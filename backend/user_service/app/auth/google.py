@@ -1,25 +1,118 @@
 import os
-from google.oauth2 import id_token
-from google.auth.transport import requests
+import re
+import time
+import asyncio
+
+import requests as http_requests
+from google.auth import jwt as google_jwt
 from fastapi import HTTPException, status
 
-def verify_google_token(token: str) -> dict:
+# Google's PEM signing certificates (what id_token.verify_oauth2_token uses);
+# GOOGLE_CERTS_URL points at a stand-in such as scripts/fake_google_certs.py
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Used when the response has no Cache-Control max-age
+DEFAULT_CERTS_MAX_AGE = 300
+# Refresh in the background once this close to expiry
+CERTS_REFRESH_AHEAD = 60
+# An unknown key id forces a refetch at most this often (keys rotated early)
+CERTS_MIN_REFETCH_INTERVAL = 30
+CLOCK_SKEW_SECONDS = 10
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertStore:
+    """
+    Google's signing certificates, cached for the Cache-Control max-age of
+    the response. Near expiry the certs are refreshed by a background task
+    while requests keep using the cached ones, so logins only ever wait on
+    Google for the very first fetch (or after a failed refresh).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._session = http_requests.Session()
+        self._certs: dict[str, str] | None = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+        self.fetches = 0
+
+    def _fetch(self) -> tuple[dict, float]:
+        response = self._session.get(self.url, timeout=10)
+        response.raise_for_status()
+        found = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        max_age = int(found.group(1)) if found else DEFAULT_CERTS_MAX_AGE
+        return response.json(), max_age
+
+    async def _load(self):
+        # requests is blocking; keep it off the event loop
+        certs, max_age = await asyncio.to_thread(self._fetch)
+        now = time.monotonic()
+        self._certs, self._fetched_at, self._expires_at = certs, now, now + max_age
+        # Short max-ages still get at least half their lifetime before a refresh
+        self._refresh_at = now + max(max_age - CERTS_REFRESH_AHEAD, max_age / 2)
+        self.fetches += 1
+
+    async def refresh(self):
+        async with self._lock:
+            await self._load()
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Keep serving the cached certs; the next request retries
+            print(f"⚠️ Google certs refresh failed: {e}")
+
+    async def get(self) -> dict[str, str]:
+        now = time.monotonic()
+        if self._certs is None or now >= self._expires_at:
+            # Concurrent logins share one fetch: whoever gets the lock second
+            # finds the certs already fresh
+            async with self._lock:
+                if self._certs is None or time.monotonic() >= self._expires_at:
+                    await self._load()
+        elif now >= self._refresh_at and (
+            self._refresh_task is None or self._refresh_task.done()
+        ):
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+        return self._certs
+
+    async def get_for_key(self, key_id: str | None) -> dict[str, str]:
+        """Certs that include `key_id`, refetching once if Google rotated keys early."""
+        certs = await self.get()
+        if key_id and key_id not in certs:
+            async with self._lock:
+                if key_id not in self._certs and time.monotonic() - self._fetched_at >= CERTS_MIN_REFETCH_INTERVAL:
+                    await self._load()
+            certs = self._certs
+        return certs
+
+
+google_certs = GoogleCertStore(GOOGLE_CERTS_URL)
+
+
+def _verify(token: str, certs: dict[str, str], client_id: str) -> dict:
+    # RSA signature check is CPU work; runs in a worker thread
+    return google_jwt.decode(token, certs=certs, audience=client_id, clock_skew_in_seconds=CLOCK_SKEW_SECONDS)
+
+
+async def verify_google_token(token: str) -> dict:
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
     if not GOOGLE_CLIENT_ID:
         raise RuntimeError("GOOGLE_CLIENT_ID is not set")
 
     try:
-        idinfo = id_token.verify_oauth2_token(
-            token,
-            requests.Request(),
-            GOOGLE_CLIENT_ID
-        )
+        key_id = google_jwt.decode_header(token).get("kid")
+        certs = await google_certs.get_for_key(key_id)
+        idinfo = await asyncio.to_thread(_verify, token, certs, GOOGLE_CLIENT_ID)
 
-        if idinfo["iss"] not in (
-            "accounts.google.com",
-            "https://accounts.google.com",
-        ):
+        if idinfo["iss"] not in GOOGLE_ISSUERS:
             raise ValueError("Wrong issuer")
 
         return {
@@ -16,5 +16,7 @@ def serialize_user(user: dict) -> dict:
         "id": str(user["_id"]),
         "email": user["email"],
         "name": user.get("name"),
-        "picture": user.get("picture")
+        "picture": user.get("picture"),
+        # Users created before roles existed are students
+        "role": user.get("role", "student"),
     } 
\ No newline at end of file
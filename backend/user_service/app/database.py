@@ -14,3 +14,6 @@ db = client[DB_NAME]
 # example collection
 users_collection = db["users"]
 student_collection = db["students"] 
+# Revoked JWTs, shared with the other services (TTL-pruned on expires_at)
+blacklist_collection = db["token_blacklist"]
+
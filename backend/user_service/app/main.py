@@ -1,15 +1,30 @@
 from dotenv import load_dotenv
 load_dotenv()
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from app.auth.google import google_certs
+from app.database import blacklist_collection
+from app.utils import CachedStaticFiles
 from app.routes.auth import auth_router
 from app.routes.students import student_router
+from app.routes.token_revocation import start_revocation_sync, stop_revocation_sync
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Revoked-token Bloom filter, reloaded from the blacklist in the background
+    await start_revocation_sync(blacklist_collection)
+    # Fetch Google's signing certs before the first login needs them
+    try:
+        await google_certs.get()
+    except Exception as e:
+        print(f"⚠️ Google certs prefetch failed: {e}")
+    yield
+    await stop_revocation_sync()
 
 
-app = FastAPI(title="Knowscope User Service")
+app = FastAPI(title="Knowscope User Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +41,8 @@ app.include_router(auth_router)
 app.include_router(student_router)
 
 
-app.mount("/uploads", StaticFiles(directory="app/uploads"), name="uploads")
+# Uploaded images never change once written: serve them with immutable caching
+app.mount("/uploads", CachedStaticFiles(directory="app/uploads"), name="uploads")
 
 @app.get("/")
 async def root():
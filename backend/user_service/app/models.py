@@ -6,5 +6,6 @@ def user_document(data: dict) -> dict:
         "email": data["email"],
         "name": data.get("name"),
         "picture": data.get("picture"),
+        "role": data.get("role", "student"),
         "created_at": datetime.utcnow()
     }
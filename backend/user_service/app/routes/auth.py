@@ -1,5 +1,5 @@
 import os
-from datetime import datetime, timedelta
+from typing import Optional
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, Body, Depends, Header, HTTPException
@@ -8,9 +8,10 @@ from jose import JWTError, ExpiredSignatureError, jwt
 
 from app.auth.google import verify_google_token
 from app.crud import create_user, get_user_by_google_id, serialize_user
-from app.database import blacklist_collection, users_collection
+from app.database import users_collection
 from app.schemas import AuthResponse, GoogleAuthRequest
 from .jwt_handler import create_access_token, get_current_user
+from .jwt_utils import blacklist_token
 
 load_dotenv()
 security = HTTPBearer()
@@ -20,7 +21,9 @@ async def get_user_from_header(authorization: str = Header(...)):
     print("Authorization header received:", authorization)
     token = authorization.split(" ")[1]
     try:
-        return get_current_user(token)
+        return await get_current_user(token)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -34,7 +37,7 @@ auth_router = APIRouter(prefix="/auth", tags=["auth"])
 @auth_router.post("/google/auth", response_model=AuthResponse)
 async def google_auth(payload: GoogleAuthRequest):
     try:
-        user_data = verify_google_token(payload.token)
+        user_data = await verify_google_token(payload.token)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid Google token")
 
@@ -57,31 +60,26 @@ async def google_auth(payload: GoogleAuthRequest):
 
 @auth_router.post("/logout")
 async def logout(
-    refresh_token: str = Body(...),
+    refresh_token: Optional[str] = Body(None),
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     access_token = credentials.credentials
     try:
         access_payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
-        if access_payload.get("type") != "access":
+        # Access tokens from /google/auth carry no "type" claim
+        if access_payload.get("type", "access") != "access":
             raise HTTPException(status_code=400, detail="Invalid access token")
-        refresh_payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-        if refresh_payload.get("type") != "refresh":
-            raise HTTPException(status_code=400, detail="Invalid refresh token")
-
-        await blacklist_collection.insert_one(
-            {
-                "token": access_token,
-                "expires_at": datetime.utcfromtimestamp(access_payload["exp"]),
-            }
-        )
-
-        await blacklist_collection.insert_one(
-            {
-                "token": refresh_token,
-                "expires_at": datetime.utcfromtimestamp(refresh_payload["exp"]),
-            }
-        )
+        refresh_payload = None
+        if refresh_token:
+            refresh_payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+            if refresh_payload.get("type") != "refresh":
+                raise HTTPException(status_code=400, detail="Invalid refresh token")
+
+        # Rejected here at once, and by the other services within
+        # REVOCATION_REFRESH_SECONDS (their Bloom filters reload from Mongo)
+        await blacklist_token(access_token, access_payload["exp"])
+        if refresh_payload:
+            await blacklist_token(refresh_token, refresh_payload["exp"])
         return {"message": "Logged out successfully"}
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 from fastapi import HTTPException
-from jose import JWTError, ExpiredSignatureError, JWSError, jwt
+from jose import JWTError, jwt
+
+from .jwt_utils import decode_access_token, is_token_revoked
 
 load_dotenv()
 
@@ -19,20 +21,22 @@ def create_access_token(data: dict, expires_minutes: int = 10080):
     return encoded_jwt
 
 
-def get_current_user(token: str):
+async def get_current_user(token: str):
+    # Verified tokens are cached until exp and the blacklist is checked
+    # through a Bloom filter (see jwt_utils / token_revocation), so the
+    # common case is a couple of dictionary lookups with no I/O
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
-        role = payload.get("role")
-        if not user_id or not role:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        return {
-            "user_id": user_id,
-            "role": role,
-            "email": payload.get("email"),
-        }
-    except ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except (JWTError, JWSError):
-        raise HTTPException(status_code=401, detail="Invalid token")
-
+        claims = decode_access_token(token)
+    except JWTError as e:
+        detail = str(e) if str(e) in ("Token expired", "Token revoked") else "Invalid token"
+        raise HTTPException(status_code=401, detail=detail)
+    if not claims["role"]:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    try:
+        revoked = await is_token_revoked(token)
+    except Exception:
+        # Fail closed: a possibly revoked token is not let through
+        raise HTTPException(status_code=503, detail="Token revocation check unavailable")
+    if revoked:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return claims
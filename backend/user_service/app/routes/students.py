@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, Form, Header, HTTPException, UploadFile
 
 from app.Utility.utils import serialize_student
 from app.database import student_collection
-from app.utils import save_image
+from app.utils import save_image, student_thumbnail, thumbnail_name
 from .jwt_handler import get_current_user
 
 
@@ -17,7 +17,9 @@ async def get_user_from_header(authorization: str = Header(...)):
     print("Authorization header received:", authorization)
     token = authorization.split(" ")[1] 
     try:
-        return get_current_user(token)
+        return await get_current_user(token)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
     
@@ -46,6 +48,7 @@ async def create_student(
         "class_number": class_number,
         "medium": medium,
         "image": image_name,
+        "thumbnail": thumbnail_name(image_name),
         "created_by": created_by,
         "learningstyle":learningstyle
     }
@@ -66,6 +69,7 @@ async def get_my_profile(current_user: dict = Depends(get_user_from_header)):
         "class_number": student.get("class_number"),
         "medium": student.get("medium"),
         "image": student.get("image"),
+        "thumbnail": student_thumbnail(student),
         "created_by": student.get("created_by"),
         "learningstyle": student.get("learningstyle", None)
     }
@@ -91,6 +95,7 @@ async def get_students():
             "class_number": s["class_number"],
             "medium": s["medium"],
             "image": s.get("image"),
+            "thumbnail": student_thumbnail(s),
             "created_by":s['created_by'],
             "learningstyle": s.get("learningstyle", None) 
         })
@@ -116,6 +121,7 @@ async def get_student(student_id: str):
         "class_number": student["class_number"],
         "medium": student["medium"],
         "image": student.get("image"),
+        "thumbnail": student_thumbnail(student),
         "created_by":student.get('created_by'),
         "learningstyle":student.get("learningstyle",None)
     }
@@ -0,0 +1,160 @@
+# shared/token_revocation.py
+"""
+Revoked-token blacklist shared by all services through one Mongo collection.
+
+Each service keeps a Bloom filter of the blacklisted token hashes, rebuilt
+from the collection every REVOCATION_REFRESH_SECONDS. A token that misses the
+filter is certainly not blacklisted (the common case, no I/O); only a filter
+hit costs a Mongo lookup. A TTL index on expires_at lets Mongo prune entries
+once the token would have expired anyway.
+"""
+
+import os
+import math
+import asyncio
+from datetime import datetime, timezone
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.01"))
+
+
+class BloomFilter:
+    """Bloom filter over sha256 hex digests (already uniform, so no rehashing)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing (Kirsch–Mitzenmacher) from two 64-bit slices of the digest
+        h1 = int(key[:16], 16)
+        h2 = int(key[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+_collection = None
+_bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+# Filter hits that Mongo said are not blacklisted; reset with every rebuild
+_false_positives: set[str] = set()
+_refresh_task: asyncio.Task | None = None
+_stats = {"bloom_misses": 0, "bloom_hits": 0, "revoked": 0, "false_positives": 0, "refreshes": 0}
+
+
+def _timestamp(value: datetime) -> float:
+    # Motor returns naive UTC datetimes unless tz_aware is set
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+async def ensure_indexes(collection):
+    await collection.create_index("expires_at", expireAfterSeconds=0)
+    # sparse: older entries stored the raw token and have no token_hash
+    await collection.create_index("token_hash", unique=True, sparse=True)
+
+
+async def refresh_revocations():
+    """Rebuild the Bloom filter from the unexpired blacklist entries."""
+    global _bloom
+
+    cursor = _collection.find(
+        {"token_hash": {"$exists": True}, "expires_at": {"$gt": datetime.utcnow()}},
+        {"token_hash": 1, "_id": 0},
+    )
+    keys = [doc["token_hash"] async for doc in cursor]
+
+    bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, 2 * len(keys)), REVOCATION_BLOOM_ERROR_RATE)
+    for key in keys:
+        bloom.add(key)
+    _bloom = bloom
+    _false_positives.clear()
+    _stats["refreshes"] += 1
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+        try:
+            await refresh_revocations()
+        except Exception as e:
+            print(f"⚠️ Token blacklist refresh failed: {e}")
+
+
+async def start_revocation_sync(collection):
+    """Call once at startup with the blacklist collection."""
+    global _collection, _refresh_task
+
+    _collection = collection
+    try:
+        await ensure_indexes(collection)
+        await refresh_revocations()
+    except Exception as e:
+        # Keep serving; the refresh loop retries
+        print(f"⚠️ Token blacklist load failed: {e}")
+    _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_revocation_sync():
+    global _refresh_task
+
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        _refresh_task = None
+
+
+async def lookup(key: str) -> float | None:
+    """
+    Expiry timestamp if the token hash is blacklisted, else None.
+    No I/O unless the Bloom filter has the key.
+    """
+    if key not in _bloom:
+        _stats["bloom_misses"] += 1
+        return None
+    _stats["bloom_hits"] += 1
+    if key in _false_positives or _collection is None:
+        return None
+
+    doc = await _collection.find_one(
+        {"token_hash": key, "expires_at": {"$gt": datetime.utcnow()}},
+        {"expires_at": 1},
+    )
+    if doc is None:
+        _false_positives.add(key)
+        _stats["false_positives"] += 1
+        return None
+    _stats["revoked"] += 1
+    return _timestamp(doc["expires_at"])
+
+
+async def blacklist(key: str, expires_at: float):
+    """Persist a revoked token hash until `expires_at` and add it to this filter."""
+    _bloom.add(key)
+    _false_positives.discard(key)
+    await _collection.update_one(
+        {"token_hash": key},
+        {"$setOnInsert": {
+            "token_hash": key,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None),
+            "revoked_at": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+
+
+def revocation_stats() -> dict:
+    return {
+        "bloom_entries": _bloom.count,
+        "bloom_bits": _bloom.size,
+        "bloom_hashes": _bloom.hashes,
+        **_stats,
+    }
@@ -1,19 +1,115 @@
 import os
+import asyncio
+import hashlib
 from uuid import uuid4
-from fastapi import UploadFile
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from fastapi.staticfiles import StaticFiles
+from PIL import Image, ImageOps
 
 UPLOAD_DIR = "app/uploads"
+THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, "thumbs")
+# Longest side in pixels per variant; "sm" is what profile lists show
+THUMBNAIL_SIZES = {"sm": 128, "md": 384}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(15 * 1024 * 1024)))
+
+# Pillow releases the GIL while decoding/resizing, so threads are enough
+_thumbnail_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("THUMBNAIL_WORKERS", "2")),
+    thread_name_prefix="thumbnail",
+)
+
+
+def _make_thumbnails(path: str, stem: str):
+    """Write a WebP per THUMBNAIL_SIZES entry; raises if `path` is not an image."""
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    with Image.open(path) as img:
+        # JPEG: let the decoder downscale while reading a multi-MB phone photo
+        img.draft("RGB", (max(THUMBNAIL_SIZES.values()),) * 2)
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        for variant, size in THUMBNAIL_SIZES.items():
+            thumb = img.copy()
+            thumb.thumbnail((size, size))
+            thumb.save(os.path.join(THUMBNAIL_DIR, f"{stem}_{variant}.webp"), "WEBP", quality=80)
+
+
+async def make_thumbnails(path: str):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_thumbnail_pool, _make_thumbnails, path, stem)
+
+
+def thumbnail_name(image: str | None, variant: str = "sm") -> str | None:
+    """Path of an image's thumbnail under /uploads (save_image writes every variant)."""
+    if not image:
+        return None
+    return f"thumbs/{os.path.splitext(image)[0]}_{variant}.webp"
+
+
+def student_thumbnail(student: dict) -> str | None:
+    """Thumbnail stored on a student at upload; the image itself for older profiles."""
+    return student.get("thumbnail") or student.get("image")
+
 
 async def save_image(image: UploadFile) -> str:
-    if not os.path.exists(UPLOAD_DIR):
-        os.makedirs(UPLOAD_DIR)
+    """
+    Stream the upload to disk and store it under its SHA-256, so identical
+    images share one file (and one set of thumbnails).
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    ext = image.filename.split(".")[-1].lower()
+    tmp_path = os.path.join(UPLOAD_DIR, f".{uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    raise HTTPException(status_code=413, detail="Image too large")
+                digest.update(chunk)
+                await out.write(chunk)
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        filepath = os.path.join(UPLOAD_DIR, filename)
+        if await anyio.Path(filepath).exists():
+            # Already stored (and thumbnailed) for an earlier upload
+            return filename
+
+        # Thumbnails are named after the temp file until it is renamed
+        tmp_stem = os.path.splitext(os.path.basename(tmp_path))[0]
+        try:
+            await make_thumbnails(tmp_path)
+        except Exception:
+            # Not an image, a decompression bomb, or a decoder error: the upload is bad
+            for variant in THUMBNAIL_SIZES:
+                await anyio.Path(THUMBNAIL_DIR, f"{tmp_stem}_{variant}.webp").unlink(missing_ok=True)
+            raise HTTPException(status_code=400, detail="Uploaded file is not a valid image")
+        for variant in THUMBNAIL_SIZES:
+            await anyio.Path(THUMBNAIL_DIR, f"{tmp_stem}_{variant}.webp").replace(
+                os.path.join(THUMBNAIL_DIR, f"{digest.hexdigest()}_{variant}.webp")
+            )
+        await anyio.Path(tmp_path).replace(filepath)
+        return filename
+
+    finally:
+        await anyio.Path(tmp_path).unlink(missing_ok=True)
 
-    ext = image.filename.split(".")[-1]
-    filename = f"{uuid4()}.{ext}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
 
-    content = await image.read()  # async read
-    with open(filepath, "wb") as f:
-        f.write(content)
+class CachedStaticFiles(StaticFiles):
+    """
+    /uploads with long-lived caching: files there are never rewritten
+    (content-addressed or uuid names), so browsers may keep them forever.
+    """
 
-    return filename
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
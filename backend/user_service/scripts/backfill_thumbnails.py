@@ -0,0 +1,65 @@
+"""
+Thumbnail backfill
+==================
+Run from the user_service directory:
+    python scripts/backfill_thumbnails.py
+
+Creates the thumbnail variants (app/uploads/thumbs/<name>_<variant>.webp) for
+images uploaded before thumbnails existed, then stores the thumbnail name on
+student profiles that lack one. Images that already have all variants are
+skipped, so it is safe to re-run.
+"""
+
+import sys
+import os
+import time
+import asyncio
+
+# ── Path setup ──────────────────────────────────────────────
+current_dir = os.path.dirname(os.path.abspath(__file__))
+service_root = os.path.dirname(current_dir)
+sys.path.insert(0, service_root)
+os.chdir(service_root)
+
+from app.database import student_collection
+from app.utils import UPLOAD_DIR, THUMBNAIL_DIR, THUMBNAIL_SIZES, _make_thumbnails, thumbnail_name
+
+
+async def backfill_students() -> int:
+    """Set `thumbnail` on students whose image now has one; returns how many were updated."""
+    updated = 0
+    cursor = student_collection.find({"image": {"$ne": None}, "thumbnail": None}, {"image": 1})
+    async for student in cursor:
+        thumb = thumbnail_name(student["image"])
+        if os.path.exists(os.path.join(UPLOAD_DIR, thumb)):
+            await student_collection.update_one({"_id": student["_id"]}, {"$set": {"thumbnail": thumb}})
+            updated += 1
+    return updated
+
+
+def main():
+    done = skipped = failed = 0
+    started = time.perf_counter()
+
+    for name in sorted(os.listdir(UPLOAD_DIR)):
+        path = os.path.join(UPLOAD_DIR, name)
+        if name.startswith(".") or not os.path.isfile(path):
+            continue
+        stem = os.path.splitext(name)[0]
+        if all(os.path.exists(os.path.join(THUMBNAIL_DIR, f"{stem}_{v}.webp")) for v in THUMBNAIL_SIZES):
+            skipped += 1
+            continue
+        try:
+            _make_thumbnails(path, stem)
+            done += 1
+        except Exception as e:
+            print(f"  ⚠️ {name}: {e}")
+            failed += 1
+
+    print(f"[THUMBNAILS] {done} created, {skipped} already present, {failed} failed "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"[THUMBNAILS] {asyncio.run(backfill_students())} student profiles updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Google sign-in stand-in
+=======================
+Run from the user_service directory:
+    python scripts/fake_google_certs.py --port 8090 --client-id test-client --max-age 300
+
+Serves what verify_google_token needs from Google, offline:
+  GET  /oauth2/v1/certs   {key id: PEM certificate}, with Cache-Control max-age
+                          (the real endpoint's format), after --latency-ms
+  GET  /token?sub=..&email=..&name=..
+                          {"id_token": ...} signed with the current key, for
+                          --client-id, issued by accounts.google.com
+  POST /rotate            adds a new signing key and makes it current
+  GET  /stats             how many times the certs were fetched
+
+Point the user service at it:
+    GOOGLE_CERTS_URL=http://localhost:8090/oauth2/v1/certs
+    GOOGLE_CLIENT_ID=test-client
+
+Login burst (the 9 a.m. sign-in), against a running user service:
+    python scripts/fake_google_certs.py --burst 500 --concurrency 50 \\
+        --user-service http://localhost:8000
+Mints --burst distinct ID tokens, posts them to /auth/google/auth, and reports
+latency percentiles plus how many cert fetches the burst caused (expect 0 or 1).
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+
+def make_key() -> tuple[str, str, str]:
+    """(key id, private key PEM, self-signed certificate PEM)."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-google-signer")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=30))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode()
+    return uuid.uuid4().hex, private_pem, cert_pem
+
+
+class FakeGoogle:
+    def __init__(self, client_id: str, max_age: int, latency_ms: float):
+        self.client_id = client_id
+        self.max_age = max_age
+        self.latency_ms = latency_ms
+        self.certs: dict[str, str] = {}
+        self.cert_fetches = 0
+        self._lock = threading.Lock()
+        self.rotate()
+
+    def rotate(self) -> str:
+        key_id, private_pem, cert_pem = make_key()
+        with self._lock:
+            self.certs[key_id] = cert_pem
+            self.signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+        return key_id
+
+    def id_token(self, sub: str, email: str, name: str | None = None) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": self.client_id,
+            "sub": sub,
+            "email": email,
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+        }
+        if name:
+            payload["name"] = name
+        return google_jwt.encode(self.signer, payload).decode()
+
+
+def make_handler(google: FakeGoogle):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, body: dict, headers: dict | None = None):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/oauth2/v1/certs":
+                time.sleep(google.latency_ms / 1000)
+                with google._lock:
+                    google.cert_fetches += 1
+                    certs = dict(google.certs)
+                self._json(certs, {"Cache-Control": f"public, max-age={google.max_age}, must-revalidate, no-transform"})
+            elif url.path == "/token":
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                sub = query.get("sub") or uuid.uuid4().hex
+                email = query.get("email") or f"{sub}@example.com"
+                self._json({"id_token": google.id_token(sub, email, query.get("name"))})
+            elif url.path == "/stats":
+                self._json({"cert_fetches": google.cert_fetches, "keys": list(google.certs)})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/rotate":
+                self._json({"key_id": google.rotate()})
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def run_burst(google: FakeGoogle, args):
+    import requests
+
+    tokens = [google.id_token(f"burst-{i}", f"burst-{i}@example.com", f"Student {i}") for i in range(args.burst)]
+    url = f"{args.user_service.rstrip('/')}/auth/google/auth"
+    fetches_before = google.cert_fetches
+
+    def login(token: str) -> tuple[float, int]:
+        started = time.perf_counter()
+        response = requests.post(url, json={"token": token}, timeout=60)
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login, tokens))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in results)
+    failed = sum(1 for _, code in results if code != 200)
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    print(f"[BURST] {len(results)} logins, concurrency {args.concurrency}, {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f}/s), {failed} failed")
+    print(f"[BURST] p50 {pct(50):.1f} ms   p95 {pct(95):.1f} ms   p99 {pct(99):.1f} ms   max {latencies[-1]:.1f} ms")
+    print(f"[BURST] cert fetches during burst: {google.cert_fetches - fetches_before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for Google's ID-token signing certs")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--client-id", default="test-client", help="aud of minted tokens (GOOGLE_CLIENT_ID)")
+    parser.add_argument("--max-age", type=int, default=300, help="Cache-Control max-age of the certs response")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Delay before serving the certs")
+    parser.add_argument("--burst", type=int, default=0, help="Fire this many logins at --user-service, then exit")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--user-service", default="http://localhost:8000")
+    args = parser.parse_args()
+
+    google = FakeGoogle(args.client_id, args.max_age, args.latency_ms)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(google))
+    print(f"[FAKE GOOGLE] certs at http://localhost:{args.port}/oauth2/v1/certs (max-age {args.max_age}s)")
+
+    if not args.burst:
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run_burst(google, args)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()